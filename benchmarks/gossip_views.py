@@ -0,0 +1,123 @@
+"""
+Micro-benchmark of the Gossip view operations.
+
+Times the view merge, the hop count increment and the HEAD/RAND view and
+peer selections of Gossip against the Counter-based versions they
+replaced, for small and large views. Run it from the repository root:
+
+    python benchmarks/gossip_views.py
+"""
+import math
+import random
+import timeit
+from collections import Counter
+
+from unsserv.common.gossip.config import SelectionPolicy
+from unsserv.common.gossip.gossip import Gossip
+from unsserv.common.structs import Node
+
+NUMBER = 100  # calls per timing
+REPEAT = 5  # timings, the best one is kept
+
+
+def get_view(size: int, first_port: int) -> Counter:
+    return Counter(
+        {
+            Node(("127.0.0.1", port)): random.randint(0, 20)
+            for port in range(first_port, first_port + size)
+        }
+    )
+
+
+def merge_views_counter(view1: Counter, view2: Counter) -> Counter:
+    all_nodes = set(list(view1.keys()) + list(set(view2.keys())))
+    merged_view: Counter = Counter()
+    for node in all_nodes:
+        merged_view[node] = (
+            view1[node]
+            if view1.get(node, math.inf) < view2.get(node, math.inf)
+            else view2[node]
+        )
+    return merged_view
+
+
+def increase_hop_count_counter(view: Counter) -> Counter:
+    return view + Counter(view.keys())
+
+
+def select_view_counter(view: Counter, size: int, policy: SelectionPolicy):
+    view = view.copy()
+    remove_amount = max(len(view) - size, 0)
+    ordered_nodes = list(map(lambda n: n[0], reversed(view.most_common())))
+    if policy is SelectionPolicy.RAND:
+        removed_nodes = random.sample(ordered_nodes, remove_amount)
+    else:
+        removed_nodes = ordered_nodes[-remove_amount:]
+    for node in removed_nodes:
+        view.pop(node)
+    return view
+
+
+def select_peers_counter(view: Counter, amount: int, policy: SelectionPolicy):
+    ordered_nodes = list(map(lambda n: n[0], reversed(view.most_common())))
+    if policy is SelectionPolicy.RAND:
+        return random.sample(ordered_nodes, amount)
+    return ordered_nodes[:amount]
+
+
+def get_time(function, *args) -> float:
+    """Best time per call, in microseconds."""
+    times = timeit.repeat(lambda: function(*args), number=NUMBER, repeat=REPEAT)
+    return min(times) * 1e6 / NUMBER
+
+
+def print_time(name: str, before, after, *args):
+    before_time, after_time = get_time(before, *args), get_time(after, *args)
+    print(f"  {name:<10} {before_time:>9.1f} -> {after_time:>7.1f}us")
+
+
+def main():
+    my_node = Node(("127.0.0.1", 7771))
+    for view_size, received_size in [(10, 5), (1000, 20), (1000, 1000)]:
+        print(f"view {view_size}, received {received_size} (before -> after):")
+        local_view = get_view(view_size, 8000)
+        # half of the received nodes are already in the local view
+        received_view = get_view(received_size, 8000 + view_size - received_size // 2)
+        buffer = merge_views_counter(local_view, received_view)
+        for policy in [SelectionPolicy.HEAD, SelectionPolicy.RAND]:
+            gossip = Gossip(
+                my_node,
+                "benchmark",
+                local_view_size=view_size,
+                view_selection=policy,
+                peer_selection=policy,
+            )
+            name = policy.name
+            if policy is SelectionPolicy.HEAD:
+                print_time(
+                    "merge",
+                    merge_views_counter,
+                    gossip._merge_views,
+                    local_view,
+                    received_view,
+                )
+                print_time(
+                    "hops",
+                    increase_hop_count_counter,
+                    gossip._increase_hop_count,
+                    received_view,
+                )
+            print_time(
+                f"view {name}",
+                lambda: select_view_counter(buffer, view_size, policy),
+                lambda: gossip._select_view(buffer.copy()),
+            )
+            print_time(
+                f"peer {name}",
+                lambda: select_peers_counter(local_view, 1, policy),
+                lambda: gossip._select_peers(local_view, 1),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ extras_require = {
         "flake8==3.7.9",
         "black==19.10b0",
     ],
+    "numpy": ["numpy"],  # faster vector aggregation
 }
 
 setuptools.setup(
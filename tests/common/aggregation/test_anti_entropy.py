@@ -1,4 +1,5 @@
 import asyncio
+from statistics import mean
 
 import pytest
 
@@ -6,8 +7,11 @@ from tests.utils import init_extreme_membership
 from unsserv.common.aggregation.anti_entropy import (
     AntiEntropy,
     aggregate_functions,
+    aggregate_names,
+    sketch_aggregates,
 )
-from unsserv.common.aggregation.config import AggregateType
+from unsserv.common.aggregation.config import AggregateType, AntiConfig
+from unsserv.common.aggregation.structs import PushSum
 from unsserv.common.gossip.config import GossipConfig
 
 init_extreme_membership = init_extreme_membership  # for flake8 compliance
@@ -15,26 +19,37 @@ init_extreme_membership = init_extreme_membership  # for flake8 compliance
 AGGR_SERVICE_ID = "tman"
 
 
+def get_port(node):
+    return node.address_info[1]
+
+
+def get_spread(node):
+    return node.address_info[1] % 10 * 10  # from 0 to 90
+
+
 @pytest.mark.asyncio
 @pytest.fixture
 async def init_anti_entropy():
     anti = None
     r_antis = []
 
-    async def _init_anti_entropy(newc, r_newcs):
+    async def _init_anti_entropy(
+        newc, r_newcs, aggregate_type=AggregateType.MEAN, get_value=get_port
+    ):
         nonlocal anti, r_antis
         anti = AntiEntropy(newc)
         await anti.join(
             AGGR_SERVICE_ID,
-            aggregate_type=AggregateType.MEAN,
-            aggregate_value=anti.my_node.address_info[1],
+            aggregate_type=aggregate_type,
+            aggregate_value=get_value(anti.my_node),
+            initiator=True,
         )
         for r_newc in r_newcs:
             r_anti = AntiEntropy(r_newc)
             await r_anti.join(
                 AGGR_SERVICE_ID,
-                aggregate_type=AggregateType.MEAN,
-                aggregate_value=r_newc.my_node.address_info[1],
+                aggregate_type=aggregate_type,
+                aggregate_value=get_value(r_newc.my_node),
             )
             r_antis.append(r_anti)
         await asyncio.sleep(GossipConfig.GOSSIPING_FREQUENCY * 7)
@@ -62,15 +77,19 @@ async def test_start_stop(init_extreme_membership, init_anti_entropy, amount):
         (amount, aggregate_type)
         for amount in [1, 5, 100]
         for aggregate_type in AggregateType
+        if aggregate_type not in sketch_aggregates
     ],
 )
 async def test_aggregate(
     init_extreme_membership, init_anti_entropy, amount, aggregate_type
 ):
     newc, r_newcs = await init_extreme_membership(amount)
-    anti, r_antis = await init_anti_entropy(newc, r_newcs)
+    anti, r_antis = await init_anti_entropy(newc, r_newcs, aggregate_type)
+    if aggregate_type in {AggregateType.COUNT, AggregateType.SUM}:
+        await asyncio.sleep(AntiConfig.PUSH_SUM_FREQUENCY * 20)
 
     first_port = anti.my_node.address_info[1]
+    assert aggregate_names[aggregate_type.name.lower()] == aggregate_type
     assert (
         abs(
             await anti.get_aggregate()
@@ -94,6 +113,42 @@ async def test_aggregate(
         )
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("amount", [1, 5, 30])
+async def test_push_sum(init_extreme_membership, init_anti_entropy, amount):
+    newc, r_newcs = await init_extreme_membership(amount)
+    anti, r_antis = await init_anti_entropy(
+        newc, r_newcs, aggregate_type=AggregateType.PUSH_SUM, get_value=get_spread
+    )
+    await asyncio.sleep(AntiConfig.PUSH_SUM_FREQUENCY * 20)
+
+    antis = [anti] + r_antis
+    values = [get_spread(a.my_node) for a in antis]
+    expected_mean = mean(values)
+    max_error = (max(values) - min(values)) * 0.001
+    total_sum = sum(a._sum for a in antis)
+    total_weight = sum(a._weight for a in antis)
+    assert total_sum / total_weight == pytest.approx(expected_mean)  # conserved
+    for a in antis:
+        assert abs(await a.get_aggregate() - expected_mean) <= max_error
+        assert a.get_estimate_error() <= max_error
+        low, high = a.get_confidence_interval()
+        assert low <= await a.get_aggregate() <= high
+
+
+@pytest.mark.asyncio
+async def test_push_sum_retransmission(init_extreme_membership, init_anti_entropy):
+    newc, r_newcs = await init_extreme_membership(0)
+    anti, _ = await init_anti_entropy(
+        newc, r_newcs, aggregate_type=AggregateType.PUSH_SUM
+    )
+    push_sum = PushSum(id="push", sum=10, weight=1, estimate=10, epoch=anti.epoch)
+    weight = anti._weight
+    await anti._handler_push_sum(newc.my_node, push_sum)
+    await anti._handler_push_sum(newc.my_node, push_sum)  # its reply was lost
+    assert anti._weight == weight + 1
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "amount",
@@ -117,3 +172,99 @@ async def test_aggregate_handler(init_extreme_membership, init_anti_entropy, amo
 
     await asyncio.sleep(GossipConfig.GOSSIPING_FREQUENCY * 7)
     assert handler_event.is_set()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("amount", [1, 5, 30])
+async def test_epoch(init_extreme_membership, amount):
+    newc, r_newcs = await init_extreme_membership(amount)
+    epoch_length = GossipConfig.GOSSIPING_FREQUENCY * 10
+    antis = []
+    for i, membership in enumerate([newc] + r_newcs):
+        anti = AntiEntropy(membership)
+        await anti.join(
+            AGGR_SERVICE_ID,
+            aggregate_type=AggregateType.MAX,
+            aggregate_value=1000 + i,
+            epoch_length=epoch_length,
+        )
+        antis.append(anti)
+    try:
+        await asyncio.sleep(epoch_length * 1.5)
+        for anti in antis:
+            assert await anti.get_aggregate() == 1000 + amount
+            anti.set_local_value(anti.my_node.address_info[1] % 1000)
+        await asyncio.sleep(epoch_length * 2.5)
+        expected_max = max(anti.my_node.address_info[1] % 1000 for anti in antis)
+        epochs = {anti.epoch for anti in antis}
+        assert max(epochs) - min(epochs) <= 1
+        for anti in antis:
+            assert await anti.get_aggregate() == expected_max  # it went down
+    finally:
+        for anti in antis:
+            await anti.leave()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("amount", [1, 5, 30])
+async def test_wait_converged(init_extreme_membership, init_anti_entropy, amount):
+    newc, r_newcs = await init_extreme_membership(amount)
+    anti, r_antis = await init_anti_entropy(
+        newc, r_newcs, aggregate_type=AggregateType.PUSH_SUM
+    )
+    handler_calls = []
+
+    async def handler(aggregate):
+        handler_calls.append(aggregate)
+
+    anti.add_aggregate_handler(handler)
+    aggregate = await asyncio.wait_for(
+        anti.wait_converged(0.001), timeout=AntiConfig.PUSH_SUM_FREQUENCY * 50
+    )
+
+    first_port = anti.my_node.address_info[1]
+    expected_mean = mean(number + first_port for number in range(amount + 1))
+    assert aggregate == pytest.approx(expected_mean, rel=0.01)
+    await asyncio.sleep(AntiConfig.PUSH_SUM_FREQUENCY * 10)
+    handlers_amount = len(handler_calls)
+    anti._config.NOTIFY_EPSILON = 0.1  # converged values do not change this much
+    await asyncio.sleep(AntiConfig.PUSH_SUM_FREQUENCY * 10)
+    assert len(handler_calls) == handlers_amount
+
+
+def get_capacity(node):
+    return node.address_info[1] % 10 + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "amount,aggregate_type",
+    [
+        (amount, aggregate_type)
+        for amount in [1, 5, 30]
+        for aggregate_type in [AggregateType.MEAN, AggregateType.PUSH_SUM]
+    ],
+)
+async def test_weighted_aggregate(init_extreme_membership, amount, aggregate_type):
+    newc, r_newcs = await init_extreme_membership(amount)
+    antis = []
+    for membership in [newc] + r_newcs:
+        anti = AntiEntropy(membership)
+        await anti.join(
+            AGGR_SERVICE_ID,
+            aggregate_type=aggregate_type,
+            aggregate_value=membership.my_node.address_info[1],
+            weight=get_capacity,
+        )
+        antis.append(anti)
+    try:
+        await asyncio.sleep(AntiConfig.PUSH_SUM_FREQUENCY * 20)
+        nodes = [anti.my_node for anti in antis]
+        expected_mean = sum(
+            node.address_info[1] * get_capacity(node) for node in nodes
+        ) / sum(get_capacity(node) for node in nodes)
+        for anti in antis:
+            assert await anti.get_aggregate() == pytest.approx(expected_mean, rel=0.001)
+    finally:
+        for anti in antis:
+            await anti.leave()
@@ -0,0 +1,101 @@
+import asyncio
+from statistics import mean
+
+import pytest
+
+from tests.utils import init_extreme_membership
+from unsserv.common.aggregation.config import AggregateType
+from unsserv.common.aggregation.group_anti_entropy import GroupAntiEntropy
+from unsserv.common.gossip.config import GossipConfig
+
+init_extreme_membership = init_extreme_membership  # for flake8 compliance
+
+AGGR_SERVICE_ID = "group"
+
+
+def get_rack(node):
+    return f"rack-{node.address_info[1] % 3}"
+
+
+def get_spread(node):
+    return node.address_info[1] % 10 * 10  # from 0 to 90
+
+
+@pytest.mark.asyncio
+@pytest.fixture
+async def init_group_anti_entropy():
+    antis = []
+
+    async def _init_group_anti_entropy(memberships, aggregate_type, **configuration):
+        for membership in memberships:
+            anti = GroupAntiEntropy(membership)
+            await anti.join(
+                AGGR_SERVICE_ID,
+                aggregate_type=aggregate_type,
+                aggregate_value=get_spread(membership.my_node),
+                group_by=get_rack,
+                **configuration,
+            )
+            antis.append(anti)
+        await asyncio.sleep(GossipConfig.GOSSIPING_FREQUENCY * 15)
+        return antis
+
+    try:
+        yield _init_group_anti_entropy
+    finally:
+        for anti in antis:
+            await anti.leave()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "amount,aggregate_type",
+    [
+        (amount, aggregate_type)
+        for amount in [2, 5, 30]
+        for aggregate_type in [AggregateType.MEAN, AggregateType.MAX]
+    ],
+)
+async def test_group_aggregate(
+    init_extreme_membership, init_group_anti_entropy, amount, aggregate_type
+):
+    newc, r_newcs = await init_extreme_membership(amount)
+    antis = await init_group_anti_entropy([newc] + r_newcs, aggregate_type)
+
+    racks = {}
+    for anti in antis:
+        rack_values = racks.setdefault(get_rack(anti.my_node), [])
+        rack_values.append(get_spread(anti.my_node))
+    aggregate_function = {AggregateType.MEAN: mean, AggregateType.MAX: max}
+    for anti in antis:
+        aggregate = await asyncio.wait_for(
+            anti.wait_converged(0.001), timeout=GossipConfig.GOSSIPING_FREQUENCY * 50
+        )
+        assert set(aggregate) == set(racks)  # a single payload for every group
+        for rack, values in racks.items():
+            expected_value = aggregate_function[aggregate_type](values)
+            assert abs(aggregate[rack] - expected_value) <= 90 * 0.01
+        if aggregate_type == AggregateType.MEAN:
+            intervals = anti.get_confidence_interval()
+            for rack, (low, high) in intervals.items():
+                assert low <= aggregate[rack] <= high
+        else:
+            with pytest.raises(ValueError):
+                anti.get_confidence_interval()
+
+
+@pytest.mark.asyncio
+async def test_group_limits(init_extreme_membership, init_group_anti_entropy):
+    newc, r_newcs = await init_extreme_membership(10)
+    antis = await init_group_anti_entropy(
+        [newc] + r_newcs, AggregateType.MAX, max_groups=2, group_ttl=1
+    )
+
+    for anti in antis:
+        aggregate = await anti.get_aggregate()
+        assert len(aggregate) <= 2
+        assert get_rack(anti.my_node) in aggregate  # the own group is kept
+    for anti in antis[1:]:
+        await anti.leave()
+    await asyncio.sleep(2)
+    assert list(await antis[0].get_aggregate()) == [get_rack(antis[0].my_node)]
@@ -0,0 +1,184 @@
+import asyncio
+import random
+
+import pytest
+
+from tests.utils import init_extreme_membership
+from unsserv.common.aggregation import sketches, vector
+from unsserv.common.aggregation.config import AggregateType, AntiConfig
+from unsserv.common.aggregation.protocol import AntiCommand, AntiTranscoder
+from unsserv.common.aggregation.sketch_anti_entropy import SketchAntiEntropy
+from unsserv.common.aggregation.sketches import (
+    HyperLogLog,
+    QuantileSketch,
+    SpaceSaving,
+)
+from unsserv.common.aggregation.structs import PushSum
+from unsserv.common.gossip.config import GossipConfig
+from unsserv.common.rpc.rpc import MAX_MESSAGE_SIZE, get_message_size
+from unsserv.common.structs import Node
+
+init_extreme_membership = init_extreme_membership  # for flake8 compliance
+
+AGGR_SERVICE_ID = "sketch"
+ITEMS_PER_NODE = 200
+
+
+def get_items(index):
+    return [f"user-{item}" for item in range(index * 100, index * 100 + 200)]
+
+
+def get_latencies(index):
+    return [float(latency) for latency in range(1, ITEMS_PER_NODE + 1)]
+
+
+def get_searches(index):
+    return {"hot": 100, "warm": 50, f"cold-{index}": 10}
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "no-numpy"])
+def use_numpy(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(vector, "numpy", None)
+        monkeypatch.setattr(sketches, "numpy", None)
+    elif vector.numpy is None:
+        pytest.skip("NumPy not installed")
+
+
+@pytest.mark.asyncio
+@pytest.fixture
+async def init_sketch_anti_entropy():
+    antis = []
+
+    async def _init_sketch_anti_entropy(newcs, aggregate_type, get_values):
+        for i, newc in enumerate(newcs):
+            anti = SketchAntiEntropy(newc)
+            await anti.join(
+                AGGR_SERVICE_ID,
+                aggregate_type=aggregate_type,
+                aggregate_value=get_values(i),
+            )
+            antis.append(anti)
+        await asyncio.sleep(GossipConfig.GOSSIPING_FREQUENCY * 7)
+        return antis
+
+    try:
+        yield _init_sketch_anti_entropy
+    finally:
+        for anti in antis:
+            await anti.leave()
+
+
+def test_hyperloglog(use_numpy):
+    hll = HyperLogLog(10)
+    registers = hll.merge([hll.make(range(5000)), hll.make(range(2500, 10000))])
+    assert abs(hll.estimate(registers) - 10000) / 10000 < 0.1
+    raw_registers = hll.encode(registers)
+    assert len(raw_registers) == 2 ** 10
+    assert list(hll.decode(raw_registers)) == list(registers)
+
+
+def test_quantile_sketch(use_numpy):
+    quantile_sketch = QuantileSketch(0.01, 1e-3, 1e6)
+    values = [random.uniform(1, 1000) for _ in range(10000)]
+    counts = quantile_sketch.merge(
+        [quantile_sketch.make(values[:5000]), quantile_sketch.make(values[5000:])]
+    )
+    for quantile in [0, 0.5, 0.99, 1]:
+        expected_value = sorted(values)[int(quantile * (len(values) - 1))]
+        value = quantile_sketch.get_quantile(counts, quantile)
+        assert abs(value - expected_value) / expected_value < 0.02
+    assert list(quantile_sketch.decode(quantile_sketch.encode(counts))) == list(counts)
+    first, raw_counts = quantile_sketch.encode(quantile_sketch.make([10, 20]))
+    assert len(raw_counts) < quantile_sketch.size * 4  # only non-empty buckets
+
+    all_values = [10 ** (exponent / 100) for exponent in range(-300, 601)]
+    counts = quantile_sketch.make(all_values)  # every bucket is non-empty
+    raw_counts = quantile_sketch.encode(counts)
+    push_sum = PushSum(id="push", sum=raw_counts, weight=1, estimate=raw_counts)
+    message = AntiTranscoder(Node(("127.0.0.1", 7771)), AGGR_SERVICE_ID).encode(
+        AntiCommand.PUSH_SUM, push_sum
+    )
+    assert get_message_size(message) <= MAX_MESSAGE_SIZE
+    collapsed_counts = quantile_sketch.decode(raw_counts)  # the lowest collapsed
+    assert sum(collapsed_counts) == sum(counts)
+    for quantile in [0.5, 0.99, 1]:
+        expected_value = quantile_sketch.get_quantile(counts, quantile)
+        value = quantile_sketch.get_quantile(collapsed_counts, quantile)
+        assert value == expected_value
+
+
+def test_space_saving():
+    space_saving = SpaceSaving(3)
+    summary = space_saving.merge(
+        [space_saving.make(["a"] * 5 + ["b"] * 3 + ["c"]), space_saving.make("abd")]
+    )
+    assert len(summary.counts) == 3
+    assert summary.total == 12
+    top = space_saving.get_top(summary, 2)
+    assert [heavy_hitter.key for heavy_hitter in top] == ["a", "b"]
+    assert top[0].frequency == pytest.approx(6 / 12)
+    assert top[0].error == pytest.approx(1 / 12)  # "c" or "d" was dropped
+    half_summary = space_saving.scale(summary, 0.5)
+    assert space_saving.get_distance(summary, half_summary) == 0
+    assert space_saving.decode(space_saving.encode(summary)) == summary
+    raw_summary = summary.total, summary.error, [(b"a", 6), (b"b", 3)]
+    assert list(space_saving.decode(raw_summary).counts) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("amount", [1, 5, 30])
+async def test_distinct_count(
+    use_numpy, init_extreme_membership, init_sketch_anti_entropy, amount
+):
+    newc, r_newcs = await init_extreme_membership(amount)
+    antis = await init_sketch_anti_entropy(
+        [newc] + r_newcs, AggregateType.DISTINCT_COUNT, get_items
+    )
+
+    distinct_items = {item for i in range(amount + 1) for item in get_items(i)}
+    for anti in antis:
+        aggregate = await asyncio.wait_for(
+            anti.wait_converged(), timeout=GossipConfig.GOSSIPING_FREQUENCY * 50
+        )
+        assert abs(aggregate - len(distinct_items)) / len(distinct_items) < 0.1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("amount", [1, 5, 30])
+async def test_quantile(
+    use_numpy, init_extreme_membership, init_sketch_anti_entropy, amount
+):
+    newc, r_newcs = await init_extreme_membership(amount)
+    antis = await init_sketch_anti_entropy(
+        [newc] + r_newcs, AggregateType.QUANTILE, get_latencies
+    )
+    await asyncio.sleep(AntiConfig.PUSH_SUM_FREQUENCY * 20)
+
+    for anti in antis:
+        assert abs(await anti.get_aggregate() - 100) / 100 < 0.05  # median
+        assert abs(await anti.get_quantile(0.99) - 198) / 198 < 0.05
+    with pytest.raises(ValueError):
+        await SketchAntiEntropy(newc).join(
+            "mean", aggregate_type=AggregateType.MEAN, aggregate_value=[1]
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("amount", [1, 5, 30])
+async def test_top_k(init_extreme_membership, init_sketch_anti_entropy, amount):
+    newc, r_newcs = await init_extreme_membership(amount)
+    antis = await init_sketch_anti_entropy(
+        [newc] + r_newcs, AggregateType.TOP_K, get_searches
+    )
+
+    total_searches = sum(get_searches(0).values())
+    for anti in antis:
+        hot, warm, *_ = await asyncio.wait_for(
+            anti.wait_converged(), timeout=GossipConfig.GOSSIPING_FREQUENCY * 50
+        )
+        assert (hot.key, warm.key) == ("hot", "warm")
+        assert hot.frequency == pytest.approx(100 / total_searches, rel=0.05)
+        assert warm.frequency == pytest.approx(50 / total_searches, rel=0.05)
+    with pytest.raises(ValueError):
+        antis[0].get_confidence_interval()
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from tests.utils import init_extreme_membership, init_stable_membership
+from unsserv.common.aggregation.config import AggregateType
+from unsserv.common.aggregation.tree_aggregation import TreeAggregation
+from unsserv.common.gossip.config import GossipConfig
+from unsserv.extreme.dissemination.one_to_many.mon import Mon
+from unsserv.stable.dissemination.one_to_many.brisa import Brisa
+
+init_extreme_membership = init_extreme_membership  # for flake8 compliance
+init_stable_membership = init_stable_membership  # for flake8 compliance
+
+DISSEMINATION_SERVICE_ID = "one_to_many"
+AGGR_SERVICE_ID = "tree"
+
+NODE_VALUE = 2
+
+
+@pytest.mark.asyncio
+@pytest.fixture
+async def init_tree_aggregation():
+    services = []
+
+    async def _init_tree_aggregation(memberships, dissemination_class, aggregate_type):
+        trees = []
+        for i, membership in enumerate(memberships):
+            dissemination = dissemination_class(membership)
+            if dissemination_class == Brisa:
+                await dissemination.join(DISSEMINATION_SERVICE_ID, im_root=i == 0)
+            else:
+                await dissemination.join(DISSEMINATION_SERVICE_ID)
+            services.append(dissemination)
+            tree = TreeAggregation(dissemination)
+            await tree.join(
+                AGGR_SERVICE_ID,
+                aggregate_type=aggregate_type,
+                aggregate_value=NODE_VALUE,
+            )
+            services.append(tree)
+            trees.append(tree)
+        await asyncio.sleep(GossipConfig.GOSSIPING_FREQUENCY * 7)
+        return trees
+
+    try:
+        yield _init_tree_aggregation
+    finally:
+        for service in reversed(services):
+            await service.leave()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "amount,aggregate_type",
+    [
+        (amount, aggregate_type)
+        for amount in [1, 5, 30]
+        for aggregate_type in [AggregateType.COUNT, AggregateType.SUM]
+    ],
+)
+async def test_brisa_tree_aggregate(
+    init_stable_membership, init_tree_aggregation, amount, aggregate_type
+):
+    hypa, r_hypas = await init_stable_membership(amount)
+    tree, *r_trees = await init_tree_aggregation(
+        [hypa] + r_hypas, Brisa, aggregate_type
+    )
+
+    tree_aggregate = await tree.get_tree_aggregate()
+    assert int((amount + 1) * 0.75) <= tree_aggregate.count  # as Brisa reaches
+    factor = 1 if aggregate_type == AggregateType.COUNT else NODE_VALUE
+    assert tree_aggregate.value == tree_aggregate.count * factor  # exact
+    if r_trees:
+        with pytest.raises(RuntimeError):
+            await r_trees[0].get_aggregate()  # only the root of Brisa
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("amount", [1, 5, 30])
+async def test_mon_tree_aggregate(
+    init_extreme_membership, init_tree_aggregation, amount
+):
+    newc, r_newcs = await init_extreme_membership(amount)
+    trees = await init_tree_aggregation([newc] + r_newcs, Mon, AggregateType.MEAN)
+
+    for tree in trees[:2]:  # any node can be the root with Mon
+        tree_aggregate = await tree.get_tree_aggregate()
+        assert int((amount + 1) * 0.75) <= tree_aggregate.count
+        assert tree_aggregate.value == NODE_VALUE
+    trees[0]._config.TIMEOUT = 0  # no time left for the children to report
+    tree_aggregate = await trees[0].get_tree_aggregate()
+    assert (tree_aggregate.count, tree_aggregate.complete) == (1, False)
+    with pytest.raises(ValueError):
+        await TreeAggregation(trees[0].dissemination).join(
+            "quantile", aggregate_type=AggregateType.QUANTILE
+        )
+    with pytest.raises(ValueError):
+        await TreeAggregation(trees[0].dissemination).join(
+            "mean", aggregate_type=AggregateType.MEAN
+        )  # without 'aggregate_value'
@@ -0,0 +1,111 @@
+import asyncio
+from statistics import mean
+
+import pytest
+
+from tests.utils import init_extreme_membership
+from unsserv.common.aggregation import vector
+from unsserv.common.aggregation.config import AggregateType, AntiConfig
+from unsserv.common.aggregation.vector_anti_entropy import VectorAntiEntropy
+from unsserv.common.gossip.config import GossipConfig
+
+init_extreme_membership = init_extreme_membership  # for flake8 compliance
+
+AGGR_SERVICE_ID = "vector"
+
+
+def get_metrics(node):
+    port = node.address_info[1]
+    return {"load": port, "latency": port * 2, "errors": -port}
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "no-numpy"])
+def use_numpy(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(vector, "numpy", None)
+    elif vector.numpy is None:
+        pytest.skip("NumPy not installed")
+
+
+@pytest.mark.asyncio
+@pytest.fixture
+async def init_vector_anti_entropy():
+    antis = []
+
+    async def _init_vector_anti_entropy(newcs, aggregate_type):
+        for i, newc in enumerate(newcs):
+            anti = VectorAntiEntropy(newc)
+            await anti.join(
+                AGGR_SERVICE_ID,
+                aggregate_type=aggregate_type,
+                aggregate_value=get_metrics(newc.my_node),
+                initiator=i == 0,
+            )
+            antis.append(anti)
+        await asyncio.sleep(GossipConfig.GOSSIPING_FREQUENCY * 7)
+        return antis
+
+    try:
+        yield _init_vector_anti_entropy
+    finally:
+        for anti in antis:
+            await anti.leave()
+
+
+def test_vector_encoding(use_numpy):
+    values = [1.5, -2, 3]
+    raw_vector = vector.encode_vector(vector.make_vector(values))
+    assert len(raw_vector) == 8 * len(values)
+    assert list(vector.decode_vector(raw_vector)) == values
+    assert list(
+        vector.aggregate_vectors(
+            AggregateType.MAX, [vector.make_vector(values), vector.make_vector([0] * 3)]
+        )
+    ) == [1.5, 0, 3]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "amount,aggregate_type",
+    [
+        (amount, aggregate_type)
+        for amount in [1, 5, 30]
+        for aggregate_type in [
+            AggregateType.MEAN,
+            AggregateType.MAX,
+            AggregateType.PUSH_SUM,
+            AggregateType.SUM,
+        ]
+    ],
+)
+async def test_vector_aggregate(
+    use_numpy,
+    init_extreme_membership,
+    init_vector_anti_entropy,
+    amount,
+    aggregate_type,
+):
+    newc, r_newcs = await init_extreme_membership(amount)
+    antis = await init_vector_anti_entropy([newc] + r_newcs, aggregate_type)
+    if aggregate_type in {AggregateType.PUSH_SUM, AggregateType.SUM}:
+        await asyncio.sleep(AntiConfig.PUSH_SUM_FREQUENCY * 20)
+
+    all_metrics = [get_metrics(anti.my_node) for anti in antis]
+    aggregate_function = {
+        AggregateType.MEAN: mean,
+        AggregateType.MAX: max,
+        AggregateType.PUSH_SUM: mean,
+        AggregateType.SUM: sum,
+    }[aggregate_type]
+    for anti in antis:
+        aggregate = await anti.get_aggregate()
+        assert set(aggregate) == {"load", "latency", "errors"}
+        for metric, value in aggregate.items():
+            expected_value = aggregate_function(
+                [metrics[metric] for metrics in all_metrics]
+            )
+            assert abs(value - expected_value) / abs(expected_value) < 0.1
+    with pytest.raises(ValueError):
+        await VectorAntiEntropy(newc).join(
+            "count", aggregate_type=AggregateType.COUNT, aggregate_value=[1]
+        )
@@ -11,8 +11,11 @@ from tests.utils import get_random_nodes
 from unsserv.common.gossip import gossip
 from unsserv.common.gossip.config import GossipConfig
 from unsserv.common.gossip.gossip import View
+from unsserv.common.gossip.protocol import _parse_push_data
+from unsserv.common.gossip.structs import PushData
 from unsserv.common.gossip.typing import Payload
-from unsserv.common.structs import Node
+from unsserv.common.rpc.rpc import decode_data, encode_data
+from unsserv.common.structs import Node, OverflowPolicy
 from unsserv.common.utils import parse_node
 
 node = Node(("127.0.0.1", 7771))
@@ -59,6 +62,22 @@ def test_peer_selection():
     assert r_nodes[-1] == gsp._select_peer(view)
 
 
+def test_peers_selection():
+    r_nodes = get_random_nodes(GossipConfig.LOCAL_VIEW_SIZE, first_port=7772)
+    view = Counter(dict(map(lambda n: (n[1], n[0] + 1), enumerate(r_nodes))))
+    gsp = gossip.Gossip(node, SERVICE_ID)
+
+    gsp._config.PEER_SELECTION = unsserv.common.gossip.config.SelectionPolicy.HEAD
+    assert r_nodes[:3] == gsp._select_peers(view, 3)
+
+    gsp._config.PEER_SELECTION = unsserv.common.gossip.config.SelectionPolicy.TAIL
+    assert r_nodes[-3:] == gsp._select_peers(view, 3)
+
+    gsp._config.PEER_SELECTION = unsserv.common.gossip.config.SelectionPolicy.RAND
+    assert 3 == len(set(gsp._select_peers(view, 3)))
+    assert set(r_nodes) == set(gsp._select_peers(view, len(r_nodes) * 2))
+
+
 def test_increase_hop_count():
     r_nodes = get_random_nodes(GossipConfig.LOCAL_VIEW_SIZE, first_port=7772)
     view = Counter(dict(map(lambda n: (n[1], n[0] + 1), enumerate(r_nodes))))
@@ -78,17 +97,237 @@ def test_merge():
     assert view1 != view2
     assert view1 == gsp._merge_views(view1, view2)
 
+    merged_view = view2.copy()
+    merged_view[node] = 0
+    assert merged_view == gsp._merge_views(Counter({node: 0}), view2)
+
+
+def test_partial_view_selection():
+    r_nodes = get_random_nodes(GossipConfig.LOCAL_VIEW_SIZE * 10, first_port=7772)
+    view = Counter(dict(map(lambda n: (n[1], n[0] + 1), enumerate(r_nodes))))
+    gsp = gossip.Gossip(node, SERVICE_ID, local_view_size=len(r_nodes) - 1)
+
+    gsp._config.VIEW_SELECTION = unsserv.common.gossip.config.SelectionPolicy.HEAD
+    assert set(r_nodes[:-1]) == set(gsp._select_view(view.copy()).keys())
+    gsp._config.VIEW_SELECTION = unsserv.common.gossip.config.SelectionPolicy.TAIL
+    assert set(r_nodes[1:]) == set(gsp._select_view(view.copy()).keys())
+
+    gsp._config.PEER_SELECTION = unsserv.common.gossip.config.SelectionPolicy.HEAD
+    assert r_nodes[:3] == gsp._select_peers(view, 3)
+    gsp._config.PEER_SELECTION = unsserv.common.gossip.config.SelectionPolicy.TAIL
+    assert r_nodes[-3:] == gsp._select_peers(view, 3)
+
+
+def test_delta_exchange():
+    r_nodes = get_random_nodes(GossipConfig.LOCAL_VIEW_SIZE, first_port=7772)
+    view = Counter(dict(map(lambda n: (n[1], n[0] + 1), enumerate(r_nodes))))
+    gsp = gossip.Gossip(node, SERVICE_ID, delta_exchange=True)
+    r_gsp = gossip.Gossip(r_nodes[0], SERVICE_ID, delta_exchange=True)
+
+    full_push_data = gsp._make_push_data(r_nodes[0], view, {})
+    assert full_push_data.base_version == -1 and view == full_push_data.view
+    assert view == r_gsp._resolve_push_view(node, full_push_data)
+
+    push_data = gsp._make_push_data(r_nodes[0], view, {})
+    assert push_data.base_version == 0 and not push_data.view
+    assert view == r_gsp._resolve_push_view(node, push_data)
+
+    new_view = view.copy()
+    new_view.pop(r_nodes[1])
+    new_view[r_nodes[2]] = 0
+    push_data = gsp._make_push_data(r_nodes[0], new_view, {})
+    assert [r_nodes[1]] == push_data.removed
+    assert Counter({r_nodes[2]: 0}) == push_data.view
+    assert new_view == r_gsp._resolve_push_view(node, push_data)
+    full_size = len(encode_data(full_push_data.encode()))
+    assert len(encode_data(push_data.encode())) * 2 < full_size
+
+    push_data = gsp._make_push_data(r_nodes[0], view, {}, peer_known_version=0)
+    assert push_data.base_version == -1  # peer does not know the last view sent
+    r_gsp._received_views.clear()
+    push_data = gsp._make_push_data(r_nodes[0], view, {})
+    assert r_gsp._resolve_push_view(node, push_data) is None
+
+
+def test_shuffle():
+    r_nodes = get_random_nodes(GossipConfig.LOCAL_VIEW_SIZE * 2, first_port=7772)
+    gsp = gossip.Gossip(node, SERVICE_ID, shuffle_length=5, healer=2, swapper=3)
+    gsp._config.VIEW_SELECTION = unsserv.common.gossip.config.SelectionPolicy.RAND
+    gsp.local_view = Counter(
+        dict(map(lambda n: (n[1], n[0] + 1), enumerate(r_nodes[:10])))
+    )
+
+    push_view = gsp._get_push_view(r_nodes[0])
+    assert 5 == len(push_view) and 0 == push_view[node]
+    assert not {r_nodes[8], r_nodes[9]} & set(push_view.keys())  # oldest kept
+    swappable_nodes = gsp._swappable_nodes.pop(r_nodes[0])
+    assert set(push_view.keys()) - {node} == swappable_nodes
+
+    buffer = gsp._merge_views(
+        gsp.local_view, Counter({r_node: 1 for r_node in r_nodes[10:15]})
+    )
+    new_view = gsp._select_shuffled_view(buffer, swappable_nodes)
+    assert GossipConfig.LOCAL_VIEW_SIZE == len(new_view)
+    assert not {r_nodes[8], r_nodes[9]} & set(new_view.keys())  # healed
+    assert 3 == len(swappable_nodes - set(new_view.keys()))  # swapped
+
+
+@pytest.mark.asyncio
+async def test_changed_only_payloads():
+    class Subscriber(unsserv.common.gossip.gossip.IGossipSubscriber):
+        def __init__(self, key, version):
+            self.key = key
+            self.version = version
+
+        async def receive_payload(self, payload: Payload):
+            pass
+
+        async def get_payload(self) -> Tuple[Any, Any]:
+            return self.key, self.version
+
+        def get_payload_version(self) -> Any:
+            return self.version
+
+    r_node = get_random_nodes(1, first_port=7772)[0]
+    gsp = gossip.Gossip(node, SERVICE_ID, changed_only_payloads=True)
+    versioned_subscriber = Subscriber("versioned", 0)
+    gsp.subscribe(versioned_subscriber)
+    gsp.subscribe(Subscriber("unversioned", None))
+    await gsp.start()
+
+    payload = await gsp._get_data_from_subscribers()
+    payload_versions = dict(gsp._payload_versions)
+    assert payload == gsp._get_unsent_payload(r_node, payload)
+    gsp._set_payload_as_sent(r_node, payload, payload_versions)
+    assert {"unversioned": None} == gsp._get_unsent_payload(r_node, payload)
+
+    versioned_subscriber.version = 1
+    payload = await gsp._get_data_from_subscribers()
+    assert payload == gsp._get_unsent_payload(r_node, payload)
+    # the version refreshed before the reply arrives was never sent
+    gsp._set_payload_as_sent(r_node, payload, payload_versions)
+    assert payload == gsp._get_unsent_payload(r_node, payload)
+
+    pull_response = await gsp._handler_pull(r_node, {"versioned": 1})
+    assert {"unversioned": None} == pull_response.payload
+    other_node = get_random_nodes(1, first_port=7773)[0]
+    pull_response = await gsp._handler_pull(other_node, {})
+    assert payload == pull_response.payload
+    pull_response = await gsp._handler_pull(other_node, {})  # unchanged since
+    assert {"unversioned": None} == pull_response.payload
+
+    await gsp.stop()
+
+
+def test_push_view_cache():
+    r_nodes = get_random_nodes(GossipConfig.LOCAL_VIEW_SIZE, first_port=7772)
+    gsp = gossip.Gossip(node, SERVICE_ID, r_nodes)
+
+    push_data = gsp._make_push_data(r_nodes[0], gsp._get_push_view(r_nodes[0]), {})
+    other_push_data = gsp._make_push_data(
+        r_nodes[1], gsp._get_push_view(r_nodes[1]), {}
+    )
+    assert push_data.view is other_push_data.view
+    assert push_data.encoded_view is other_push_data.encoded_view
+    assert push_data == _parse_push_data(decode_data(encode_data(push_data.encode())))
+
+    gsp.local_view = Counter(dict(list(gsp.local_view.items())[1:]))
+    push_data = gsp._make_push_data(r_nodes[0], gsp._get_push_view(r_nodes[0]), {})
+    assert GossipConfig.LOCAL_VIEW_SIZE == len(push_data.view)
+    assert push_data.encoded_view is not other_push_data.encoded_view
+
 
 @pytest.mark.asyncio
-@pytest.mark.parametrize("amount", [1, 5, 100])
-async def test_gossiping(amount):
+async def test_message_budget():
+    class Subscriber(unsserv.common.gossip.gossip.IGossipSubscriber):
+        def __init__(self, key, priority):
+            self.key = key
+            self.priority = priority
+
+        async def receive_payload(self, payload: Payload):
+            pass
+
+        async def get_payload(self) -> Tuple[Any, Any]:
+            return self.key, "x" * 1000
+
+        def get_payload_priority(self) -> float:
+            return self.priority
+
+    r_nodes = get_random_nodes(GossipConfig.LOCAL_VIEW_SIZE, first_port=7772)
+    gsp = gossip.Gossip(node, SERVICE_ID, r_nodes, message_budget=2500)
+    for i in range(4):
+        gsp.subscribe(Subscriber(f"sub-{i}", i))
+    await gsp.start()
+
+    payload = await gsp._get_data_from_subscribers()
+    included_keys = []
+    for _ in range(4):
+        push_data = gsp._fit_in_budget(
+            r_nodes[0], PushData(gsp._get_push_view(r_nodes[0]), dict(payload))
+        )
+        assert gsp._protocol.get_push_data_size(push_data) <= 2500
+        assert 2 == len(push_data.payload)
+        assert GossipConfig.LOCAL_VIEW_SIZE + 1 == len(push_data.view)
+        included_keys.extend(push_data.payload.keys())
+    assert {"sub-3", "sub-2"} == set(included_keys[:2])  # highest priority first
+    assert set(payload.keys()) == set(included_keys)  # all rotate in
+    push_data = gsp._fit_in_budget(
+        r_nodes[1], PushData(gsp._get_push_view(r_nodes[1]), dict(payload))
+    )
+    assert {"sub-3", "sub-2"} == set(push_data.payload)  # staleness is per peer
+
+    gsp._config.MESSAGE_BUDGET = 200  # not even the view fits
+    push_data = gsp._fit_in_budget(
+        r_nodes[0], PushData(gsp._get_push_view(r_nodes[0]), dict(payload))
+    )
+    assert gsp._protocol.get_push_data_size(push_data) <= 200
+    assert node in push_data.view and not push_data.payload
+
+    await gsp.stop()
+
+
+@pytest.mark.asyncio
+async def test_exchange_errors():
+    r_nodes = get_random_nodes(3, first_port=7772)
+    gsp = gossip.Gossip(node, SERVICE_ID, r_nodes, fanout=3, round_timeout=0.1)
+    exchanged_peers, cancelled_peers = [], []
+
+    async def exchange_with_peer(peer: Node, push_data: PushData, *_):
+        if peer == r_nodes[0]:
+            raise ValueError("Unexpected error")
+        elif peer == r_nodes[1]:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled_peers.append(peer)
+                raise
+        exchanged_peers.append(peer)
+
+    gsp._exchange_with_peer = exchange_with_peer  # type: ignore
+    await gsp._exchange_with_peers()  # neither fails nor waits for slow peers
+    assert [r_nodes[2]] == exchanged_peers
+    assert [r_nodes[1]] == cancelled_peers
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "amount,fanout,delta_exchange",
+    [
+        (amount, fanout, delta_exchange)
+        for amount in [1, 5, 100]
+        for fanout in [1, 3]
+        for delta_exchange in [False, True]
+    ],
+)
+async def test_gossiping(amount, fanout, delta_exchange):
     r_nodes = get_random_nodes(amount, first_port=7772)
-    gsp = gossip.Gossip(node, SERVICE_ID)
+    configuration = {"fanout": fanout, "delta_exchange": delta_exchange}
+    gsp = gossip.Gossip(node, SERVICE_ID, **configuration)
     await gsp.start()
 
     r_gsps = []
     for i, r_node in enumerate(r_nodes):
-        r_gsp = gossip.Gossip(r_node, SERVICE_ID, [node] + r_nodes[:i])
+        r_gsp = gossip.Gossip(r_node, SERVICE_ID, [node] + r_nodes[:i], **configuration)
         await r_gsp.start()
         r_gsps.append(r_gsp)
 
@@ -102,6 +341,30 @@ async def test_gossiping(amount):
         await r_gsp.stop()
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("healer,swapper", [(0, 0), (1, 2)])
+async def test_shuffle_gossiping(healer, swapper):
+    r_nodes = get_random_nodes(30, first_port=7772)
+    configuration = {"shuffle_length": 5, "healer": healer, "swapper": swapper}
+    gsp = gossip.Gossip(node, SERVICE_ID, **configuration)
+    await gsp.start()
+
+    r_gsps = []
+    for i, r_node in enumerate(r_nodes):
+        r_gsp = gossip.Gossip(r_node, SERVICE_ID, [node] + r_nodes[:i], **configuration)
+        await r_gsp.start()
+        r_gsps.append(r_gsp)
+
+    await asyncio.sleep(GossipConfig.GOSSIPING_FREQUENCY * 15)
+
+    for r_gsp in r_gsps:
+        assert GossipConfig.LOCAL_VIEW_SIZE == len(r_gsp.local_view)
+
+    await gsp.stop()
+    for r_gsp in r_gsps:
+        await r_gsp.stop()
+
+
 @pytest.mark.asyncio
 async def test_subscriber():
     class Subscriber(unsserv.common.gossip.gossip.IGossipSubscriber):
@@ -139,3 +402,96 @@ async def test_subscriber():
 
     await gsp.stop()
     await r_gsp.stop()
+
+
+@pytest.mark.asyncio
+async def test_subscribers_delivery():
+    class Subscriber(unsserv.common.gossip.gossip.IGossipSubscriber):
+        def __init__(self, delay):
+            self.delay = delay
+            self.received_payloads = 0
+
+        async def receive_payload(self, payload: Payload):
+            await asyncio.sleep(self.delay)
+            self.received_payloads += 1
+
+        async def get_payload(self) -> Tuple[Any, Any]:
+            return "sub", None
+
+    gsp = gossip.Gossip(node, SERVICE_ID, delivery_queue_size=2)
+    slow_subscriber = Subscriber(1)
+    fast_subscriber = Subscriber(0)
+    gsp.subscribe(slow_subscriber)
+    gsp.subscribe(fast_subscriber)
+    await gsp.start()
+
+    for _ in range(5):
+        await gsp._deliver_message_to_subscribers({})  # does not wait
+        await asyncio.sleep(0.01)
+    assert 5 == fast_subscriber.received_payloads
+    assert 0 == slow_subscriber.received_payloads
+
+    stats = gsp.get_delivery_stats()
+    assert 5 == stats[fast_subscriber].delivered
+    assert 0 == stats[fast_subscriber].dropped
+    assert 2 == stats[slow_subscriber].dropped  # 1 being processed, 2 queued
+
+    await gsp.stop()
+
+
+@pytest.mark.asyncio
+async def test_blocking_subscriber():
+    class Subscriber(unsserv.common.gossip.gossip.IGossipSubscriber):
+        def __init__(self):
+            self.received_payloads = 0
+
+        async def receive_payload(self, payload: Payload):
+            await asyncio.sleep(0.05)
+            self.received_payloads += 1
+
+        async def get_payload(self) -> Tuple[Any, Any]:
+            return "sub", None
+
+    gsp = gossip.Gossip(node, SERVICE_ID, delivery_queue_size=1)
+    subscriber = Subscriber()
+    gsp.subscribe(subscriber, OverflowPolicy.BLOCK)
+    await gsp.start()
+
+    for _ in range(5):
+        await gsp._deliver_message_to_subscribers({})  # waits for room
+    await asyncio.sleep(0.2)
+    assert 5 == subscriber.received_payloads
+    assert 0 == gsp.get_delivery_stats()[subscriber].dropped
+
+    subscriber.receive_payload = lambda payload: asyncio.sleep(10)  # stuck
+    for _ in range(2):  # one being received, one queued
+        await gsp._deliver_message_to_subscribers({})
+        await asyncio.sleep(0)
+    loop_start = asyncio.get_event_loop().time()
+    await gsp._deliver_message_to_subscribers({})  # the reply is not held long
+    block_time = asyncio.get_event_loop().time() - loop_start
+    assert block_time < GossipConfig.RPC_TIMEOUT / 2
+    assert 1 == gsp.get_delivery_stats()[subscriber].dropped
+
+    await gsp.unsubscribe(subscriber)
+    assert not gsp.get_delivery_stats()
+    await gsp.stop()
+
+
+@pytest.mark.asyncio
+async def test_adaptive_frequency():
+    r_node = get_random_nodes(1, first_port=7772)[0]
+    gsp = gossip.Gossip(node, SERVICE_ID, adaptive_frequency=True)
+    r_gsp = gossip.Gossip(r_node, SERVICE_ID, [node], adaptive_frequency=True)
+    await gsp.start()
+    await r_gsp.start()
+
+    await asyncio.sleep(GossipConfig.GOSSIPING_FREQUENCY * 15)
+    assert GossipConfig.GOSSIPING_FREQUENCY < r_gsp._gossiping_frequency
+    assert r_gsp._gossiping_frequency <= GossipConfig.MAX_GOSSIPING_FREQUENCY
+
+    r_gsp._adapt_gossiping_frequency(set())  # simulate churn
+    assert GossipConfig.MIN_GOSSIPING_FREQUENCY == r_gsp._gossiping_frequency
+
+    await gsp.stop()
+    await r_gsp.stop()
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from unsserv.common.scheduler.config import SchedulerConfig
+from unsserv.common.scheduler.scheduler import Scheduler, SchedulerRegister
+from unsserv.common.structs import Node
+
+node = Node(("127.0.0.1", 7771))
+PERIOD = SchedulerConfig.TICK * 2
+
+
+def test_register():
+    assert SchedulerRegister.get_scheduler(node) is SchedulerRegister.get_scheduler(
+        node
+    )
+
+
+@pytest.mark.asyncio
+async def test_periodic_job():
+    scheduler = Scheduler(node)
+    runs = 0
+
+    async def job():
+        nonlocal runs
+        runs += 1
+
+    await scheduler.add_job("job", job, PERIOD)
+    assert scheduler.running
+    with pytest.raises(ValueError):
+        await scheduler.add_job("job", job, PERIOD)
+
+    await asyncio.sleep(PERIOD * 10)
+    assert 5 <= runs
+    stats = scheduler.get_stats()["job"]
+    assert stats.runs == runs
+    assert stats.errors == 0
+
+    await scheduler.remove_job("job")
+    assert not scheduler.running
+    runs_after_removal = runs
+    await asyncio.sleep(PERIOD * 3)
+    assert runs == runs_after_removal
+
+
+@pytest.mark.asyncio
+async def test_slow_job_is_coalesced():
+    scheduler = Scheduler(node)
+    running_jobs = 0
+    max_running_jobs = 0
+
+    async def slow_job():
+        nonlocal running_jobs, max_running_jobs
+        running_jobs += 1
+        max_running_jobs = max(max_running_jobs, running_jobs)
+        await asyncio.sleep(PERIOD * 3)
+        running_jobs -= 1
+
+    await scheduler.add_job("slow_job", slow_job, PERIOD, first_delay=0)
+    await asyncio.sleep(PERIOD * 10)
+
+    assert max_running_jobs == 1
+    assert 0 < scheduler.get_stats()["slow_job"].coalesced
+    await scheduler.remove_job("slow_job")
+
+
+@pytest.mark.asyncio
+async def test_job_budget_and_errors():
+    scheduler = Scheduler(node)
+    scheduler._config.MAX_JOBS_PER_TICK = 1
+
+    async def failing_job():
+        raise ValueError()
+
+    for i in range(3):
+        await scheduler.add_job(f"job-{i}", failing_job, PERIOD, first_delay=0)
+    await asyncio.sleep(PERIOD * 5)
+
+    stats = scheduler.get_stats()
+    assert sum(job_stats.deferred for job_stats in stats.values()) > 0
+    for job_stats in stats.values():
+        assert 0 < job_stats.errors == job_stats.runs
+    for i in range(3):
+        await scheduler.remove_job(f"job-{i}")
@@ -0,0 +1,202 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from unsserv.common.structs import HandlerExecutor, OverflowPolicy
+from unsserv.common.utils import (
+    BroadcastBuffer,
+    ExecutorHandler,
+    HandlersManager,
+    Subscription,
+    unpack_broadcast_data,
+)
+
+
+@pytest.mark.asyncio
+async def test_handlers_manager_batched(caplog):
+    handlers_manager = HandlersManager(batched=True, queue_size=5, batch_size=2)
+    sync_events, async_events = [], []
+
+    async def async_handler(event):
+        async_events.append(event)
+
+    def failing_handler(event):
+        raise ValueError()
+
+    handlers_manager.add_handler(sync_events.append)
+    handlers_manager.add_handler(async_handler)
+    handlers_manager.add_handler(failing_handler)
+    for event in range(8):
+        handlers_manager.call_handlers(event)
+    assert handlers_manager.queue_depth == 5
+    assert handlers_manager.dropped == 3
+
+    await asyncio.sleep(0.1)
+    assert handlers_manager.queue_depth == 0
+    assert sync_events == async_events == list(range(3, 8))
+    assert handlers_manager.errors == 5
+    assert "Handler" in caplog.text and "failing_handler" in caplog.text
+    handlers_manager.remove_all_handlers()
+
+
+@pytest.mark.asyncio
+async def test_handlers_manager_coalesce():
+    handlers_manager = HandlersManager(coalesce=True)
+    events = []
+    handlers_manager.add_handler(events.append)
+    for event in range(5):
+        handlers_manager.call_handlers(event)
+    assert handlers_manager.queue_depth == 1
+
+    await asyncio.sleep(0.1)
+    assert events == [4]
+    assert handlers_manager.dropped == 4
+    handlers_manager.remove_all_handlers()
+
+
+@pytest.mark.asyncio
+async def test_handlers_manager_set_batched():
+    handlers_manager = HandlersManager()
+    events = []
+    handlers_manager.add_handler(events.append)
+    handlers_manager.call_handlers(0)
+    assert handlers_manager.queue_depth == 0  # a task per handler by default
+
+    handlers_manager.set_batched(True)
+    handlers_manager.call_handlers(1)
+    assert handlers_manager.queue_depth == 1
+
+    await asyncio.sleep(0.1)
+    assert sorted(events) == [0, 1]
+    handlers_manager.remove_all_handlers()
+
+
+@pytest.mark.asyncio
+async def test_handlers_manager_thread_pool():
+    handlers_manager = HandlersManager()
+    events, threads = [], set()
+
+    def slow_handler(event):
+        time.sleep(0.01)
+        events.append(event)
+        threads.add(threading.get_ident())
+
+    async def async_handler(event):
+        pass
+
+    with pytest.raises(ValueError):
+        handlers_manager.add_handler(async_handler, HandlerExecutor.THREAD_POOL)
+    handlers_manager.add_handler(slow_handler, HandlerExecutor.THREAD_POOL)
+    with pytest.raises(ValueError):
+        handlers_manager.add_handler(slow_handler)  # already in the thread pool
+    loop_start = time.monotonic()
+    for event in range(10):
+        handlers_manager.call_handlers(event)
+    await asyncio.sleep(0)
+    assert time.monotonic() - loop_start < 0.05  # the loop is not blocked
+
+    await asyncio.sleep(0.5)
+    assert events == list(range(10))  # ordered with max_concurrency 1
+    assert threading.get_ident() not in threads
+    handlers_manager.remove_all_handlers()
+
+
+@pytest.mark.asyncio
+async def test_executor_handler_max_pending(caplog):
+    events = []
+    executor_handler = ExecutorHandler(
+        events.append, HandlerExecutor.THREAD_POOL, 1, max_pending=3
+    )
+    for event in range(5):
+        executor_handler.submit(event)
+    assert executor_handler.dropped == 2
+
+    await asyncio.sleep(0.1)
+    assert events == [2, 3, 4]
+    executor_handler.stop()
+
+    def failing_handler(event):
+        raise ValueError()
+
+    executor_handler = ExecutorHandler(failing_handler, HandlerExecutor.THREAD_POOL, 1)
+    executor_handler.submit(0)
+    await asyncio.sleep(0.1)
+    assert executor_handler.errors == 1
+    assert "failing_handler" in caplog.text and "ValueError" in caplog.text
+    executor_handler.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy,expected_data",
+    [
+        (OverflowPolicy.DROP_OLDEST, [2, 3, 4]),
+        (OverflowPolicy.DROP_NEWEST, [0, 1, 2]),
+        (OverflowPolicy.BLOCK, [0, 1, 2, 3, 4]),
+    ],
+)
+async def test_subscription(policy, expected_data):
+    closed_subscriptions = []
+    subscription = Subscription(3, policy, closed_subscriptions.append)
+    put_tasks = [asyncio.create_task(subscription.put(data)) for data in range(5)]
+    await asyncio.sleep(0.01)
+    assert subscription.queue_depth == 3
+
+    received_data = []
+    async with subscription:
+        async for data in subscription:
+            received_data.append(data)
+            if len(received_data) == len(expected_data):
+                break
+    await asyncio.gather(*put_tasks)
+    assert received_data == expected_data
+    assert subscription.dropped == 5 - len(expected_data)
+    assert closed_subscriptions == [subscription]
+    assert [data async for data in subscription] == []
+
+
+@pytest.mark.asyncio
+async def test_subscription_block_timeout():
+    subscription = Subscription(1, OverflowPolicy.BLOCK, lambda s: None, 0.05)
+    await subscription.put(0)
+    await subscription.put(1)  # nobody makes room
+    assert subscription.dropped == 1
+    subscription.close()
+    assert [data async for data in subscription] == [0]
+
+
+@pytest.mark.asyncio
+async def test_broadcast_buffer(caplog):
+    units = []
+
+    async def broadcast_many(data):
+        units.append(data)
+
+    broadcast_buffer = BroadcastBuffer(broadcast_many, max_size=6, max_delay=0.05)
+    for data in [b"ab", b"cd", b"ef", b"gh"]:
+        await broadcast_buffer.add(data)
+    assert units == [[b"ab", b"cd", b"ef"]]  # packed once the size is reached
+
+    await asyncio.sleep(0.1)
+    assert units == [[b"ab", b"cd", b"ef"], [b"gh"]]  # packed after the delay
+
+    await broadcast_buffer.add(b"ij")
+    await broadcast_buffer.add(b"klmno")  # would overflow the unit
+    assert units[-1] == [b"ij"]
+    await broadcast_buffer.add(b"pqrstu")  # as big as a whole unit
+    assert units[-2:] == [[b"klmno"], [b"pqrstu"]]
+    await broadcast_buffer.add(b"vw")
+    await broadcast_buffer.stop()
+    assert units[-1] == [b"vw"]
+    assert unpack_broadcast_data(b"ij") == [b"ij"]
+    assert unpack_broadcast_data([b"ab", b"cd"]) == [b"ab", b"cd"]
+
+    async def failing_broadcast_many(data):
+        raise RuntimeError()
+
+    broadcast_buffer = BroadcastBuffer(failing_broadcast_many, 6, max_delay=0.05)
+    await broadcast_buffer.add(b"ab")
+    await broadcast_buffer.stop()
+    assert "Buffered broadcast data lost on stop" in caplog.text
@@ -73,3 +73,38 @@ async def test_broadcast(init_extreme_membership, init_lpbcast, amount):
         lpbcast_events[r_lpbcast.my_node].is_set() for r_lpbcast in r_lpbcasts
     ]
     assert int(amount * 0.75) <= sum(lpbcast_events_received)
+
+
+@pytest.mark.asyncio
+async def test_subscribe(init_extreme_membership, init_lpbcast):
+    newc, r_newcs = await init_extreme_membership(5)
+    lpbcast, r_lpbcasts = await init_lpbcast(newc, r_newcs)
+    subscription = r_lpbcasts[0].subscribe(maxsize=10)
+
+    data = b"data"
+    await lpbcast.broadcast(data)
+    async with subscription:
+        received_data = await asyncio.wait_for(
+            subscription.__anext__(), GossipConfig.GOSSIPING_FREQUENCY * 15
+        )
+    assert received_data == data
+    assert subscription.closed
+
+
+@pytest.mark.asyncio
+async def test_broadcast_many(init_extreme_membership, init_lpbcast):
+    newc, r_newcs = await init_extreme_membership(5)
+    lpbcast, r_lpbcasts = await init_lpbcast(newc, r_newcs)
+    subscription = r_lpbcasts[0].subscribe(maxsize=10)
+
+    data = [b"data-1", b"data-2", b"data-3"]
+    await lpbcast.broadcast_many(data)
+    received_data = []
+    async with subscription:
+        while len(received_data) < len(data):
+            received_data.append(
+                await asyncio.wait_for(
+                    subscription.__anext__(), GossipConfig.GOSSIPING_FREQUENCY * 15
+                )
+            )
+    assert received_data == data
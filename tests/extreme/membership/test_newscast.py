@@ -118,3 +118,59 @@ async def test_newscast_handler(init_newscast, amount):
 
     await asyncio.sleep(GossipConfig.GOSSIPING_FREQUENCY * 7)
     assert handler_event.is_set()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "amount",
+    [(GossipConfig.LOCAL_VIEW_SIZE * 2) + 1, (GossipConfig.LOCAL_VIEW_SIZE * 2) + 5],
+)
+async def test_newscast_delta_handler(init_newscast, amount):
+    newc, r_newcs, r_nodes = await init_newscast(amount)
+
+    neighbours = set()
+    versions = []
+
+    def delta_handler(added, removed, version):
+        nonlocal neighbours
+        assert not added & removed
+        neighbours = (neighbours - removed) | added
+        versions.append(version)
+
+    newc.add_neighbours_delta_handler(delta_handler)
+    await asyncio.sleep(GossipConfig.GOSSIPING_FREQUENCY * 7)
+    await newc.gossip.stop()  # freeze the view
+    await asyncio.sleep(GossipConfig.GOSSIPING_FREQUENCY)  # let pending handlers run
+
+    assert versions
+    assert list(range(versions[0], versions[0] + len(versions))) == versions
+    assert newc._delta_handlers_manager.version == versions[-1]
+    assert newc._delta_handlers_manager._neighbours == neighbours
+
+
+@pytest.mark.asyncio
+async def test_newscast_delta_handler_bootstrap():
+    bootstrap_nodes = get_random_nodes(3)
+    newc = newscast.Newscast(node)
+    # not gossiping, for the view to change only as below
+    await newc.join(
+        MEMBERSHIP_SERVICE_ID, bootstrap_nodes=bootstrap_nodes, gossiping_frequency=60
+    )
+    deltas = []
+
+    def delta_handler(added, removed, version):
+        deltas.append((added, removed))
+
+    newc.add_neighbours_delta_handler(delta_handler)
+    new_node = get_random_nodes(1, first_port=7775)[0]
+    view = Counter({bootstrap_nodes[0]: 1, bootstrap_nodes[1]: 1, new_node: 1})
+    await asyncio.sleep(0)  # the bootstrap view is notified first
+    await newc._gossip_local_view_handler(view)
+    await asyncio.sleep(0)
+
+    try:
+        assert (set(bootstrap_nodes), set()) == deltas[0]
+        assert ({new_node}, {bootstrap_nodes[2]}) == deltas[1]
+        assert 2 == len(deltas)
+    finally:
+        await newc.leave()
@@ -1,19 +1,32 @@
+import asyncio
+import math
+import random
+from collections import OrderedDict, deque
 from statistics import mean
-from typing import Any, Callable, Dict, Tuple, Union
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
 
 from unsserv.common.aggregation.config import AggregateType, AntiConfig
+from unsserv.common.aggregation.protocol import AntiProtocol
+from unsserv.common.aggregation.structs import PushSum
 from unsserv.common.gossip.gossip import Gossip, IGossipSubscriber
 from unsserv.common.gossip.typing import Payload
+from unsserv.common.scheduler.scheduler import Scheduler, SchedulerRegister
 from unsserv.common.services_abc import IAggregationService, IMembershipService
-from unsserv.common.structs import Property
+from unsserv.common.structs import HandlerExecutor, Node, OverflowPolicy, Property
 from unsserv.common.typing import Handler
-from unsserv.common.utils import HandlersManager
+from unsserv.common.utils import HandlersManager, get_random_id
 
 
 aggregate_names: Dict[str, AggregateType] = {
     "mean": AggregateType.MEAN,
     "max": AggregateType.MAX,
-    "min": AggregateType.MEAN,
+    "min": AggregateType.MIN,
+    "push_sum": AggregateType.PUSH_SUM,
+    "count": AggregateType.COUNT,
+    "sum": AggregateType.SUM,
+    "distinct_count": AggregateType.DISTINCT_COUNT,
+    "quantile": AggregateType.QUANTILE,
+    "top_k": AggregateType.TOP_K,
 }
 
 
@@ -21,17 +34,66 @@ aggregate_functions: Dict[AggregateType, Callable] = {
     AggregateType.MEAN: mean,
     AggregateType.MAX: max,
     AggregateType.MIN: min,
+    AggregateType.PUSH_SUM: mean,
+    AggregateType.COUNT: len,
+    AggregateType.SUM: sum,
+}
+
+push_sum_aggregates = {
+    AggregateType.PUSH_SUM,
+    AggregateType.COUNT,
+    AggregateType.SUM,
+    AggregateType.QUANTILE,
+    AggregateType.TOP_K,
+}
+initiator_aggregates = {AggregateType.COUNT, AggregateType.SUM}
+sketch_aggregates = {
+    AggregateType.DISTINCT_COUNT,
+    AggregateType.QUANTILE,
+    AggregateType.TOP_K,
 }
 
 
 class AntiEntropy(IAggregationService, IGossipSubscriber):
-    """Aggregation Anti-Entropy service."""
+    """
+    Aggregation Anti-Entropy service.
+
+    Aggregates are exchanged as gossip payloads, except for PUSH_SUM,
+    COUNT and SUM. With push-sum every node keeps a (sum, weight) pair
+    and, every round, keeps half of it and sends the other half to a
+    random neighbour, so the total mass is conserved and the estimates
+    of the mean (sum divided by weight) converge to it exponentially
+    fast. For SUM only a single initiator node starts with weight 1 (the
+    rest with 0), so the estimates converge to the sum instead, and
+    COUNT is the SUM of a 1 per node. If a 'weight' is configured (e.g.
+    the capacity of the node), every node starts with its value times
+    its weight as sum and its weight as weight, so MEAN and PUSH_SUM
+    converge to the weighted mean. Weighted MEAN uses push-sum too.
+    """
 
     properties = {Property.EXTREME, Property.STABLE, Property.HAS_GOSSIP}
     gossip: Gossip
     _config: AntiConfig
     _handlers_manager: HandlersManager
     _aggregate_value: Any
+    _aggregate_version: int
+    _protocol: AntiProtocol
+    _scheduler: Scheduler
+    _sum: float
+    _weight: float
+    _estimate_error: float
+    _round_errors: List[float]
+    _pending_push: Optional[Tuple[Node, PushSum]]
+    _applied_pushes: "OrderedDict[str, None]"
+    epoch: int
+    _epoch_start: float
+    _local_value: Any
+    _epoch_aggregate_value: Any
+    _estimates: Deque[Any]
+    _disagreements: Deque[float]
+    _converged: bool
+    _notified_value: Any
+    _convergence_waiters: List[Tuple[float, asyncio.Future]]
 
     def __init__(self, membership: IMembershipService):
         self.my_node = membership.my_node
@@ -43,8 +105,26 @@ class AntiEntropy(IAggregationService, IGossipSubscriber):
         self.membership = membership
         self.gossip = getattr(membership, "gossip")
         self._aggregate_value = None
-        self._handlers_manager = HandlersManager()
+        self._aggregate_version = 0
+        self._handlers_manager = HandlersManager(coalesce=True)
         self._config = AntiConfig()
+        self._protocol = AntiProtocol(self.my_node)
+        self._scheduler = SchedulerRegister.get_scheduler(self.my_node)
+        self._sum = 0
+        self._weight = 0
+        self._estimate_error = 0
+        self._round_errors = []
+        self._pending_push = None
+        self._applied_pushes = OrderedDict()
+        self.epoch = 0
+        self._epoch_start = 0
+        self._local_value = None
+        self._epoch_aggregate_value = None
+        self._estimates = deque()
+        self._disagreements = deque()
+        self._converged = False
+        self._notified_value = None
+        self._convergence_waiters = []
 
     async def join(self, service_id: str, **configuration: Any):
         if self.running:
@@ -52,46 +132,396 @@ class AntiEntropy(IAggregationService, IGossipSubscriber):
         configuration["aggregate_type"] = self._parse_aggregate(
             configuration["aggregate_type"]
         )
+        self._validate_aggregate(configuration["aggregate_type"])
         self._config.load_from_dict(configuration)
-        self._aggregate_value = configuration["aggregate_value"]
+        if (
+            self._config.WEIGHT is not None
+            and self._config.AGGREGATE_TYPE in initiator_aggregates
+        ):
+            raise ValueError("COUNT and SUM can not be weighted")
+        self._local_value = self._parse_value(configuration.get("aggregate_value"))
         self.service_id = service_id
-        self.gossip.subscribe(self)
+        self._estimates = deque(maxlen=self._config.CONVERGENCE_WINDOW)
+        self._disagreements = deque(maxlen=self._config.CONVERGENCE_WINDOW)
+        self._restart_aggregation(epoch=0)
+        if self._uses_push_sum():
+            await self._start_push_sum()
+        else:  # every payload counts, so it is not dropped when busy
+            self.gossip.subscribe(self, OverflowPolicy.BLOCK)
+        if self._config.EPOCH_LENGTH:
+            await self._scheduler.add_job(
+                f"anti-entropy-epoch-{self.service_id}",
+                self._maintain_epoch,
+                self._config.EPOCH_LENGTH / 4,
+            )
         self.running = True
 
     async def leave(self):
         if not self.running:
             return
-        self.gossip.unsubscribe(self)
+        if self._config.EPOCH_LENGTH:
+            await self._scheduler.remove_job(f"anti-entropy-epoch-{self.service_id}")
+        if self._uses_push_sum():
+            await self._scheduler.remove_job(f"anti-entropy-{self.service_id}")
+            await self._protocol.stop()
+        else:
+            await self.gossip.unsubscribe(self)
         self._handlers_manager.remove_all_handlers()
+        for _, waiter in self._convergence_waiters:
+            waiter.cancel()
+        self._convergence_waiters = []
+        self._notified_value = None
         self._aggregate_value = None
+        self._epoch_aggregate_value = None
         self.running = False
 
     async def get_aggregate(self) -> Any:
+        """
+        Get the current aggregate value.
+
+        In epoch mode it is the result of the last completed epoch (the
+        value of the current one until the first epoch is completed).
+        """
+        if not self.running:
+            raise RuntimeError("Aggregation service not running")
+        if self._epoch_aggregate_value is not None:
+            return self._get_output_value(self._epoch_aggregate_value)
+        return self._get_output_value(self._aggregate_value)
+
+    def set_local_value(self, value: Any):
+        """
+        Set the local value that is aggregated from the next epoch on.
+
+        :param value: new local value.
+        :return:
+        """
+        if not self._config.EPOCH_LENGTH:
+            raise RuntimeError("Local value can only change in epoch mode")
+        self._local_value = self._parse_value(value)
+
+    async def wait_converged(self, tolerance: Optional[float] = None) -> Any:
+        """
+        Wait until the aggregate converges.
+
+        The aggregate is converged when neither the last estimates nor
+        the ones of the neighbours differ from the current one more than
+        the tolerance, relative to its magnitude.
+
+        :param tolerance: relative tolerance, 'convergence_tolerance' if
+            None.
+        :return: the converged aggregate.
+        """
         if not self.running:
             raise RuntimeError("Aggregation service not running")
-        return self._aggregate_value
+        if tolerance is None:
+            tolerance = self._config.CONVERGENCE_TOLERANCE
+        if not self._is_converged(tolerance):
+            waiter = asyncio.get_event_loop().create_future()
+            self._convergence_waiters.append((tolerance, waiter))
+            await waiter
+        return self._get_output_value(self._aggregate_value)
 
-    def add_aggregate_handler(self, handler: Handler):
-        self._handlers_manager.add_handler(handler)
+    def add_aggregate_handler(
+        self,
+        handler: Handler,
+        executor: HandlerExecutor = HandlerExecutor.EVENT_LOOP,
+        max_concurrency: int = 1,
+    ):
+        self._handlers_manager.add_handler(handler, executor, max_concurrency)
 
     def remove_aggregate_handler(self, handler: Handler):
         self._handlers_manager.remove_handler(handler)
 
+    def get_estimate_error(self) -> float:
+        """
+        Get the error of the push-sum estimate in the last round.
+
+        It is the largest difference between the local estimate and the
+        estimates of the neighbours exchanged with during the round,
+        which bounds how far the estimate is from converging.
+        """
+        return self._estimate_error
+
+    def get_confidence_interval(self) -> Optional[Tuple[float, float]]:
+        """
+        Get the interval where the push-sum aggregate is expected to be.
+
+        :return: lower and upper bounds of the interval, or None if the
+            node has no estimate yet (for COUNT and SUM, until it gets
+            part of the initiator's weight).
+        """
+        if self._aggregate_value is None:
+            return None
+        return (
+            self._get_output_value(
+                self._add_values(self._aggregate_value, -self._estimate_error)
+            ),
+            self._get_output_value(
+                self._add_values(self._aggregate_value, self._estimate_error)
+            ),
+        )
+
     async def receive_payload(self, payload: Payload):
         """IGossipSubscriber implementation."""
-        aggregate_function = aggregate_functions[self._config.AGGREGATE_TYPE]
-        assert callable(aggregate_function)
         neighbor_aggregate = payload.get(self.service_id, None)
         if not neighbor_aggregate:
             return
-        self._aggregate_value = aggregate_function(
-            [self._aggregate_value, neighbor_aggregate]
+        neighbour_epoch, raw_neighbour_value = neighbor_aggregate
+        if not self._join_epoch(neighbour_epoch):
+            return  # the neighbour is still aggregating an older epoch
+        neighbour_value = self._decode_value(raw_neighbour_value)
+        self._disagreements.append(
+            self._get_relative_distance(self._aggregate_value, neighbour_value)
         )
-        self._handlers_manager.call_handlers(self._aggregate_value)
+        aggregate_value = self._aggregate_values(
+            [self._aggregate_value, neighbour_value]
+        )
+        if not self._are_same_values(aggregate_value, self._aggregate_value):
+            self._aggregate_version += 1
+        self._aggregate_value = aggregate_value
+        self._update_convergence()
 
     async def get_payload(self) -> Tuple[Any, Any]:
         """IGossipSubscriber implementation."""
-        return self.service_id, self._aggregate_value
+        return self.service_id, [self.epoch, self._encode_value(self._aggregate_value)]
+
+    def get_payload_version(self) -> Any:
+        """IGossipSubscriber implementation."""
+        return self._aggregate_version
+
+    def _restart_aggregation(self, epoch: int):
+        self.epoch = epoch
+        self._epoch_start = asyncio.get_event_loop().time()
+        self._aggregate_version += 1
+        self._aggregate_value = self._local_value
+        self._estimates.clear()
+        self._disagreements.clear()
+        self._converged = False
+        if not self._uses_push_sum():
+            return
+        self._round_errors = []
+        self._pending_push = None  # the mass of older epochs is dropped
+        if self._config.AGGREGATE_TYPE not in initiator_aggregates:
+            self._weight = self._get_node_weight()
+            self._sum = self._scale_value(self._local_value, self._weight)
+        else:
+            if self._config.AGGREGATE_TYPE == AggregateType.COUNT:
+                self._sum = 1
+            else:
+                self._sum = self._local_value
+            self._weight = 1 if self._config.INITIATOR else 0
+            self._aggregate_value = self._sum if self._config.INITIATOR else None
+
+    def _uses_push_sum(self) -> bool:
+        if self._config.AGGREGATE_TYPE == AggregateType.MEAN:
+            return self._config.WEIGHT is not None
+        return self._config.AGGREGATE_TYPE in push_sum_aggregates
+
+    def _get_node_weight(self) -> float:
+        if self._config.WEIGHT is None:
+            return 1
+        weight = self._config.WEIGHT
+        if callable(weight):
+            weight = weight(self.my_node)
+        if weight <= 0:
+            raise ValueError("Node weight must be positive")
+        return weight
+
+    def _complete_epoch(self, next_epoch: int):
+        self._epoch_aggregate_value = self._aggregate_value
+        self._restart_aggregation(next_epoch)
+        self._handlers_manager.call_handlers(
+            self._get_output_value(self._epoch_aggregate_value)
+        )
+
+    def _join_epoch(self, epoch: int) -> bool:
+        """
+        Move to the epoch of a neighbour if it is newer.
+
+        :return: False if the epoch is older than the local one.
+        """
+        if epoch < self.epoch:
+            return False
+        if self.epoch < epoch:
+            self._complete_epoch(epoch)
+        return True
+
+    async def _maintain_epoch(self):
+        elapsed_time = asyncio.get_event_loop().time() - self._epoch_start
+        if self._config.EPOCH_LENGTH <= elapsed_time:
+            self._complete_epoch(self.epoch + 1)
+
+    def _update_convergence(self):
+        self._estimates.append(self._aggregate_value)
+        for tolerance, waiter in list(self._convergence_waiters):
+            if waiter.done() or self._is_converged(tolerance):
+                self._convergence_waiters.remove((tolerance, waiter))
+                if not waiter.done():
+                    waiter.set_result(None)
+        self._call_handlers()
+
+    def _is_converged(self, tolerance: float) -> bool:
+        if len(self._estimates) < self._config.CONVERGENCE_WINDOW:
+            return False
+        estimates_spread = max(
+            self._get_relative_distance(self._aggregate_value, estimate)
+            for estimate in self._estimates
+        )
+        return max([estimates_spread, *self._disagreements]) <= tolerance
+
+    def _call_handlers(self):
+        """Call the handlers on a relevant change, or when converged."""
+        if self._config.EPOCH_LENGTH:  # otherwise, called on every epoch
+            return
+        was_converged = self._converged
+        self._converged = self._is_converged(self._config.CONVERGENCE_TOLERANCE)
+        changed = (
+            self._get_relative_distance(self._aggregate_value, self._notified_value)
+            > self._config.NOTIFY_EPSILON
+        )
+        if changed or (self._converged and not was_converged):
+            self._notified_value = self._aggregate_value
+            self._handlers_manager.call_handlers(
+                self._get_output_value(self._aggregate_value)
+            )
+
+    async def _start_push_sum(self):
+        self._protocol.set_handler_push_sum(self._handler_push_sum)
+        await self._protocol.start(self.service_id)
+        await self._scheduler.add_job(
+            f"anti-entropy-{self.service_id}",
+            self._push_sum_round,
+            self._config.PUSH_SUM_FREQUENCY,
+        )
+
+    async def _push_sum_round(self):
+        """
+        Send half of the mass to a random neighbour.
+
+        A push that is not acknowledged may have been delivered anyway
+        (only its reply was lost), so instead of taking the mass back it
+        is retransmitted every round until it is acknowledged, and the
+        receiver ignores the pushes it already applied. The mass is only
+        taken back if the neighbour leaves the membership view, which
+        duplicates it if it had been delivered after all.
+        """
+        self._estimate_error = max(self._round_errors, default=0)
+        self._round_errors = []
+        neighbours = list(self.membership.get_neighbours())
+        if self._pending_push and self._pending_push[0] not in neighbours:
+            self._take_back_pending_push()  # assuming it was not delivered
+        if not self._pending_push:
+            if not neighbours:
+                return
+            self._pending_push = (random.choice(neighbours), self._make_push_sum())
+        neighbour, push_sum = self._pending_push
+        try:
+            neighbour_epoch, neighbour_estimate = await self._protocol.push_sum(
+                neighbour, push_sum
+            )
+        except ConnectionError:
+            return  # retransmitted on the next round
+        except Exception:  # not sent at all (e.g. refused by rpcudp as too big)
+            if self._pending_push and self._pending_push[1] is push_sum:
+                self._take_back_pending_push()
+            raise  # logged by the scheduler
+        if self._pending_push and self._pending_push[1] is push_sum:
+            self._pending_push = None  # acknowledged
+        if self._join_epoch(neighbour_epoch) and push_sum.epoch == self.epoch:
+            self._add_round_error(self._decode_value(neighbour_estimate))
+
+    def _take_back_pending_push(self):
+        _, push_sum = self._pending_push
+        self._pending_push = None
+        self._update_push_sum(self._decode_value(push_sum.sum), push_sum.weight)
+
+    def _make_push_sum(self) -> PushSum:
+        half_sum, half_weight = self._scale_value(self._sum, 0.5), self._weight / 2
+        self._update_push_sum(self._scale_value(half_sum, -1), -half_weight)
+        return PushSum(
+            id=get_random_id(),
+            sum=self._encode_value(half_sum),
+            weight=half_weight,
+            estimate=self._encode_value(self._aggregate_value),
+            epoch=self.epoch,
+        )
+
+    def _update_push_sum(self, sum_delta: Any, weight_delta: float):
+        self._sum = self._add_values(self._sum, sum_delta)
+        self._weight += weight_delta
+        if self._weight <= 0:  # nothing to estimate (all the mass was sent)
+            return
+        aggregate_value = self._scale_value(self._sum, 1 / self._weight)
+        if not self._are_same_values(aggregate_value, self._aggregate_value):
+            self._aggregate_version += 1
+            self._aggregate_value = aggregate_value
+        self._update_convergence()
+
+    async def _handler_push_sum(
+        self, sender: Node, push_sum: PushSum
+    ) -> Tuple[int, Any]:
+        if push_sum.id in self._applied_pushes:
+            pass  # a retransmission, whose reply was lost
+        elif self._join_epoch(push_sum.epoch):  # the mass of older epochs is dropped
+            self._applied_pushes[push_sum.id] = None
+            if self._config.APPLIED_PUSHES_LIMIT < len(self._applied_pushes):
+                self._applied_pushes.popitem(last=False)
+            self._update_push_sum(self._decode_value(push_sum.sum), push_sum.weight)
+            self._add_round_error(self._decode_value(push_sum.estimate))
+        return self.epoch, self._encode_value(self._aggregate_value)
+
+    def _add_round_error(self, neighbour_estimate: Any):
+        if self._aggregate_value is None or neighbour_estimate is None:
+            return
+        self._round_errors.append(
+            self._get_values_distance(self._aggregate_value, neighbour_estimate)
+        )
+        self._disagreements.append(
+            self._get_relative_distance(self._aggregate_value, neighbour_estimate)
+        )
+
+    def _aggregate_values(self, values: List[Any]) -> Any:
+        return aggregate_functions[self._config.AGGREGATE_TYPE](values)
+
+    def _add_values(self, value: Any, other_value: Any) -> Any:
+        return value + other_value
+
+    def _scale_value(self, value: Any, factor: float) -> Any:
+        return value * factor
+
+    def _get_values_distance(self, value: Any, other_value: Any) -> float:
+        return abs(value - other_value)
+
+    def _are_same_values(self, value: Any, other_value: Any) -> bool:
+        return value == other_value
+
+    def _get_relative_distance(self, value: Any, other_value: Any) -> float:
+        """Get the distance between values, relative to their magnitude."""
+        if value is None or other_value is None:
+            return 0 if value is other_value else math.inf
+        magnitude = max(
+            self._get_values_distance(value, self._scale_value(value, 0)),
+            self._get_values_distance(other_value, self._scale_value(other_value, 0)),
+        )
+        if not magnitude:
+            return 0
+        return self._get_values_distance(value, other_value) / magnitude
+
+    def _validate_aggregate(self, aggregate_type: AggregateType):
+        if aggregate_type in sketch_aggregates:
+            raise ValueError("Sketch aggregates need SketchAntiEntropy")
+
+    def _parse_value(self, value: Any) -> Any:
+        return value
+
+    def _encode_value(self, value: Any) -> Any:
+        return value
+
+    def _decode_value(self, raw_value: Any) -> Any:
+        return raw_value
+
+    def _get_output_value(self, value: Any) -> Any:
+        return value
 
     def _parse_aggregate(
         self, aggregate_type: Union[str, AggregateType]
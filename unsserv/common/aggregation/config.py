@@ -8,10 +8,93 @@ class AggregateType(Enum):
     MEAN = auto()
     MAX = auto()
     MIN = auto()
+    PUSH_SUM = auto()  # mean, computed with the mass-conserving push-sum
+    COUNT = auto()  # amount of nodes, computed with push-sum
+    SUM = auto()  # computed with push-sum
+    DISTINCT_COUNT = auto()  # HyperLogLog sketch, merged as gossip payloads
+    QUANTILE = auto()  # quantile sketch, computed with push-sum
+    TOP_K = auto()  # Space-Saving heavy hitters, computed with push-sum
 
 
 class AntiConfig(IConfig):
     AGGREGATE_TYPE = None
+    PUSH_SUM_FREQUENCY = 0.2  # seconds between push-sum rounds
+    INITIATOR = False  # COUNT and SUM need a single initiator node
+    EPOCH_LENGTH = None  # seconds between aggregation restarts, None for never
+    NOTIFY_EPSILON = 0  # relative change of the aggregate for calling handlers
+    CONVERGENCE_TOLERANCE = 0.01  # relative disagreement for being converged
+    CONVERGENCE_WINDOW = 5  # amount of recent estimates that must agree
+    WEIGHT = None  # a number, or a function of the node (e.g. of Node.extra)
+    APPLIED_PUSHES_LIMIT = 1000  # push-sum ids remembered to ignore retransmissions
 
     def load_from_dict(self, config_dict: Dict[str, Any]):
         self.AGGREGATE_TYPE = config_dict["aggregate_type"]
+        self.PUSH_SUM_FREQUENCY = config_dict.get(
+            "push_sum_frequency", AntiConfig.PUSH_SUM_FREQUENCY
+        )
+        self.INITIATOR = config_dict.get("initiator", AntiConfig.INITIATOR)
+        self.EPOCH_LENGTH = config_dict.get("epoch_length", AntiConfig.EPOCH_LENGTH)
+        self.NOTIFY_EPSILON = config_dict.get(
+            "notify_epsilon", AntiConfig.NOTIFY_EPSILON
+        )
+        self.CONVERGENCE_TOLERANCE = config_dict.get(
+            "convergence_tolerance", AntiConfig.CONVERGENCE_TOLERANCE
+        )
+        self.CONVERGENCE_WINDOW = config_dict.get(
+            "convergence_window", AntiConfig.CONVERGENCE_WINDOW
+        )
+        self.WEIGHT = config_dict.get("weight", AntiConfig.WEIGHT)
+        self.APPLIED_PUSHES_LIMIT = config_dict.get(
+            "applied_pushes_limit", AntiConfig.APPLIED_PUSHES_LIMIT
+        )
+
+
+class SketchConfig(AntiConfig):
+    HLL_PRECISION = 10  # 2^10 registers, about 3% of error
+    QUANTILE = 0.5  # quantile returned as the aggregate
+    QUANTILE_ACCURACY = 0.01  # relative accuracy of the quantiles
+    QUANTILE_MIN_VALUE = 1e-3  # smaller values are clamped
+    QUANTILE_MAX_VALUE = 1e6  # bigger values are clamped
+    TOP_K = 10  # amount of heavy hitters returned as the aggregate
+    TOP_K_CAPACITY = 100  # keys kept in the summary, the more the less error
+
+    def load_from_dict(self, config_dict: Dict[str, Any]):
+        super().load_from_dict(config_dict)
+        self.HLL_PRECISION = config_dict.get(
+            "hll_precision", SketchConfig.HLL_PRECISION
+        )
+        self.QUANTILE = config_dict.get("quantile", SketchConfig.QUANTILE)
+        self.QUANTILE_ACCURACY = config_dict.get(
+            "quantile_accuracy", SketchConfig.QUANTILE_ACCURACY
+        )
+        self.QUANTILE_MIN_VALUE = config_dict.get(
+            "quantile_min_value", SketchConfig.QUANTILE_MIN_VALUE
+        )
+        self.QUANTILE_MAX_VALUE = config_dict.get(
+            "quantile_max_value", SketchConfig.QUANTILE_MAX_VALUE
+        )
+        self.TOP_K = config_dict.get("top_k", SketchConfig.TOP_K)
+        self.TOP_K_CAPACITY = config_dict.get(
+            "top_k_capacity", SketchConfig.TOP_K_CAPACITY
+        )
+
+
+class GroupConfig(AntiConfig):
+    MAX_GROUPS = 32  # groups kept in the payload, the most recent ones
+    GROUP_TTL = 10  # seconds without a member refreshing a group to expire it
+
+    def load_from_dict(self, config_dict: Dict[str, Any]):
+        super().load_from_dict(config_dict)
+        self.MAX_GROUPS = config_dict.get("max_groups", GroupConfig.MAX_GROUPS)
+        self.GROUP_TTL = config_dict.get("group_ttl", GroupConfig.GROUP_TTL)
+
+
+class TreeConfig(IConfig):
+    AGGREGATE_TYPE = None
+    TIMEOUT = 2  # seconds for the whole tree to report
+    LEVEL_MARGIN = 0.1  # seconds that each level reserves for reporting up
+
+    def load_from_dict(self, config_dict: Dict[str, Any]):
+        self.AGGREGATE_TYPE = config_dict["aggregate_type"]
+        self.TIMEOUT = config_dict.get("timeout", TreeConfig.TIMEOUT)
+        self.LEVEL_MARGIN = config_dict.get("level_margin", TreeConfig.LEVEL_MARGIN)
@@ -0,0 +1,218 @@
+import asyncio
+import math
+from typing import Any, Dict, Hashable, List, Tuple
+
+from unsserv.common.aggregation.anti_entropy import AntiEntropy, aggregate_functions
+from unsserv.common.aggregation.config import AggregateType, GroupConfig
+from unsserv.common.services_abc import IMembershipService
+
+GroupEntry = Tuple[Any, float]  # value ([sum, weight] for MEAN), update time
+GroupsValue = Dict[Hashable, GroupEntry]
+
+group_aggregates = {AggregateType.MEAN, AggregateType.MAX, AggregateType.MIN}
+
+
+def _get_relative_difference(value: float, other_value: float) -> float:
+    magnitude = max(abs(value), abs(other_value))
+    return abs(value - other_value) / magnitude if magnitude else 0
+
+
+def _parse_group(raw_group: Hashable) -> Hashable:
+    # RPC responses encode str values, so push-sum estimates carry bytes groups
+    return raw_group.decode() if isinstance(raw_group, bytes) else raw_group
+
+
+class GroupAntiEntropy(AntiEntropy):
+    """
+    Aggregation Anti-Entropy service scoped by groups of nodes.
+
+    The 'group_by' function maps every node (e.g. the region in its
+    Node.extra) to its group, and a single gossip payload carries the
+    partial aggregates of every known group, so each node aggregates
+    every group, including the ones it does not belong to. MEAN is
+    computed with push-sum over a (sum, weight) pair per group instead,
+    which conserves the mass of every group, and nodes out of a group
+    start with none of it, so they relay it without biasing its mean.
+    Only the 'max_groups' most recently updated groups are kept, and
+    groups with no member refreshing them for 'group_ttl' seconds
+    expire, together with their mass. Update times travel as ages, so
+    clocks need not be synchronized.
+    """
+
+    _config: GroupConfig
+    _group: Hashable
+
+    def __init__(self, membership: IMembershipService):
+        super().__init__(membership)
+        self._config = GroupConfig()
+
+    async def join(self, service_id: str, **configuration: Any):
+        if "group_by" not in configuration:
+            raise ValueError("Missing 'group_by' function")
+        self._group = configuration["group_by"](self.my_node)
+        await super().join(service_id, **configuration)
+        await self._scheduler.add_job(
+            f"anti-entropy-groups-{self.service_id}",
+            self._maintain_groups,
+            self._config.GROUP_TTL / 4,
+        )
+
+    async def leave(self):
+        if self.running:
+            await self._scheduler.remove_job(f"anti-entropy-groups-{self.service_id}")
+        await super().leave()
+
+    async def get_group_aggregate(self, group: Hashable) -> Any:
+        """
+        Get the aggregate of a single group.
+
+        :param group: the group, as returned by 'group_by'.
+        :return: the aggregate, or None if the group is unknown.
+        """
+        return (await self.get_aggregate()).get(group, None)
+
+    def get_confidence_interval(self) -> Any:
+        """
+        Get the interval where the mean of every group is expected to be.
+
+        :return: lower and upper bounds of the interval of every group,
+            or None if the node has no estimate yet.
+        """
+        if not self._uses_push_sum():
+            raise ValueError("Only the group MEAN has a confidence interval")
+        if self._aggregate_value is None:
+            return None
+        return {
+            group: (value - self._estimate_error, value + self._estimate_error)
+            for group, value in self._get_output_value(self._aggregate_value).items()
+        }
+
+    async def _maintain_groups(self):
+        if self._uses_push_sum():
+            self._sum = self._refresh_groups(self._sum)
+        self._aggregate_value = self._refresh_groups(self._aggregate_value)
+        self._aggregate_version += 1
+
+    def _refresh_groups(self, groups_value: GroupsValue) -> GroupsValue:
+        groups_value = dict(groups_value)
+        own_value, _ = groups_value[self._group]
+        groups_value[self._group] = (own_value, self._get_time())
+        return self._prune_groups(groups_value)
+
+    def _uses_push_sum(self) -> bool:
+        return self._config.AGGREGATE_TYPE == AggregateType.MEAN
+
+    def _validate_aggregate(self, aggregate_type: AggregateType):
+        if aggregate_type not in group_aggregates:
+            raise ValueError("Invalid group Aggregate type")
+
+    def _parse_value(self, value: Any) -> GroupsValue:
+        if self._config.AGGREGATE_TYPE == AggregateType.MEAN:
+            value = [value, 1]  # scaled by the weight of the node by push-sum
+        return {self._group: (value, self._get_time())}
+
+    def _aggregate_values(self, values: List[GroupsValue]) -> GroupsValue:
+        aggregated_groups: GroupsValue = {}
+        for group in {group for groups_value in values for group in groups_value}:
+            entries = [groups_value.get(group, None) for groups_value in values]
+            group_values = [entry[0] if entry else None for entry in entries]
+            aggregated_groups[group] = (
+                self._aggregate_group(group_values),
+                max(entry[1] for entry in entries if entry),
+            )
+        return self._prune_groups(aggregated_groups)
+
+    def _aggregate_group(self, values: List[Any]) -> Any:
+        return aggregate_functions[self._config.AGGREGATE_TYPE](
+            [value for value in values if value is not None]
+        )
+
+    def _prune_groups(self, groups_value: GroupsValue) -> GroupsValue:
+        now = self._get_time()
+        fresh_groups = sorted(
+            (
+                (group, entry)
+                for group, entry in groups_value.items()
+                if group == self._group or now - entry[1] <= self._config.GROUP_TTL
+            ),
+            key=lambda group_entry: (
+                group_entry[0] != self._group,  # the own group first
+                -group_entry[1][1],
+            ),
+        )
+        return dict(fresh_groups[: self._config.MAX_GROUPS])
+
+    def _add_values(self, value: GroupsValue, other_value: GroupsValue) -> GroupsValue:
+        added_groups = dict(value)
+        for group, (other_pair, other_updated) in other_value.items():
+            pair, updated = added_groups.get(group, ([0, 0], other_updated))
+            added_groups[group] = (
+                [pair[0] + other_pair[0], pair[1] + other_pair[1]],
+                max(updated, other_updated),
+            )
+        return self._prune_groups(added_groups)
+
+    def _scale_value(self, value: GroupsValue, factor: float) -> GroupsValue:
+        return {
+            group: ([pair[0] * factor, pair[1] * factor], updated)
+            for group, (pair, updated) in value.items()
+        }
+
+    def _get_values_distance(self, value: Any, other_value: Any) -> float:
+        output_value = self._get_output_value(value)
+        other_output_value = self._get_output_value(other_value)
+        return max(
+            (
+                abs(output_value[group] - other_output_value[group])
+                for group in output_value.keys() & other_output_value.keys()
+            ),
+            default=0,
+        )
+
+    def _are_same_values(self, value: Any, other_value: Any) -> bool:
+        if value is None or other_value is None:
+            return value is other_value
+        return self._get_output_value(value) == self._get_output_value(other_value)
+
+    def _get_relative_distance(self, value: Any, other_value: Any) -> float:
+        if value is None or other_value is None:
+            return 0 if value is other_value else math.inf
+        output_value = self._get_output_value(value)
+        other_output_value = self._get_output_value(other_value)
+        if output_value.keys() != other_output_value.keys():
+            return math.inf
+        return max(
+            (
+                _get_relative_difference(output_value[group], other_output_value[group])
+                for group in output_value
+            ),
+            default=0,
+        )
+
+    def _encode_value(self, value: GroupsValue) -> Any:
+        now = self._get_time()
+        return [
+            [group, group_value, now - updated]
+            for group, (group_value, updated) in value.items()
+        ]
+
+    def _decode_value(self, raw_value: Any) -> GroupsValue:
+        now = self._get_time()
+        return {
+            _parse_group(group): (group_value, now - age)
+            for group, group_value, age in raw_value
+        }
+
+    def _get_output_value(self, value: GroupsValue) -> Dict[Hashable, Any]:
+        if value is None:
+            return None
+        if self._config.AGGREGATE_TYPE != AggregateType.MEAN:
+            return {group: group_value for group, (group_value, _) in value.items()}
+        return {
+            group: group_value[0] / group_value[1]
+            for group, (group_value, _) in value.items()
+            if group_value[1]
+        }
+
+    def _get_time(self) -> float:
+        return asyncio.get_event_loop().time()
@@ -0,0 +1,133 @@
+from enum import IntEnum, auto
+from typing import Any, Tuple, Sequence
+
+from unsserv.common.aggregation.structs import PushSum, TreePartial, TreeQuery
+from unsserv.common.rpc.protocol import AProtocol, ITranscoder, Command, Data, Handler
+from unsserv.common.rpc.structs import Message
+from unsserv.common.structs import Node
+
+FIELD_COMMAND = "anti-command"
+FIELD_PUSH_ID = "anti-push-id"
+FIELD_SUM = "anti-sum"
+FIELD_WEIGHT = "anti-weight"
+FIELD_ESTIMATE = "anti-estimate"
+FIELD_EPOCH = "anti-epoch"
+
+FIELD_TREE_COMMAND = "tree-command"
+FIELD_QUERY_ID = "tree-query-id"
+FIELD_TREE_ID = "tree-tree-id"
+FIELD_TIMEOUT = "tree-timeout"
+FIELD_PARTIAL = "tree-partial"
+
+
+class AntiCommand(IntEnum):
+    PUSH_SUM = auto()
+
+
+class AntiTranscoder(ITranscoder):
+    def encode(self, command: Command, *data: Data) -> Message:
+        if command == AntiCommand.PUSH_SUM:
+            push_sum: PushSum = data[0]
+            message_data = {
+                FIELD_COMMAND: AntiCommand.PUSH_SUM,
+                FIELD_PUSH_ID: push_sum.id,
+                FIELD_SUM: push_sum.sum,
+                FIELD_WEIGHT: push_sum.weight,
+                FIELD_ESTIMATE: push_sum.estimate,
+                FIELD_EPOCH: push_sum.epoch,
+            }
+            return Message(self.my_node, self.service_id, message_data)
+        raise ValueError("Invalid Command")
+
+    def decode(self, message: Message) -> Tuple[Command, Sequence[Data]]:
+        command = message.data[FIELD_COMMAND]
+        if command == AntiCommand.PUSH_SUM:
+            push_sum = PushSum(
+                id=message.data[FIELD_PUSH_ID],
+                sum=message.data[FIELD_SUM],
+                weight=message.data[FIELD_WEIGHT],
+                estimate=message.data[FIELD_ESTIMATE],
+                epoch=message.data[FIELD_EPOCH],
+            )
+            return AntiCommand.PUSH_SUM, [push_sum]
+        raise ValueError("Invalid Command")
+
+
+class AntiProtocol(AProtocol):
+    def _get_new_transcoder(self):
+        return AntiTranscoder(self.my_node, self.service_id)
+
+    async def push_sum(self, destination: Node, push_sum: PushSum) -> Tuple[int, Any]:
+        message = self._transcoder.encode(AntiCommand.PUSH_SUM, push_sum)
+        return await self._rpc.call_send_message(destination, message)
+
+    def set_handler_push_sum(self, handler: Handler):
+        self._handlers[AntiCommand.PUSH_SUM] = handler
+
+
+class TreeCommand(IntEnum):
+    QUERY = auto()
+    REPORT = auto()
+
+
+class TreeTranscoder(ITranscoder):
+    def encode(self, command: Command, *data: Data) -> Message:
+        if command == TreeCommand.QUERY:
+            query: TreeQuery = data[0]
+            message_data = {
+                FIELD_TREE_COMMAND: TreeCommand.QUERY,
+                FIELD_QUERY_ID: query.id,
+                FIELD_TREE_ID: query.tree_id,
+                FIELD_TIMEOUT: query.timeout,
+            }
+            return Message(self.my_node, self.service_id, message_data)
+        elif command == TreeCommand.REPORT:
+            partial: TreePartial = data[0]
+            message_data = {
+                FIELD_TREE_COMMAND: TreeCommand.REPORT,
+                FIELD_QUERY_ID: partial.query_id,
+                FIELD_PARTIAL: [
+                    partial.sum,
+                    partial.count,
+                    partial.min,
+                    partial.max,
+                    partial.complete,
+                ],
+            }
+            return Message(self.my_node, self.service_id, message_data)
+        raise ValueError("Invalid Command")
+
+    def decode(self, message: Message) -> Tuple[Command, Sequence[Data]]:
+        command = message.data[FIELD_TREE_COMMAND]
+        if command == TreeCommand.QUERY:
+            query = TreeQuery(
+                id=message.data[FIELD_QUERY_ID],
+                tree_id=message.data[FIELD_TREE_ID],
+                timeout=message.data[FIELD_TIMEOUT],
+            )
+            return TreeCommand.QUERY, [query]
+        elif command == TreeCommand.REPORT:
+            partial = TreePartial(
+                message.data[FIELD_QUERY_ID], *message.data[FIELD_PARTIAL]
+            )
+            return TreeCommand.REPORT, [partial]
+        raise ValueError("Invalid Command")
+
+
+class TreeProtocol(AProtocol):
+    def _get_new_transcoder(self):
+        return TreeTranscoder(self.my_node, self.service_id)
+
+    async def query(self, destination: Node, query: TreeQuery) -> bool:
+        message = self._transcoder.encode(TreeCommand.QUERY, query)
+        return await self._rpc.call_send_message(destination, message)
+
+    async def report(self, destination: Node, partial: TreePartial):
+        message = self._transcoder.encode(TreeCommand.REPORT, partial)
+        return await self._rpc.call_send_message(destination, message)
+
+    def set_handler_query(self, handler: Handler):
+        self._handlers[TreeCommand.QUERY] = handler
+
+    def set_handler_report(self, handler: Handler):
+        self._handlers[TreeCommand.REPORT] = handler
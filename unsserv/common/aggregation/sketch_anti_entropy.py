@@ -0,0 +1,133 @@
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+from unsserv.common.aggregation.anti_entropy import AntiEntropy, sketch_aggregates
+from unsserv.common.aggregation.config import AggregateType, SketchConfig
+from unsserv.common.aggregation.sketches import (
+    HyperLogLog,
+    QuantileSketch,
+    SpaceSaving,
+)
+from unsserv.common.aggregation.vector import (
+    add_vectors,
+    get_vectors_distance,
+    scale_vector,
+)
+from unsserv.common.services_abc import IMembershipService
+
+Sketch = Union[HyperLogLog, QuantileSketch, SpaceSaving]
+
+
+class SketchAntiEntropy(AntiEntropy):
+    """
+    Aggregation Anti-Entropy service for mergeable sketches.
+
+    The 'aggregate_value' is an iterable of local observations instead
+    of a single number. With DISTINCT_COUNT they are items (e.g. user
+    ids) summarized in a HyperLogLog sketch, which is gossiped and
+    merged as MAX is, and the aggregate is the estimated amount of
+    distinct items in the network. With QUANTILE they are numbers (e.g.
+    latencies) summarized in a quantile sketch, which is aggregated with
+    push-sum, and the aggregate is the configured quantile of all of
+    them. Any other quantile can be queried locally with get_quantile.
+    With TOP_K they are keys (e.g. searched data ids), or their counts,
+    summarized in a Space-Saving summary aggregated with push-sum too,
+    and the aggregate is the list of the most frequent HeavyHitters.
+    """
+
+    _config: SketchConfig
+    _sketch: Sketch
+
+    def __init__(self, membership: IMembershipService):
+        super().__init__(membership)
+        self._config = SketchConfig()
+
+    async def join(self, service_id: str, **configuration: Any):
+        configuration["aggregate_type"] = self._parse_aggregate(
+            configuration["aggregate_type"]
+        )
+        self._config.load_from_dict(configuration)
+        if self._config.AGGREGATE_TYPE == AggregateType.DISTINCT_COUNT:
+            self._sketch = HyperLogLog(self._config.HLL_PRECISION)
+        elif self._config.AGGREGATE_TYPE == AggregateType.TOP_K:
+            self._sketch = SpaceSaving(self._config.TOP_K_CAPACITY)
+        else:
+            self._sketch = QuantileSketch(
+                self._config.QUANTILE_ACCURACY,
+                self._config.QUANTILE_MIN_VALUE,
+                self._config.QUANTILE_MAX_VALUE,
+            )
+        await super().join(service_id, **configuration)
+
+    async def get_quantile(self, quantile: float) -> Optional[float]:
+        """
+        Get any quantile of the aggregated values.
+
+        :param quantile: quantile between 0 and 1 (e.g. 0.99 for p99).
+        :return: the quantile, or None if there are no values yet.
+        """
+        if not self.running:
+            raise RuntimeError("Aggregation service not running")
+        if self._config.AGGREGATE_TYPE != AggregateType.QUANTILE:
+            raise RuntimeError("Quantiles are only computed by QUANTILE")
+        counts = self._epoch_aggregate_value
+        if counts is None:
+            counts = self._aggregate_value
+        if not isinstance(self._sketch, QuantileSketch) or not sum(counts):
+            return None
+        return self._sketch.get_quantile(counts, quantile)
+
+    def get_confidence_interval(self) -> Optional[Tuple[float, float]]:
+        raise ValueError("Sketch aggregates have no confidence interval")
+
+    def _validate_aggregate(self, aggregate_type: AggregateType):
+        if aggregate_type not in sketch_aggregates:
+            raise ValueError("Invalid sketch Aggregate type")
+
+    def _parse_value(self, values: Iterable[Any]) -> Any:
+        return self._sketch.make([] if values is None else values)
+
+    def _aggregate_values(self, values: List[Any]) -> Any:
+        return self._sketch.merge(values)
+
+    def _add_values(self, value: Any, other_value: Any) -> Any:
+        if isinstance(self._sketch, SpaceSaving):
+            return self._sketch.add(value, other_value)
+        return add_vectors(value, other_value)
+
+    def _scale_value(self, value: Any, factor: float) -> Any:
+        if isinstance(self._sketch, SpaceSaving):
+            return self._sketch.scale(value, factor)
+        return scale_vector(value, factor)
+
+    def _get_values_distance(self, value: Any, other_value: Any) -> float:
+        if isinstance(self._sketch, HyperLogLog):  # registers are not additive
+            return abs(
+                self._sketch.estimate(value) - self._sketch.estimate(other_value)
+            )
+        if isinstance(self._sketch, SpaceSaving):
+            return self._sketch.get_distance(value, other_value)
+        return get_vectors_distance(value, other_value)
+
+    def _are_same_values(self, value: Any, other_value: Any) -> bool:
+        if value is None or other_value is None:
+            return value is other_value
+        if isinstance(self._sketch, SpaceSaving):
+            return value == other_value
+        return list(value) == list(other_value)
+
+    def _encode_value(self, value: Any) -> Any:
+        return None if value is None else self._sketch.encode(value)
+
+    def _decode_value(self, raw_value: Any) -> Any:
+        return None if raw_value is None else self._sketch.decode(raw_value)
+
+    def _get_output_value(self, value: Any) -> Any:
+        if value is None:
+            return None
+        if isinstance(self._sketch, HyperLogLog):
+            return self._sketch.estimate(value)
+        if isinstance(self._sketch, SpaceSaving):
+            return self._sketch.get_top(value, self._config.TOP_K)
+        if not sum(value):
+            return None
+        return self._sketch.get_quantile(value, self._config.QUANTILE)
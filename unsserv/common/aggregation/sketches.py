@@ -0,0 +1,312 @@
+import hashlib
+import heapq
+import math
+import struct
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from unsserv.common.aggregation.structs import HeavyHitter, TopKSummary
+from unsserv.common.aggregation.vector import Vector, add_vectors
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional, plain lists are used without it
+    numpy = None
+
+Registers = Any  # numpy.ndarray of uint8, or a list of ints without NumPy
+RawQuantileSketch = Tuple[int, bytes]  # first non-empty bucket, packed counts
+RawTopKSummary = Tuple[float, float, List[Tuple[str, float]]]
+
+HASH_BITS = 64
+COUNTS_FORMAT = "<{}f"  # little-endian float32, the same with or without NumPy
+# every push-sum message carries two sketches, which must fit in 8192 bytes
+MAX_ENCODED_BUCKETS = 800
+
+
+def _hash_item(item: Any) -> int:
+    """Hash an item the same way in every node (unlike the built-in hash)."""
+    digest = hashlib.blake2b(repr(item).encode(), digest_size=HASH_BITS // 8)
+    return int.from_bytes(digest.digest(), "big")
+
+
+def _parse_key(raw_key: Any) -> str:
+    # RPC responses encode str values, so push-sum estimates carry bytes keys
+    return raw_key.decode() if isinstance(raw_key, bytes) else raw_key
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counting sketch.
+
+    The sketch is a vector of 2^precision registers, each holding the
+    longest run of leading zeros (plus one) seen among the hashes of the
+    items mapped to it. Merging is the element-wise max of the
+    registers, so it is idempotent and can be gossiped as MAX is, and
+    the relative error of the estimate is about 1.04 / sqrt(registers).
+    """
+
+    def __init__(self, precision: int):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16")
+        self.precision = precision
+        self.size = 2 ** precision
+        if self.size <= 16:
+            self._alpha = 0.673
+        elif self.size <= 32:
+            self._alpha = 0.697
+        elif self.size <= 64:
+            self._alpha = 0.709
+        else:
+            self._alpha = 0.7213 / (1 + 1.079 / self.size)
+
+    def make(self, items: Iterable[Any]) -> Registers:
+        registers = [0] * self.size
+        rank_bits = HASH_BITS - self.precision
+        for item in items:
+            item_hash = _hash_item(item)
+            index = item_hash >> rank_bits
+            rank = rank_bits - (item_hash & ((1 << rank_bits) - 1)).bit_length() + 1
+            registers[index] = max(registers[index], rank)
+        return self._to_registers(registers)
+
+    def merge(self, sketches: List[Registers]) -> Registers:
+        if numpy is not None:
+            return numpy.maximum.reduce(sketches)
+        return [max(registers) for registers in zip(*sketches)]
+
+    def estimate(self, registers: Registers) -> float:
+        if numpy is not None:
+            harmonic_sum = float(numpy.ldexp(1.0, -registers.astype(int)).sum())
+            empty_registers = int(numpy.count_nonzero(registers == 0))
+        else:
+            harmonic_sum = sum(2.0 ** -register for register in registers)
+            empty_registers = registers.count(0)
+        estimate = self._alpha * self.size ** 2 / harmonic_sum
+        if estimate <= 2.5 * self.size and empty_registers:  # small range
+            return self.size * math.log(self.size / empty_registers)
+        return estimate
+
+    def encode(self, registers: Registers) -> bytes:
+        return bytes(registers) if numpy is None else registers.tobytes()
+
+    def decode(self, raw_registers: bytes) -> Registers:
+        if len(raw_registers) != self.size:
+            raise ValueError("Invalid HyperLogLog precision")
+        return self._to_registers(list(raw_registers))
+
+    def _to_registers(self, registers: List[int]) -> Registers:
+        if numpy is not None:
+            return numpy.array(registers, dtype=numpy.uint8)
+        return registers
+
+
+class QuantileSketch:
+    """
+    Quantile sketch with logarithmic buckets (DDSketch style).
+
+    Bucket i counts the values in (gamma^(i-1), gamma^i], so any
+    quantile is returned with the given relative accuracy. Values out of
+    [min_value, max_value] are clamped, which bounds the amount of
+    buckets. The sketch is a plain vector of counts: merging is adding
+    them, and scaling them does not change the quantiles, so it can be
+    aggregated with push-sum like any other vector. When encoded, at
+    most MAX_ENCODED_BUCKETS are kept, collapsing the lowest ones, so
+    only the lowest quantiles of very spread values lose accuracy.
+    """
+
+    def __init__(self, relative_accuracy: float, min_value: float, max_value: float):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Relative accuracy must be between 0 and 1")
+        if not 0 < min_value < max_value:
+            raise ValueError("Invalid quantile sketch range")
+        self._log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.min_value, self.max_value = min_value, max_value
+        self._offset = self._get_bucket(min_value)
+        self.size = self._get_bucket(max_value) - self._offset + 1
+
+    def make(self, values: Iterable[float]) -> Vector:
+        if numpy is not None:
+            clamped_values = numpy.clip(
+                numpy.fromiter(values, dtype=numpy.float64),
+                self.min_value,
+                self.max_value,
+            )
+            buckets = numpy.ceil(numpy.log(clamped_values) / self._log_gamma)
+            return numpy.bincount(
+                buckets.astype(int) - self._offset, minlength=self.size
+            ).astype(numpy.float64)
+        counts = [0.0] * self.size
+        for value in values:
+            clamped_value = min(max(value, self.min_value), self.max_value)
+            counts[self._get_bucket(clamped_value) - self._offset] += 1
+        return counts
+
+    def merge(self, sketches: List[Vector]) -> Vector:
+        merged_counts = sketches[0]
+        for counts in sketches[1:]:
+            merged_counts = add_vectors(merged_counts, counts)
+        return merged_counts
+
+    def get_quantile(self, counts: Vector, quantile: float) -> float:
+        if not 0 <= quantile <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        if numpy is not None:
+            cumulative_counts = numpy.cumsum(counts)
+            total_count = float(cumulative_counts[-1])
+            if total_count <= 0:
+                raise ValueError("Empty quantile sketch")
+            bucket = int(numpy.searchsorted(cumulative_counts, quantile * total_count))
+            if not quantile:  # the first non-empty bucket
+                bucket = int(numpy.argmax(cumulative_counts > 0))
+        else:
+            total_count = sum(counts)
+            if total_count <= 0:
+                raise ValueError("Empty quantile sketch")
+            cumulative_count = 0.0
+            for bucket, count in enumerate(counts):
+                cumulative_count += count
+                if count > 0 and quantile * total_count <= cumulative_count:
+                    break
+        return self._get_bucket_value(min(bucket, self.size - 1) + self._offset)
+
+    def encode(self, counts: Vector) -> RawQuantileSketch:
+        """Encode only the range of non-empty buckets, as packed float32."""
+        if numpy is not None:
+            non_empty = numpy.flatnonzero(counts).tolist()
+        else:
+            non_empty = [bucket for bucket, count in enumerate(counts) if count]
+        if not non_empty:
+            return 0, b""
+        first, last = non_empty[0], non_empty[-1]
+        if MAX_ENCODED_BUCKETS <= last - first:
+            first = last - MAX_ENCODED_BUCKETS + 1
+        encoded_counts = [float(count) for count in counts[first : last + 1]]
+        encoded_counts[0] += float(sum(counts[:first]))  # the collapsed buckets
+        return (
+            first,
+            struct.pack(COUNTS_FORMAT.format(len(encoded_counts)), *encoded_counts),
+        )
+
+    def decode(self, raw_counts: RawQuantileSketch) -> Vector:
+        first, raw_vector = raw_counts
+        length = len(raw_vector) // struct.calcsize(COUNTS_FORMAT.format(1))
+        if first + length > self.size:
+            raise ValueError("Invalid quantile sketch range")
+        counts = [0.0] * self.size
+        for bucket, count in enumerate(
+            struct.unpack(COUNTS_FORMAT.format(length), raw_vector), start=first
+        ):
+            counts[bucket] = count
+        return numpy.array(counts) if numpy is not None else counts
+
+    def _get_bucket(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _get_bucket_value(self, bucket: int) -> float:
+        gamma = math.exp(self._log_gamma)
+        return 2 * gamma ** bucket / (gamma + 1)
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters summary.
+
+    The summary keeps the counts of at most 'capacity' keys. When it
+    overflows, the smallest counts are dropped and the largest of them
+    is added to the error, which bounds how much any count (or a missing
+    key) may be underestimated. Summaries are merged by adding the
+    counts, so they can be aggregated with push-sum, and since the total
+    count is kept too, the frequencies do not depend on the scale.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("Space-Saving capacity must be positive")
+        self.capacity = capacity
+
+    def make(self, keys: Union[Iterable[str], Dict[str, float]]) -> TopKSummary:
+        """
+        Make a summary from the local occurrences of the keys.
+
+        :param keys: every occurrence of the keys, or their counts.
+        :return: the summary.
+        """
+        counts = dict(keys) if isinstance(keys, dict) else dict(Counter(keys))
+        return self._truncate(TopKSummary(counts, sum(counts.values()), 0))
+
+    def merge(self, summaries: List[TopKSummary]) -> TopKSummary:
+        merged_summary = summaries[0]
+        for summary in summaries[1:]:
+            merged_summary = self.add(merged_summary, summary)
+        return merged_summary
+
+    def add(self, summary: TopKSummary, other: TopKSummary) -> TopKSummary:
+        counts = dict(summary.counts)
+        for key, count in other.counts.items():
+            counts[key] = counts.get(key, 0) + count
+        return self._truncate(
+            TopKSummary(
+                {key: count for key, count in counts.items() if count > 0},
+                summary.total + other.total,
+                summary.error + other.error,
+            )
+        )
+
+    def scale(self, summary: TopKSummary, factor: float) -> TopKSummary:
+        return TopKSummary(
+            {key: count * factor for key, count in summary.counts.items()},
+            summary.total * factor,
+            summary.error * factor,
+        )
+
+    def get_distance(self, summary: TopKSummary, other: TopKSummary) -> float:
+        """Get the largest difference between the frequencies of a key."""
+        frequencies = self._get_frequencies(summary)
+        other_frequencies = self._get_frequencies(other)
+        return max(
+            (
+                abs(frequencies.get(key, 0) - other_frequencies.get(key, 0))
+                for key in frequencies.keys() | other_frequencies.keys()
+            ),
+            default=0,
+        )
+
+    def get_top(self, summary: TopKSummary, k: int) -> List[HeavyHitter]:
+        """Get the k most frequent keys, from the most to the least."""
+        if summary.total <= 0:
+            return []
+        top_counts = heapq.nlargest(
+            k, summary.counts.items(), key=lambda key_count: key_count[1]
+        )
+        return [
+            HeavyHitter(key, count / summary.total, summary.error / summary.total)
+            for key, count in top_counts
+        ]
+
+    def encode(self, summary: TopKSummary) -> RawTopKSummary:
+        return summary.total, summary.error, list(summary.counts.items())
+
+    def decode(self, raw_summary: RawTopKSummary) -> TopKSummary:
+        total, error, counts = raw_summary
+        if len(counts) > self.capacity:
+            raise ValueError("Invalid Space-Saving capacity")
+        return TopKSummary(
+            {_parse_key(key): count for key, count in counts}, total, error
+        )
+
+    def _truncate(self, summary: TopKSummary) -> TopKSummary:
+        if len(summary.counts) <= self.capacity:
+            return summary
+        sorted_counts = sorted(
+            summary.counts.items(), key=lambda key_count: key_count[1], reverse=True
+        )
+        return TopKSummary(
+            dict(sorted_counts[: self.capacity]),
+            summary.total,
+            summary.error + sorted_counts[self.capacity][1],
+        )
+
+    def _get_frequencies(self, summary: TopKSummary) -> Dict[str, float]:
+        if summary.total <= 0:
+            return {}
+        return {key: count / summary.total for key, count in summary.counts.items()}
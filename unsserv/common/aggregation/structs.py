@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class PushSum:
+    id: str  # the same on retransmissions, for applying the mass only once
+    sum: Any  # a number, or an encoded vector
+    weight: float
+    estimate: Any  # sum / weight of the sender, for measuring the error
+    epoch: int = 0
+
+
+@dataclass
+class TopKSummary:
+    counts: Dict[str, float]  # bounded to the capacity of the summary
+    total: float  # count of every key, including the dropped ones
+    error: float  # upper bound of how much any count is underestimated
+
+
+@dataclass
+class HeavyHitter:
+    key: str
+    frequency: float  # fraction of all the occurrences
+    error: float  # the frequency may be up to this much higher
+
+
+@dataclass
+class TreeQuery:
+    id: str
+    tree_id: str  # the dissemination tree the query travels through
+    timeout: float  # seconds left for the subtree to report
+
+
+@dataclass
+class TreePartial:
+    query_id: str
+    sum: float
+    count: int  # amount of nodes aggregated
+    min: Optional[float]
+    max: Optional[float]
+    complete: bool  # False if some subtree did not report in time
+
+
+@dataclass
+class TreeAggregate:
+    value: Any
+    count: int  # amount of nodes aggregated
+    complete: bool  # False if it is a partial result (a subtree timed out)
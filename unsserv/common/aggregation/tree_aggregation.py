@@ -0,0 +1,257 @@
+import asyncio
+from typing import Any, Dict, List, Set, Union
+
+from unsserv.common.aggregation.config import AggregateType, TreeConfig
+from unsserv.common.aggregation.protocol import TreeProtocol
+from unsserv.common.aggregation.structs import TreeAggregate, TreePartial, TreeQuery
+from unsserv.common.services_abc import IAggregationService, IDisseminationService
+from unsserv.common.structs import HandlerExecutor, Node, Property
+from unsserv.common.typing import Handler
+from unsserv.common.utils import HandlersManager, get_random_id, stop_task
+
+tree_aggregate_names: Dict[str, AggregateType] = {
+    "mean": AggregateType.MEAN,
+    "max": AggregateType.MAX,
+    "min": AggregateType.MIN,
+    "count": AggregateType.COUNT,
+    "sum": AggregateType.SUM,
+}
+
+
+class TreeAggregation(IAggregationService):
+    """
+    Aggregation service that convergecasts over a dissemination tree.
+
+    The root sends a query down the tree of the dissemination service
+    (Brisa or Mon) and every node reports the partial aggregate of its
+    subtree to the node it got the query from, so the exact aggregate is
+    computed in O(depth) rounds. Nodes reached through several parents
+    only report to the first one. Every level waits for its children
+    'level_margin' seconds less than its parent does, and when some
+    subtree does not report in time the result is a partial one.
+    """
+
+    properties = {Property.EXTREME, Property.STABLE}
+    dissemination: IDisseminationService
+    _config: TreeConfig
+    _handlers_manager: HandlersManager
+    _protocol: TreeProtocol
+    _local_value: Any
+    _partials: Dict[str, TreePartial]
+    _query_children: Dict[str, Set[Node]]
+    _reported_children: Dict[str, Set[Node]]
+    _reports_events: Dict[str, asyncio.Event]
+    _query_tasks: List[asyncio.Task]
+
+    def __init__(self, dissemination: IDisseminationService):
+        if Property.HAS_TREE not in dissemination.properties:
+            raise ValueError(
+                "Invalid dissemination service. "
+                "Dissemination must expose its dissemination tree"
+            )
+        self.dissemination = dissemination
+        self.membership = getattr(dissemination, "membership")
+        self.my_node = dissemination.my_node
+        self._config = TreeConfig()
+        self._handlers_manager = HandlersManager()
+        self._protocol = TreeProtocol(self.my_node)
+        self._local_value = None
+        self._partials = {}
+        self._query_children = {}
+        self._reported_children = {}
+        self._reports_events = {}
+        self._query_tasks = []
+
+    async def join(self, service_id: str, **configuration: Any):
+        if self.running:
+            raise RuntimeError("Already running Aggregation")
+        configuration["aggregate_type"] = self._parse_aggregate(
+            configuration["aggregate_type"]
+        )
+        if (
+            configuration["aggregate_type"] != AggregateType.COUNT
+            and configuration.get("aggregate_value", None) is None
+        ):
+            raise ValueError("Missing 'aggregate_value'")
+        self._config.load_from_dict(configuration)
+        self._local_value = configuration.get("aggregate_value")
+        self.service_id = service_id
+        self._protocol.set_handler_query(self._handler_query)
+        self._protocol.set_handler_report(self._handler_report)
+        await self._protocol.start(self.service_id)
+        self.running = True
+
+    async def leave(self):
+        if not self.running:
+            return
+        for task in self._query_tasks:
+            await stop_task(task)
+        self._query_tasks = []
+        self._handlers_manager.remove_all_handlers()
+        await self._protocol.stop()
+        self.running = False
+
+    async def get_aggregate(self) -> Any:
+        """
+        Aggregate the values of the whole tree, rooted at this node.
+
+        It takes up to 'timeout' seconds, and the value may be partial.
+        """
+        return (await self.get_tree_aggregate()).value
+
+    async def get_tree_aggregate(self) -> TreeAggregate:
+        """
+        Aggregate the values of the whole tree, rooted at this node.
+
+        :return: the aggregate, together with the amount of nodes
+            aggregated and whether every subtree reported in time.
+        """
+        if not self.running:
+            raise RuntimeError("Aggregation service not running")
+        tree_id = await getattr(self.dissemination, "build_tree")()
+        query = TreeQuery(
+            id=get_random_id(),
+            tree_id=tree_id,
+            timeout=self._config.TIMEOUT + self._config.LEVEL_MARGIN,
+        )
+        self._partials[query.id] = self._get_local_partial(query.id)
+        partial = await self._convergecast(query)
+        tree_aggregate = TreeAggregate(
+            value=self._get_output_value(partial),
+            count=partial.count,
+            complete=partial.complete,
+        )
+        self._handlers_manager.call_handlers(tree_aggregate.value)
+        return tree_aggregate
+
+    def set_local_value(self, value: Any):
+        """
+        Set the local value aggregated from the next query on.
+
+        :param value: new local value.
+        :return:
+        """
+        if value is None and self._config.AGGREGATE_TYPE != AggregateType.COUNT:
+            raise ValueError("Missing local value")
+        self._local_value = value
+
+    def add_aggregate_handler(
+        self,
+        handler: Handler,
+        executor: HandlerExecutor = HandlerExecutor.EVENT_LOOP,
+        max_concurrency: int = 1,
+    ):
+        self._handlers_manager.add_handler(handler, executor, max_concurrency)
+
+    def remove_aggregate_handler(self, handler: Handler):
+        self._handlers_manager.remove_handler(handler)
+
+    async def _convergecast(self, query: TreeQuery, parent: Node = None) -> TreePartial:
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + query.timeout - self._config.LEVEL_MARGIN / 2
+        partial = self._partials[query.id]
+        self._query_children[query.id] = set()
+        self._reported_children[query.id] = set()
+        self._reports_events[query.id] = asyncio.Event()
+        try:
+            children = await asyncio.wait_for(
+                getattr(self.dissemination, "get_tree_children")(query.tree_id),
+                timeout=max(deadline - loop.time(), 0),
+            )
+            children = [child for child in children if child != parent]
+            child_query = TreeQuery(
+                id=query.id,
+                tree_id=query.tree_id,
+                timeout=query.timeout - self._config.LEVEL_MARGIN,
+            )
+            if children and child_query.timeout <= 0:
+                partial.complete = False  # too deep, the subtrees are left out
+                children = []
+            await asyncio.wait_for(
+                asyncio.gather(
+                    *(self._query_child(child, child_query) for child in children)
+                ),
+                timeout=max(deadline - loop.time(), 0),
+            )
+            self._check_reports(query.id)
+            await asyncio.wait_for(
+                self._reports_events[query.id].wait(),
+                timeout=max(deadline - loop.time(), 0),
+            )
+        except asyncio.TimeoutError:
+            partial.complete = False  # the slow subtrees are left out
+        finally:
+            # remembered until the query expires, for rejecting other parents
+            loop.call_later(query.timeout, self._partials.pop, query.id, None)
+            del self._query_children[query.id]
+            del self._reported_children[query.id]
+            del self._reports_events[query.id]
+        if parent:
+            try:
+                await self._protocol.report(parent, partial)
+            except ConnectionError:
+                pass
+        return partial
+
+    async def _query_child(self, child: Node, query: TreeQuery):
+        try:
+            if await self._protocol.query(child, query):
+                self._query_children[query.id].add(child)
+        except ConnectionError:
+            self._partials[query.id].complete = False
+
+    def _check_reports(self, query_id: str):
+        if self._query_children[query_id] <= self._reported_children[query_id]:
+            self._reports_events[query_id].set()
+
+    async def _handler_query(self, sender: Node, query: TreeQuery) -> bool:
+        if query.id in self._partials:
+            return False  # already reached through another parent
+        self._partials[query.id] = self._get_local_partial(query.id)
+        self._query_tasks = [task for task in self._query_tasks if not task.done()]
+        self._query_tasks.append(
+            asyncio.create_task(self._convergecast(query, parent=sender))
+        )
+        return True
+
+    async def _handler_report(self, sender: Node, partial: TreePartial):
+        if partial.query_id not in self._reports_events:
+            return  # reported too late
+        self._merge_partial(self._partials[partial.query_id], partial)
+        self._reported_children[partial.query_id].add(sender)
+        self._check_reports(partial.query_id)
+
+    def _get_local_partial(self, query_id: str) -> TreePartial:
+        value = self._local_value
+        if self._config.AGGREGATE_TYPE == AggregateType.COUNT:
+            value = 1
+        return TreePartial(
+            query_id=query_id, sum=value, count=1, min=value, max=value, complete=True
+        )
+
+    def _merge_partial(self, partial: TreePartial, other: TreePartial):
+        partial.sum += other.sum
+        partial.count += other.count
+        partial.min = min(partial.min, other.min)
+        partial.max = max(partial.max, other.max)
+        partial.complete = partial.complete and other.complete
+
+    def _get_output_value(self, partial: TreePartial) -> Any:
+        if self._config.AGGREGATE_TYPE == AggregateType.MEAN:
+            return partial.sum / partial.count
+        elif self._config.AGGREGATE_TYPE == AggregateType.MAX:
+            return partial.max
+        elif self._config.AGGREGATE_TYPE == AggregateType.MIN:
+            return partial.min
+        return partial.sum  # SUM, and COUNT (the sum of a 1 per node)
+
+    def _parse_aggregate(
+        self, aggregate_type: Union[str, AggregateType]
+    ) -> AggregateType:
+        if isinstance(aggregate_type, str):
+            if aggregate_type not in tree_aggregate_names:
+                raise KeyError("Invalid Aggregate type")
+            aggregate_type = tree_aggregate_names[aggregate_type]
+        if aggregate_type not in tree_aggregate_names.values():
+            raise ValueError("Aggregate type not supported by tree aggregation")
+        return aggregate_type
@@ -0,0 +1,78 @@
+import struct
+from statistics import mean
+from typing import Any, Callable, Dict, List, Sequence, Union
+
+from unsserv.common.aggregation.config import AggregateType
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional, plain lists are used without it
+    numpy = None
+
+Vector = Any  # numpy.ndarray, or a list of floats when NumPy is not installed
+
+VECTOR_FORMAT = "<{}d"  # little-endian float64, the same with or without NumPy
+
+_list_functions: Dict[AggregateType, Callable[[Sequence[float]], float]] = {
+    AggregateType.MEAN: mean,
+    AggregateType.MAX: max,
+    AggregateType.MIN: min,
+}
+
+
+def make_vector(values: Sequence[float]) -> Vector:
+    if numpy is not None:
+        return numpy.array(values, dtype=numpy.float64)
+    return [float(value) for value in values]
+
+
+def aggregate_vectors(aggregate_type: AggregateType, vectors: List[Vector]) -> Vector:
+    """Aggregate the vectors element-wise (MEAN, MAX or MIN)."""
+    if numpy is not None:
+        stacked_vectors = numpy.stack(vectors)
+        if aggregate_type == AggregateType.MEAN:
+            return stacked_vectors.mean(axis=0)
+        elif aggregate_type == AggregateType.MAX:
+            return stacked_vectors.max(axis=0)
+        elif aggregate_type == AggregateType.MIN:
+            return stacked_vectors.min(axis=0)
+        raise ValueError("Invalid Aggregate type")
+    aggregate_function = _list_functions[aggregate_type]
+    return [aggregate_function(values) for values in zip(*vectors)]
+
+
+def add_vectors(vector: Vector, other: Union[Vector, float]) -> Vector:
+    """Add two vectors element-wise, or a scalar to every element."""
+    if numpy is not None:
+        return vector + other
+    if isinstance(other, (int, float)):
+        return [value + other for value in vector]
+    return [value + other_value for value, other_value in zip(vector, other)]
+
+
+def scale_vector(vector: Vector, factor: float) -> Vector:
+    if numpy is not None:
+        return vector * factor
+    return [value * factor for value in vector]
+
+
+def get_vectors_distance(vector: Vector, other: Vector) -> float:
+    """Get the largest element-wise difference between two vectors."""
+    if numpy is not None:
+        return float(numpy.abs(vector - other).max(initial=0))
+    return max(
+        (abs(value - other_value) for value, other_value in zip(vector, other)),
+        default=0,
+    )
+
+
+def encode_vector(vector: Vector) -> bytes:
+    if numpy is not None:
+        return vector.astype("<f8").tobytes()
+    return struct.pack(VECTOR_FORMAT.format(len(vector)), *vector)
+
+
+def decode_vector(raw_vector: bytes) -> Vector:
+    if numpy is not None:
+        return numpy.frombuffer(raw_vector, dtype="<f8").astype(numpy.float64)
+    return list(struct.unpack(VECTOR_FORMAT.format(len(raw_vector) // 8), raw_vector))
@@ -0,0 +1,71 @@
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from unsserv.common.aggregation.anti_entropy import AntiEntropy
+from unsserv.common.aggregation.config import AggregateType
+from unsserv.common.aggregation.vector import (
+    Vector,
+    add_vectors,
+    aggregate_vectors,
+    decode_vector,
+    encode_vector,
+    get_vectors_distance,
+    make_vector,
+    scale_vector,
+)
+
+MetricsValue = Union[Dict[str, float], Sequence[float]]
+
+
+class VectorAntiEntropy(AntiEntropy):
+    """
+    Aggregation Anti-Entropy service for a vector of metrics.
+
+    The 'aggregate_value' is a dict of metrics (or a sequence of them)
+    with the same schema in every node, aggregated element-wise as a
+    single payload per round. Vectors are NumPy arrays when NumPy is
+    installed and are serialized as packed float64 bytes.
+    """
+
+    _schema: Optional[List[str]] = None  # metric names, if given as a dict
+
+    def _validate_aggregate(self, aggregate_type: AggregateType):
+        super()._validate_aggregate(aggregate_type)
+        if aggregate_type == AggregateType.COUNT:
+            raise ValueError("COUNT can not be aggregated as a vector")
+
+    def _parse_value(self, metrics: MetricsValue) -> Vector:
+        if isinstance(metrics, dict):
+            self._schema = sorted(metrics.keys())
+            return make_vector([metrics[metric] for metric in self._schema])
+        self._schema = None
+        return make_vector(metrics)
+
+    def _aggregate_values(self, values: List[Any]) -> Any:
+        return aggregate_vectors(self._config.AGGREGATE_TYPE, values)
+
+    def _add_values(self, value: Any, other_value: Any) -> Any:
+        return add_vectors(value, other_value)
+
+    def _scale_value(self, value: Any, factor: float) -> Any:
+        return scale_vector(value, factor)
+
+    def _get_values_distance(self, value: Any, other_value: Any) -> float:
+        return get_vectors_distance(value, other_value)
+
+    def _are_same_values(self, value: Any, other_value: Any) -> bool:
+        if value is None or other_value is None:
+            return value is other_value
+        return get_vectors_distance(value, other_value) == 0
+
+    def _encode_value(self, value: Any) -> Any:
+        return None if value is None else encode_vector(value)
+
+    def _decode_value(self, raw_value: Any) -> Any:
+        return None if raw_value is None else decode_vector(raw_value)
+
+    def _get_output_value(self, value: Any) -> Any:
+        if value is None:
+            return None
+        if self._schema is None:
+            return [float(element) for element in value]
+        return {metric: float(element) for metric, element in zip(self._schema, value)}
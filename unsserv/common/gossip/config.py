@@ -23,6 +23,22 @@ class GossipConfig(IConfig):
     VIEW_PROPAGATION = PropagationPolicy.PUSHPULL
     PEER_SELECTION = SelectionPolicy.RAND
     RPC_TIMEOUT = 1
+    FANOUT = 1  # peers contacted per round
+    ROUND_TIMEOUT = 1  # seconds
+    ADAPTIVE_FREQUENCY = False
+    MIN_GOSSIPING_FREQUENCY = 0.2
+    MAX_GOSSIPING_FREQUENCY = 2
+    FREQUENCY_BACKOFF = 1.5
+    CHURN_THRESHOLD = 0.1  # fraction of the view changed per round
+    DELTA_EXCHANGE = False
+    SHUFFLE_LENGTH = None  # view entries sent per exchange, None for whole view
+    HEALER = 0  # oldest entries discarded on view selection (H)
+    SWAPPER = 0  # entries sent to the peer discarded on view selection (S)
+    DELTA_BUFFER_LIMIT = 100  # peers whose exchanged views/payloads are remembered
+    CHANGED_ONLY_PAYLOADS = False
+    MESSAGE_BUDGET = None  # bytes per message (e.g. 8192), None for unbounded
+    DELIVERY_QUEUE_SIZE = 10  # payloads pending per subscriber
+    DELIVERY_BLOCK_TIMEOUT = 0.25  # seconds a reply waits for BLOCK subscribers
 
     def load_from_dict(self, config_dict: Dict[str, Any]):
         self.LOCAL_VIEW_SIZE = config_dict.get(
@@ -41,3 +57,45 @@ class GossipConfig(IConfig):
             "peer_selection", GossipConfig.PEER_SELECTION
         )
         self.RPC_TIMEOUT = config_dict.get("rpc_timeout", GossipConfig.RPC_TIMEOUT)
+        self.FANOUT = config_dict.get("fanout", GossipConfig.FANOUT)
+        self.ROUND_TIMEOUT = config_dict.get(
+            "round_timeout", GossipConfig.ROUND_TIMEOUT
+        )
+        self.ADAPTIVE_FREQUENCY = config_dict.get(
+            "adaptive_frequency", GossipConfig.ADAPTIVE_FREQUENCY
+        )
+        self.MIN_GOSSIPING_FREQUENCY = config_dict.get(
+            "min_gossiping_frequency", GossipConfig.MIN_GOSSIPING_FREQUENCY
+        )
+        self.MAX_GOSSIPING_FREQUENCY = config_dict.get(
+            "max_gossiping_frequency", GossipConfig.MAX_GOSSIPING_FREQUENCY
+        )
+        self.FREQUENCY_BACKOFF = config_dict.get(
+            "frequency_backoff", GossipConfig.FREQUENCY_BACKOFF
+        )
+        self.CHURN_THRESHOLD = config_dict.get(
+            "churn_threshold", GossipConfig.CHURN_THRESHOLD
+        )
+        self.DELTA_EXCHANGE = config_dict.get(
+            "delta_exchange", GossipConfig.DELTA_EXCHANGE
+        )
+        self.DELTA_BUFFER_LIMIT = config_dict.get(
+            "delta_buffer_limit", GossipConfig.DELTA_BUFFER_LIMIT
+        )
+        self.SHUFFLE_LENGTH = config_dict.get(
+            "shuffle_length", GossipConfig.SHUFFLE_LENGTH
+        )
+        self.HEALER = config_dict.get("healer", GossipConfig.HEALER)
+        self.SWAPPER = config_dict.get("swapper", GossipConfig.SWAPPER)
+        self.CHANGED_ONLY_PAYLOADS = config_dict.get(
+            "changed_only_payloads", GossipConfig.CHANGED_ONLY_PAYLOADS
+        )
+        self.MESSAGE_BUDGET = config_dict.get(
+            "message_budget", GossipConfig.MESSAGE_BUDGET
+        )
+        self.DELIVERY_QUEUE_SIZE = config_dict.get(
+            "delivery_queue_size", GossipConfig.DELIVERY_QUEUE_SIZE
+        )
+        self.DELIVERY_BLOCK_TIMEOUT = config_dict.get(
+            "delivery_block_timeout", GossipConfig.DELIVERY_BLOCK_TIMEOUT
+        )
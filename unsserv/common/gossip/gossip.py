@@ -1,9 +1,11 @@
 import asyncio
-import math
+import heapq
+import logging
 import random
 from abc import ABC, abstractmethod
-from collections import Counter
+from collections import Counter, OrderedDict
 from contextlib import contextmanager
+from operator import itemgetter
 from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from unsserv.common.gossip.config import (
@@ -12,12 +14,34 @@ from unsserv.common.gossip.config import (
     PropagationPolicy,
 )
 from unsserv.common.gossip.protocol import GossipProtocol
-from unsserv.common.gossip.structs import PushData
+from unsserv.common.gossip.structs import DeliveryStats, PushData
 from unsserv.common.gossip.typing import ExternalViewSource, CustomSelectionRanking
 from unsserv.common.gossip.typing import Payload, View
-from unsserv.common.structs import Node
+from unsserv.common.rpc.rpc import encode_data, get_encoded_size
+from unsserv.common.scheduler.scheduler import Scheduler, SchedulerRegister
+from unsserv.common.structs import Node, OverflowPolicy
 from unsserv.common.typing import Handler
-from unsserv.common.utils import stop_task, HandlersManager
+from unsserv.common.utils import HandlersManager, stop_task
+
+logger = logging.getLogger(__name__)
+
+hops_of = itemgetter(1)  # sorting key of view items
+# partial selection beats sorting when fewer than 1/8 of the view is selected
+PARTIAL_SELECTION_RATIO = 8
+
+
+def _select_by_hops(view: View, amount: int, farthest: bool = False) -> List:
+    """
+    Items of the 'amount' closest (or farthest) nodes of the view.
+
+    Found by partial selection when only a few are selected and by
+    sorting otherwise.
+    """
+    if amount * PARTIAL_SELECTION_RATIO < len(view):
+        select = heapq.nlargest if farthest else heapq.nsmallest
+        return select(amount, view.items(), key=hops_of)
+    return sorted(view.items(), key=hops_of, reverse=farthest)[:amount]
+
 
 policy_names: Dict[str, Union[SelectionPolicy, PropagationPolicy]] = {
     "rand": SelectionPolicy.RAND,
@@ -38,6 +62,25 @@ class IGossipSubscriber(ABC):
     async def get_payload(self) -> Tuple[Any, Any]:
         pass
 
+    def get_payload_version(self) -> Any:
+        """
+        Version of the payload, changed whenever the payload does.
+
+        With changed-only payloads, a peer is only sent the versions it
+        has not got yet. None means the payload is sent on every
+        exchange.
+        """
+        return None
+
+    def get_payload_priority(self) -> float:
+        """
+        Priority of the payload when not all of them fit in a message.
+
+        Payloads left out of a message gain one unit of priority per
+        message, so all of them keep propagating.
+        """
+        return 0
+
 
 class Gossip:
     my_node: Node
@@ -45,7 +88,26 @@ class Gossip:
     running: bool = False
     _config: GossipConfig
     _protocol: GossipProtocol
+    _scheduler: Scheduler
     _handlers_manager: HandlersManager
+    _last_neighbours: Set[Node]
+    _gossiping_frequency: float
+    _churn: float
+    _last_subscribers_data: Payload
+    _is_payload_changed: bool
+    _sent_views: "OrderedDict[Node, Tuple[int, View]]"
+    _received_views: "OrderedDict[Node, Tuple[int, View]]"
+    _swappable_nodes: Dict[Node, Set[Node]]
+    _payload_versions: Dict[Any, Any]
+    _sent_payload_versions: "OrderedDict[Node, Dict[Any, Any]]"
+    _payload_priorities: Dict[Any, float]
+    _payload_staleness: "OrderedDict[Node, Counter]"
+    _push_view_cache: Optional[Tuple[View, View, Optional[bytes]]]
+    _subscribers_versions: Optional[List[Tuple[IGossipSubscriber, Any]]]
+    _delivery_queues: Dict[IGossipSubscriber, asyncio.Queue]
+    _delivery_tasks: Dict[IGossipSubscriber, asyncio.Task]
+    _delivery_stats: Dict[IGossipSubscriber, DeliveryStats]
+    _delivery_policies: Dict[IGossipSubscriber, OverflowPolicy]
 
     def __init__(
         self,
@@ -55,13 +117,27 @@ class Gossip:
         local_view_handler: Handler = None,
         external_nodes_source: ExternalViewSource = None,
         custom_selection_ranking: CustomSelectionRanking = None,
-        **configuration
+        **configuration,
     ):
         self.my_node = my_node
         self.service_id = service_id
         self._config = GossipConfig()
         self._config.load_from_dict(configuration)
         self._protocol = GossipProtocol(self.my_node)
+        self._scheduler = SchedulerRegister.get_scheduler(self.my_node)
+        self._gossiping_frequency = self._config.GOSSIPING_FREQUENCY
+        self._churn = 0
+        self._last_subscribers_data = {}
+        self._is_payload_changed = False
+        self._sent_views = OrderedDict()
+        self._received_views = OrderedDict()
+        self._swappable_nodes = {}
+        self._payload_versions = {}
+        self._sent_payload_versions = OrderedDict()
+        self._payload_priorities = {}
+        self._payload_staleness = OrderedDict()
+        self._push_view_cache = None
+        self._subscribers_versions = None
 
         self.local_view = Counter(
             random.sample(
@@ -76,7 +152,11 @@ class Gossip:
         self.custom_selection_ranking = custom_selection_ranking
 
         self.subscribers: List[IGossipSubscriber] = []
-        self._handlers_manager = HandlersManager()
+        self._delivery_queues = {}
+        self._delivery_tasks = {}
+        self._delivery_stats = {}
+        self._delivery_policies = {}
+        self._handlers_manager = HandlersManager(coalesce=True)
         if local_view_handler:
             self._handlers_manager.add_handler(local_view_handler)
 
@@ -84,66 +164,438 @@ class Gossip:
         if self.running:
             raise RuntimeError("Already running Gossip")
         await self._initialize_protocol()
-        self._gossip_task = asyncio.create_task(self._gossip_loop())
+        for subscriber in self.subscribers:
+            self._start_delivery(subscriber)
+        self._last_neighbours = set(self.local_view.keys())
+        await self._scheduler.add_job(
+            f"gossip-{self.service_id}",
+            self._gossip_round,
+            self._config.GOSSIPING_FREQUENCY,
+        )
         self.running = True
 
     async def stop(self):
         if not self.running:
             return
         await self._protocol.stop()
-        if self._gossip_task:
-            await stop_task(self._gossip_task)
+        await self._scheduler.remove_job(f"gossip-{self.service_id}")
+        for delivery_task in self._delivery_tasks.values():
+            await stop_task(delivery_task)
+        self._delivery_tasks.clear()
         self.running = False
 
-    def subscribe(self, subscriber: IGossipSubscriber):
+    def subscribe(
+        self,
+        subscriber: IGossipSubscriber,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ):
+        """
+        Subscribe to the payloads received from peers.
+
+        Payloads are queued for the subscriber, up to DELIVERY_QUEUE_SIZE.
+        When its queue is full, DROP_OLDEST and DROP_NEWEST discard a
+        payload, whereas BLOCK, meant for subscribers that count on
+        every payload, holds the reply to the sender until the subscriber
+        makes room, up to DELIVERY_BLOCK_TIMEOUT (and never more than half
+        the RPC_TIMEOUT, so the sender does not take this node for dead).
+
+        :param subscriber: the subscriber.
+        :param policy: what to do when the subscriber's queue is full.
+        :return:
+        """
         self.subscribers.append(subscriber)
+        self._delivery_queues[subscriber] = asyncio.Queue(
+            self._config.DELIVERY_QUEUE_SIZE
+        )
+        self._delivery_stats[subscriber] = DeliveryStats()
+        self._delivery_policies[subscriber] = policy
+        if self.running:
+            self._start_delivery(subscriber)
 
-    def unsubscribe(self, subscriber: IGossipSubscriber):
+    async def unsubscribe(self, subscriber: IGossipSubscriber):
         self.subscribers.remove(subscriber)
-
-    async def _gossip_loop(self):
-        while True:
-            old_neighbours = set(self.local_view.keys())
-            await asyncio.sleep(self._config.GOSSIPING_FREQUENCY)
-            await self._exchange_with_peer()
-            self._call_handler_if_view_changed(old_neighbours)
-
-    async def _exchange_with_peer(self):
-        peer = self._select_peer(self.local_view)
-        if not peer:  # empty Local view
+        delivery_task = self._delivery_tasks.pop(subscriber, None)
+        if delivery_task:
+            await stop_task(delivery_task)
+        self._delivery_queues.pop(subscriber)
+        self._delivery_stats.pop(subscriber)
+        self._delivery_policies.pop(subscriber)
+
+    def get_delivery_stats(self) -> Dict[IGossipSubscriber, DeliveryStats]:
+        return dict(self._delivery_stats)
+
+    async def _gossip_round(self):
+        await self._exchange_with_peers()
+        if self._config.ADAPTIVE_FREQUENCY:
+            self._adapt_gossiping_frequency(self._last_neighbours)
+        self._call_handler_if_view_changed(self._last_neighbours)
+        self._last_neighbours = set(self.local_view.keys())
+
+    def _adapt_gossiping_frequency(self, old_neighbours: Set[Node]):
+        """
+        Adapt the gossiping interval to the view churn.
+
+        The interval is shortened to the minimum when the view churns or
+        subscribers' payloads change, and backed off towards the maximum
+        while both stay stable.
+        """
+        current_neighbours = set(self.local_view.keys())
+        view_change = len(old_neighbours ^ current_neighbours) / max(
+            len(current_neighbours), 1
+        )
+        self._churn = (self._churn + view_change) / 2  # smooth out single rounds
+        if self._churn > self._config.CHURN_THRESHOLD or self._is_payload_changed:
+            frequency = self._config.MIN_GOSSIPING_FREQUENCY
+        else:
+            frequency = min(
+                self._gossiping_frequency * self._config.FREQUENCY_BACKOFF,
+                self._config.MAX_GOSSIPING_FREQUENCY,
+            )
+        self._is_payload_changed = False
+        if frequency != self._gossiping_frequency:
+            self._gossiping_frequency = frequency
+            self._scheduler.set_period(f"gossip-{self.service_id}", frequency)
+
+    async def _exchange_with_peers(self):
+        peers = self._select_peers(self.local_view, self._config.FANOUT)
+        if not peers:  # empty Local view
             return
         subscribers_data = await self._get_data_from_subscribers()
+        # a pull served during the exchanges may refresh the versions
+        payload_versions = dict(self._payload_versions)
+        exchanges = [
+            asyncio.create_task(
+                self._exchange_with_peer(
+                    peer,
+                    self._fit_in_budget(
+                        peer,
+                        self._make_push_data(
+                            peer,
+                            self._get_push_view(peer),
+                            self._get_unsent_payload(peer, subscribers_data),
+                        ),
+                    ),
+                    payload_versions,
+                )
+            )
+            for peer in peers
+        ]
+        # responses are merged as they arrive, the slow peers are given up
+        # on at the deadline (or when the round is cancelled on stop)
+        try:
+            await asyncio.wait(exchanges, timeout=self._config.ROUND_TIMEOUT)
+        finally:
+            for exchange in exchanges:
+                exchange.cancel()
+            results = await asyncio.gather(*exchanges, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):  # not failing the other exchanges
+                logger.error("Gossip exchange failed", exc_info=result)
+
+    async def _exchange_with_peer(
+        self, peer: Node, push_data: PushData, payload_versions: Dict[Any, Any]
+    ):
         if self._config.VIEW_PROPAGATION is PropagationPolicy.PUSH:
-            push_view = self._merge_views(Counter({self.my_node: 0}), self.local_view)
-            push_data = PushData(view=push_view, payload=subscribers_data)
             with self._remove_on_connection_error(peer):
-                await self._protocol.push(peer, push_data)
+                known_version = await self._protocol.push(peer, push_data)
+                self._set_payload_as_sent(peer, push_data.payload, payload_versions)
+                self._check_acknowledged_version(peer, push_data, known_version)
         elif self._config.VIEW_PROPAGATION is PropagationPolicy.PULL:
             with self._remove_on_connection_error(peer):
-                pull_response = await self._protocol.pull(peer, subscribers_data)
+                pull_response = await self._protocol.pull(
+                    peer, push_data.payload, push_data.known_version
+                )
+                self._set_payload_as_sent(peer, push_data.payload, payload_versions)
                 await self._handler_push(peer, pull_response)
         elif self._config.VIEW_PROPAGATION is PropagationPolicy.PUSHPULL:
-            push_view = self._merge_views(Counter({self.my_node: 0}), self.local_view)
-            push_data = PushData(view=push_view, payload=subscribers_data)
             with self._remove_on_connection_error(peer):
                 pull_response = await self._protocol.pushpull(peer, push_data)
+                self._set_payload_as_sent(peer, push_data.payload, payload_versions)
+                self._check_acknowledged_version(
+                    peer, push_data, pull_response.known_version
+                )
                 await self._handler_push(peer, pull_response)
 
+    def _make_push_data(
+        self,
+        peer: Node,
+        view: View,
+        payload: Payload,
+        peer_known_version: Optional[int] = None,
+    ) -> PushData:
+        """
+        Build the data sent to a peer.
+
+        With delta exchanges, the view only carries the entries that
+        changed since the last view sent to that peer (plus the removed
+        nodes), as long as the peer knows that last view.
+
+        :param peer_known_version: version of our view the peer
+            acknowledged, if None it is assumed the peer got the last
+            view sent to it.
+        """
+        if not self._config.DELTA_EXCHANGE:
+            return PushData(
+                view=view, payload=payload, encoded_view=self._get_encoded_view(view)
+            )
+        received = self._received_views.get(peer)
+        known_version = received[0] if received else -1
+        last_version, last_view = self._sent_views.pop(peer, (-1, None))
+        push_data = PushData(
+            view=view,
+            payload=payload,
+            version=last_version + 1,
+            known_version=known_version,
+        )
+        if peer_known_version is None:
+            peer_known_version = last_version
+        if last_view is not None and peer_known_version == last_version:
+            push_data.view = Counter(
+                {
+                    node: hops
+                    for node, hops in view.items()
+                    if last_view.get(node) != hops
+                }
+            )
+            push_data.removed = [node for node in last_view if node not in view]
+            push_data.base_version = last_version
+        else:
+            push_data.encoded_view = self._get_encoded_view(view)
+        self._sent_views[peer] = (push_data.version, view)
+        self._limit_delta_buffer(self._sent_views)
+        return push_data
+
+    def _resolve_push_view(self, sender: Node, push_data: PushData) -> Optional[View]:
+        """
+        Rebuild the full view sent by a peer.
+
+        None is returned if it is a delta against a view this node does
+        not know (then the sender falls back to a full view on the next
+        exchange).
+        """
+        if not self._config.DELTA_EXCHANGE:
+            return push_data.view
+        if push_data.base_version == -1:
+            view = push_data.view
+        else:
+            base_version, base_view = self._received_views.pop(sender, (-1, None))
+            if base_view is None or base_version != push_data.base_version:
+                return None
+            view = base_view.copy()
+            for node in push_data.removed:
+                view.pop(node, None)
+            for node, hops in push_data.view.items():
+                view[node] = hops
+        self._received_views.pop(sender, None)
+        self._received_views[sender] = (push_data.version, view)
+        self._limit_delta_buffer(self._received_views)
+        return view
+
+    def _check_acknowledged_version(
+        self, peer: Node, push_data: PushData, known_version: int
+    ):
+        if not self._config.DELTA_EXCHANGE or known_version == push_data.version:
+            return
+        self._sent_views.pop(peer, None)  # peer lost track, next view is full
+
+    def _get_unsent_payload(self, peer: Node, payload: Payload) -> Payload:
+        """Subscribers' payloads whose version was not sent to the peer."""
+        if not self._config.CHANGED_ONLY_PAYLOADS:
+            return payload
+        sent_versions = self._sent_payload_versions.get(peer, {})
+        unsent_payload = {}
+        for key, value in payload.items():
+            version = self._payload_versions.get(key)
+            if version is None or sent_versions.get(key) != version:
+                unsent_payload[key] = value
+        return unsent_payload
+
+    def _set_payload_as_sent(
+        self, peer: Node, payload: Payload, payload_versions: Dict[Any, Any]
+    ):
+        """
+        Record the versions of the payloads sent to the peer.
+
+        :param payload_versions: versions of the payloads when the
+            message was built, not when the peer replied.
+        """
+        if not self._config.CHANGED_ONLY_PAYLOADS:
+            return
+        sent_versions = self._sent_payload_versions.pop(peer, {})
+        for key in payload:
+            sent_versions[key] = payload_versions.get(key)
+        self._sent_payload_versions[peer] = sent_versions
+        self._limit_delta_buffer(self._sent_payload_versions)
+
+    def _fit_in_budget(self, peer: Node, push_data: PushData) -> PushData:
+        """
+        Trim the push data so its message does not exceed MESSAGE_BUDGET.
+
+        Subscribers' payloads are included by priority plus staleness
+        (messages to the peer they have been left out of) while they
+        fit. If the view alone exceeds the budget, its farthest entries
+        are dropped.
+        """
+        budget = self._config.MESSAGE_BUDGET
+        if budget is None:
+            return push_data
+        staleness = self._payload_staleness.pop(peer, Counter())
+        size = self._protocol.get_push_data_size(push_data)
+        if size <= budget:
+            for key in push_data.payload:
+                staleness.pop(key, None)
+        else:
+            self._fit_payload_in_budget(peer, push_data, staleness, budget)
+        if staleness:
+            self._payload_staleness[peer] = staleness
+            self._limit_delta_buffer(self._payload_staleness)
+        return push_data
+
+    def _fit_payload_in_budget(
+        self, peer: Node, push_data: PushData, staleness: Counter, budget: int
+    ):
+        payload = push_data.payload
+        push_data.payload = {}
+        size = self._protocol.get_push_data_size(push_data)
+        if budget < size:
+            size = self._trim_view(peer, push_data, size - budget)
+        size += 5  # margin for the payload map header
+        ranked_keys = sorted(
+            payload,
+            key=lambda k: self._payload_priorities.get(k, 0) + staleness[k],
+            reverse=True,
+        )
+        for key in ranked_keys:
+            item_size = get_encoded_size({key: payload[key]}) - 1
+            if size + item_size <= budget:
+                push_data.payload[key] = payload[key]
+                size += item_size
+                staleness.pop(key, None)
+            else:
+                staleness[key] += 1
+
+    def _trim_view(self, peer: Node, push_data: PushData, excess: int) -> int:
+        """Drop the farthest view entries until 'excess' bytes are freed."""
+        push_data.view = push_data.view.copy()  # it may be the cached view
+        push_data.encoded_view = None
+        for node, hops in _select_by_hops(
+            push_data.view, len(push_data.view), farthest=True
+        ):
+            if excess <= 0:
+                break
+            if node == self.my_node:
+                continue
+            push_data.view.pop(node)
+            excess -= get_encoded_size({node: hops}) - 1
+        # the peer no longer gets the view tracked for delta exchanges
+        self._sent_views.pop(peer, None)
+        return self._protocol.get_push_data_size(push_data)
+
+    def _limit_delta_buffer(self, peers_buffer: "OrderedDict[Node, Any]"):
+        while self._config.DELTA_BUFFER_LIMIT < len(peers_buffer):
+            peers_buffer.popitem(last=False)
+
     def _select_peer(self, view: View) -> Optional[Node]:
+        peers = self._select_peers(view, 1)
+        return peers[0] if peers else None
+
+    def _select_peers(self, view: View, amount: int) -> List[Node]:
+        amount = min(amount, len(view))
         if self.custom_selection_ranking:
             ordered_nodes = self.custom_selection_ranking(view)
-        else:
-            ordered_nodes = list(map(lambda n: n[0], reversed(view.most_common())))
-        if self._config.PEER_SELECTION is SelectionPolicy.RAND:
-            return random.choice(ordered_nodes) if view else None
+            if self._config.PEER_SELECTION is SelectionPolicy.RAND:
+                return random.sample(ordered_nodes, amount)
+            elif self._config.PEER_SELECTION is SelectionPolicy.HEAD:
+                return ordered_nodes[:amount]
+            elif self._config.PEER_SELECTION is SelectionPolicy.TAIL:
+                return ordered_nodes[len(ordered_nodes) - amount :]
+        elif self._config.PEER_SELECTION is SelectionPolicy.RAND:
+            return random.sample(list(view), amount)
         elif self._config.PEER_SELECTION is SelectionPolicy.HEAD:
-            return ordered_nodes[0] if view else None
+            return [n for n, _ in _select_by_hops(view, amount)]
         elif self._config.PEER_SELECTION is SelectionPolicy.TAIL:
-            return ordered_nodes[-1] if view else None
+            return [n for n, _ in _select_by_hops(view, amount, farthest=True)][::-1]
         raise AttributeError("Invalid Peer Selection policy")
 
+    def _get_push_view(self, peer: Node) -> View:
+        """
+        View sent to a peer.
+
+        My descriptor plus the whole local view or, if a shuffle length
+        is set, a random subset of SHUFFLE_LENGTH - 1 entries that leaves
+        the HEALER oldest ones out.
+        """
+        my_descriptor = Counter({self.my_node: 0})
+        if self._config.SHUFFLE_LENGTH is None:
+            # the local view is replaced on every change, never modified
+            if not self._push_view_cache or (
+                self._push_view_cache[0] is not self.local_view
+            ):
+                push_view = self._merge_views(my_descriptor, self.local_view)
+                self._push_view_cache = (self.local_view, push_view, None)
+            return self._push_view_cache[1]
+        candidates = list(self.local_view.keys())
+        random.shuffle(candidates)
+        oldest = set(
+            heapq.nlargest(self._config.HEALER, candidates, key=self.local_view.get)
+        )
+        candidates = [n for n in candidates if n not in oldest] + [
+            n for n in candidates if n in oldest
+        ]
+        shuffled = candidates[: max(self._config.SHUFFLE_LENGTH - 1, 0)]
+        if (
+            self._config.SWAPPER
+            and self._config.VIEW_PROPAGATION is PropagationPolicy.PUSHPULL
+        ):
+            self._swappable_nodes[peer] = set(shuffled)
+        return self._merge_views(
+            my_descriptor, Counter({n: self.local_view[n] for n in shuffled})
+        )
+
+    def _get_encoded_view(self, view: View) -> Optional[bytes]:
+        """
+        Serialized push view, if the view is the (cached) push view.
+
+        It is serialized once per local view and reused by all the
+        messages sending it, either requests or responses.
+        """
+        if not self._push_view_cache or view is not self._push_view_cache[1]:
+            return None
+        local_view, push_view, encoded_view = self._push_view_cache
+        if encoded_view is None:
+            encoded_view = encode_data(push_view)
+            self._push_view_cache = (local_view, push_view, encoded_view)
+        return encoded_view
+
+    def _select_shuffled_view(self, view: View, swappable_nodes: Set[Node]) -> View:
+        """
+        Healer/swapper view selection.
+
+        Drop up to HEALER oldest entries, then up to SWAPPER of the
+        entries sent to the peer, and leave the rest of the excess to
+        the view selection policy.
+        """
+        view.pop(self.my_node, None)
+        excess = max(len(view) - self._config.LOCAL_VIEW_SIZE, 0)
+        for node in heapq.nlargest(
+            min(self._config.HEALER, excess), view, key=view.get
+        ):
+            view.pop(node)
+        excess = max(len(view) - self._config.LOCAL_VIEW_SIZE, 0)
+        swapped_nodes = [n for n in swappable_nodes if n in view]
+        for node in swapped_nodes[: min(self._config.SWAPPER, excess)]:
+            view.pop(node)
+        return self._select_view(view)
+
     def _select_view(self, view: View) -> View:
-        # todo: document what happens here
+        """
+        Keep the LOCAL_VIEW_SIZE nodes chosen by the view selection policy.
+
+        HEAD keeps the closest ones (lowest hop count), TAIL the
+        farthest and RAND a random subset. Without a custom ranking, the
+        removed nodes are found by partial selection instead of sorting
+        the whole view.
+        """
         if self.my_node in view:
             view.pop(self.my_node)
         remove_amount = max(len(view) - self._config.LOCAL_VIEW_SIZE, 0)
@@ -151,47 +603,125 @@ class Gossip:
             return view
         if self.custom_selection_ranking:
             ordered_nodes = self.custom_selection_ranking(view)
-        else:
-            ordered_nodes = list(map(lambda n: n[0], reversed(view.most_common())))
-
-        new_view = view.copy()
-        if self._config.VIEW_SELECTION is SelectionPolicy.RAND:
-            for node in random.sample(ordered_nodes, remove_amount):
-                new_view.pop(node)
+            if self._config.VIEW_SELECTION is SelectionPolicy.RAND:
+                removed_nodes = random.sample(ordered_nodes, remove_amount)
+            elif self._config.VIEW_SELECTION is SelectionPolicy.HEAD:
+                removed_nodes = ordered_nodes[-remove_amount:]
+            elif self._config.VIEW_SELECTION is SelectionPolicy.TAIL:
+                removed_nodes = ordered_nodes[:remove_amount]
+            else:
+                raise AttributeError("Invalid View Selection policy")
+        elif self._config.VIEW_SELECTION is SelectionPolicy.RAND:
+            removed_nodes = random.sample(list(view), remove_amount)
         elif self._config.VIEW_SELECTION is SelectionPolicy.HEAD:
-            for node in ordered_nodes[-remove_amount:]:
-                new_view.pop(node)
+            removed_items = _select_by_hops(view, remove_amount, farthest=True)
+            removed_nodes = [node for node, _ in removed_items]
         elif self._config.VIEW_SELECTION is SelectionPolicy.TAIL:
-            for node in ordered_nodes[:remove_amount]:
-                new_view.pop(node)
+            removed_items = _select_by_hops(view, remove_amount)
+            removed_nodes = [node for node, _ in removed_items]
         else:
             raise AttributeError("Invalid View Selection policy")
+
+        new_view = view.copy()
+        for node in removed_nodes:
+            new_view.pop(node)
         return new_view
 
     def _increase_hop_count(self, view: View) -> View:
-        return view + Counter(view.keys())
+        return Counter({node: hops + 1 for node, hops in view.items()})
 
     def _merge_views(self, view1: View, view2: View) -> View:
-        all_nodes = set(list(view1.keys()) + list(set(view2.keys())))
-        merged_view: Counter = Counter()
-        for node in all_nodes:
-            merged_view[node] = (
-                view1[node]
-                if view1.get(node, math.inf) < view2.get(node, math.inf)
-                else view2[node]
-            )
+        """Union of both views, keeping the lowest hop count of every node."""
+        merged_view = Counter(view2)
+        get_hops = merged_view.get
+        for node, hops in view1.items():
+            merged_hops = get_hops(node)
+            if merged_hops is None or hops < merged_hops:
+                merged_view[node] = hops
         return merged_view
 
     async def _get_data_from_subscribers(self):
+        subscribers_versions = [
+            (subscriber, subscriber.get_payload_version())
+            for subscriber in self.subscribers
+        ]
+        if subscribers_versions == self._subscribers_versions:
+            # no payload changed since, a copy keeps the cache from being altered
+            return dict(self._last_subscribers_data)
+        if all(version is not None for _, version in subscribers_versions):
+            self._subscribers_versions = subscribers_versions
+        else:
+            self._subscribers_versions = None
         data: Dict = {}
         for subscriber in self.subscribers:
             key, value = await subscriber.get_payload()
             data[key] = value
-        return data
+            self._payload_versions[key] = subscriber.get_payload_version()
+            self._payload_priorities[key] = subscriber.get_payload_priority()
+        if data != self._last_subscribers_data:
+            self._last_subscribers_data = data
+            self._is_payload_changed = True
+        return dict(data)
 
     async def _deliver_message_to_subscribers(self, gossip_payload: Payload):
-        for subscriber in self.subscribers:
-            await subscriber.receive_payload(gossip_payload)
+        """
+        Queue the payload for every subscriber, without waiting for them.
+
+        Each subscriber consumes its own bounded queue, so slow ones
+        neither delay the gossip responses nor the other subscribers,
+        unless they subscribed with the BLOCK overflow policy.
+        """
+        received_at = asyncio.get_event_loop().time()
+        # shared by every BLOCK subscriber, the sender waits for the reply
+        block_deadline = received_at + min(
+            self._config.DELIVERY_BLOCK_TIMEOUT, self._config.RPC_TIMEOUT / 2
+        )
+        for subscriber in list(self.subscribers):
+            if subscriber not in self._delivery_queues:
+                continue  # unsubscribed while blocked on another subscriber
+            delivery_queue = self._delivery_queues[subscriber]
+            stats = self._delivery_stats[subscriber]
+            policy = self._delivery_policies[subscriber]
+            if not delivery_queue.full():
+                delivery_queue.put_nowait((received_at, gossip_payload))
+            elif policy == OverflowPolicy.BLOCK:
+                try:
+                    await asyncio.wait_for(
+                        delivery_queue.put((received_at, gossip_payload)),
+                        timeout=max(
+                            block_deadline - asyncio.get_event_loop().time(), 0
+                        ),
+                    )
+                except asyncio.TimeoutError:
+                    stats.dropped += 1  # the reply cannot wait any longer
+            else:
+                stats.dropped += 1
+                if policy == OverflowPolicy.DROP_OLDEST:
+                    delivery_queue.get_nowait()
+                    delivery_queue.put_nowait((received_at, gossip_payload))
+
+    def _start_delivery(self, subscriber: IGossipSubscriber):
+        self._delivery_tasks[subscriber] = asyncio.create_task(
+            self._deliver_to_subscriber(subscriber)
+        )
+
+    async def _deliver_to_subscriber(self, subscriber: IGossipSubscriber):
+        delivery_queue = self._delivery_queues[subscriber]
+        stats = self._delivery_stats[subscriber]
+        loop = asyncio.get_event_loop()
+        while True:
+            received_at, gossip_payload = await delivery_queue.get()
+            try:
+                await subscriber.receive_payload(gossip_payload)
+                stats.delivered += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                stats.errors += 1
+                logger.exception("Gossip subscriber %r failed", subscriber)
+            latency = loop.time() - received_at
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
 
     def _call_handler_if_view_changed(self, old_neighbours: Set):
         current_neighbours = set(self.local_view.keys())
@@ -199,25 +729,50 @@ class Gossip:
             return
         self._handlers_manager.call_handlers(self.local_view)
 
-    async def _handler_push(self, sender: Node, push_data: PushData):
-        view = self._increase_hop_count(push_data.view)
-        buffer = self._merge_views(view, self.local_view)
-        if self.get_external_nodes:
-            buffer = self._merge_views(view, Counter(self.get_external_nodes()))
-        new_view = self._select_view(buffer)
-        self.local_view = new_view
+    async def _handler_push(self, sender: Node, push_data: PushData) -> int:
+        push_view = self._resolve_push_view(sender, push_data)
+        if push_view is not None:
+            view = self._increase_hop_count(push_view)
+            buffer = self._merge_views(view, self.local_view)
+            if self.get_external_nodes:
+                buffer = self._merge_views(view, Counter(self.get_external_nodes()))
+            if self._config.SHUFFLE_LENGTH is None:
+                new_view = self._select_view(buffer)
+            else:
+                new_view = self._select_shuffled_view(
+                    buffer, self._swappable_nodes.pop(sender, set())
+                )
+            self.local_view = new_view
         await self._deliver_message_to_subscribers(push_data.payload)
+        received = self._received_views.get(sender)
+        return received[0] if received else -1
 
-    async def _handler_pull(self, sender: Node, payload: Payload) -> PushData:
-        my_descriptor = Counter({self.my_node: 0})
+    async def _handler_pull(
+        self, sender: Node, payload: Payload, known_version: int = -1
+    ) -> PushData:
         subscribers_data = await self._get_data_from_subscribers()
+        if self._config.CHANGED_ONLY_PAYLOADS:  # send back only what differs
+            subscribers_data = {
+                key: value
+                for key, value in self._get_unsent_payload(
+                    sender, subscribers_data
+                ).items()
+                if key not in payload or payload[key] != value
+            }
         # todo: deliver message to subscribers
-        view = self._merge_views(my_descriptor, self.local_view)
-        return PushData(view=view, payload=subscribers_data)
+        view = self._get_push_view(sender)
+        push_data = self._make_push_data(sender, view, subscribers_data, known_version)
+        push_data = self._fit_in_budget(sender, push_data)
+        # replies are not acknowledged, a lost one is made up for by the
+        # sender's other peers or by the next version of the payload
+        self._set_payload_as_sent(sender, push_data.payload, self._payload_versions)
+        return push_data
 
     async def _handler_pushpull(self, sender: Node, push_data: PushData):
-        pull_response = await self._handler_pull(sender, push_data.payload)
-        await self._handler_push(sender, push_data)
+        pull_response = await self._handler_pull(
+            sender, push_data.payload, push_data.known_version
+        )
+        pull_response.known_version = await self._handler_push(sender, push_data)
         return pull_response
 
     async def _initialize_protocol(self):
@@ -232,7 +787,11 @@ class Gossip:
             yield
         except ConnectionError:
             if node in self.local_view:
-                self.local_view.pop(node)
+                # views are replaced instead of modified in place, so the ones
+                # handed to handlers are snapshots that never change under them
+                self.local_view = Counter(
+                    {n: hops for n, hops in self.local_view.items() if n != node}
+                )
 
     def _parse_and_set_policies(self, configuration: Dict[Any, Any]):
         self._parse_and_set_policy("peer_selection", configuration)
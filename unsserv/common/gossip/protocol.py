@@ -1,17 +1,23 @@
 from collections import Counter
 from enum import IntEnum, auto
-from typing import Tuple, Sequence, Dict, Any
+from typing import Tuple, Sequence, Dict, Any, Union
 
 from unsserv.common.gossip.structs import PushData
 from unsserv.common.gossip.typing import Payload
 from unsserv.common.rpc.protocol import AProtocol, ITranscoder, Command, Data, Handler
+from unsserv.common.rpc.rpc import decode_data, get_message_size
 from unsserv.common.structs import Node
 from unsserv.common.rpc.structs import Message
 from unsserv.common.typing import View
+from unsserv.common.utils import parse_node
 
 FIELD_COMMAND = "gossip-command"
 FIELD_VIEW = "gossip-view"
 FIELD_PAYLOAD = "gossip-payload"
+FIELD_VERSION = "gossip-version"
+FIELD_BASE_VERSION = "gossip-base-version"
+FIELD_REMOVED = "gossip-removed"
+FIELD_KNOWN_VERSION = "gossip-known-version"
 
 
 class GossipCommand(IntEnum):
@@ -24,22 +30,25 @@ class GossipTranscoder(ITranscoder):
     def encode(self, command: Command, *data: Data) -> Message:
         if command == GossipCommand.PUSH:
             push_data: PushData = data[0]
-            message_data = {
+            message_data: Dict[str, Any] = {
                 FIELD_COMMAND: GossipCommand.PUSH,
-                FIELD_VIEW: push_data.view,
-                FIELD_PAYLOAD: push_data.payload,
+                **_encode_push_data_fields(push_data),
             }
             return Message(self.my_node, self.service_id, message_data)
         elif command == GossipCommand.PULL:
             payload: Payload = data[0]
-            message_data = {FIELD_COMMAND: GossipCommand.PULL, FIELD_PAYLOAD: payload}
+            known_version: int = data[1]
+            message_data = {
+                FIELD_COMMAND: GossipCommand.PULL,
+                FIELD_PAYLOAD: payload,
+                FIELD_KNOWN_VERSION: known_version,
+            }
             return Message(self.my_node, self.service_id, message_data)
         elif command == GossipCommand.PUSHPULL:
             push_data: PushData = data[0]  # type: ignore
             message_data = {
                 FIELD_COMMAND: GossipCommand.PUSHPULL,
-                FIELD_VIEW: push_data.view,
-                FIELD_PAYLOAD: push_data.payload,
+                **_encode_push_data_fields(push_data),
             }
             return Message(self.my_node, self.service_id, message_data)
         raise ValueError("Invalid Command")
@@ -47,19 +56,14 @@ class GossipTranscoder(ITranscoder):
     def decode(self, message: Message) -> Tuple[Command, Sequence[Data]]:
         command = message.data[FIELD_COMMAND]
         if command == GossipCommand.PUSH:
-            push_data = PushData(
-                view=_parse_view(message.data[FIELD_VIEW]),
-                payload=message.data[FIELD_PAYLOAD],
-            )
+            push_data = _decode_push_data_fields(message.data)
             return GossipCommand.PUSH, [push_data]
         elif command == GossipCommand.PULL:
             payload = message.data[FIELD_PAYLOAD]
-            return GossipCommand.PULL, [payload]
+            known_version = message.data.get(FIELD_KNOWN_VERSION, -1)
+            return GossipCommand.PULL, [payload, known_version]
         elif command == GossipCommand.PUSHPULL:
-            push_data = PushData(
-                view=_parse_view(message.data[FIELD_VIEW]),
-                payload=message.data[FIELD_PAYLOAD],
-            )
+            push_data = _decode_push_data_fields(message.data)
             return GossipCommand.PUSHPULL, [push_data]
         raise ValueError("Invalid Command")
 
@@ -68,12 +72,14 @@ class GossipProtocol(AProtocol):
     def _get_new_transcoder(self):
         return GossipTranscoder(self.my_node, self.service_id)
 
-    async def push(self, destination: Node, push_data: PushData):
+    async def push(self, destination: Node, push_data: PushData) -> int:
         message = self._transcoder.encode(GossipCommand.PUSH, push_data)
         return await self._rpc.call_send_message(destination, message)
 
-    async def pull(self, destination: Node, payload: Payload) -> PushData:
-        message = self._transcoder.encode(GossipCommand.PULL, payload)
+    async def pull(
+        self, destination: Node, payload: Payload, known_version: int = -1
+    ) -> PushData:
+        message = self._transcoder.encode(GossipCommand.PULL, payload, known_version)
         encoded_push_data = await self._rpc.call_send_message(destination, message)
         return _parse_push_data(encoded_push_data)
 
@@ -82,6 +88,11 @@ class GossipProtocol(AProtocol):
         encoded_push_data = await self._rpc.call_send_message(destination, message)
         return _parse_push_data(encoded_push_data)
 
+    def get_push_data_size(self, push_data: PushData) -> int:
+        """Size of the push/pushpull datagram carrying push_data, in bytes."""
+        message = self._transcoder.encode(GossipCommand.PUSHPULL, push_data)
+        return get_message_size(message)
+
     def set_handler_push(self, handler: Handler):
         self._handlers[GossipCommand.PUSH] = handler
 
@@ -92,11 +103,45 @@ class GossipProtocol(AProtocol):
         self._handlers[GossipCommand.PUSHPULL] = handler
 
 
-def _parse_view(raw_view: Dict[Any, Any]) -> View:
-    return Counter(dict(map(lambda n: (Node(*n[0]), n[1]), raw_view.items())))
+def _parse_view(raw_view: Union[bytes, Dict[Any, Any]]) -> View:
+    view_dict: Dict[Any, Any] = (
+        decode_data(raw_view)  # view serialized beforehand
+        if isinstance(raw_view, bytes)
+        else raw_view
+    )
+    return Counter(dict(map(lambda n: (Node(*n[0]), n[1]), view_dict.items())))
 
 
 def _parse_push_data(raw_push_data: Dict[str, Any]) -> PushData:
     return PushData(
-        view=_parse_view(raw_push_data["view"]), payload=raw_push_data["payload"]
+        view=_parse_view(raw_push_data["view"]),
+        payload=raw_push_data["payload"],
+        version=raw_push_data.get("version", -1),
+        base_version=raw_push_data.get("base_version", -1),
+        removed=list(map(parse_node, raw_push_data.get("removed", []))),
+        known_version=raw_push_data.get("known_version", -1),
+    )
+
+
+def _encode_push_data_fields(push_data: PushData) -> Dict[str, Any]:
+    return {
+        FIELD_VIEW: push_data.view
+        if push_data.encoded_view is None
+        else push_data.encoded_view,
+        FIELD_PAYLOAD: push_data.payload,
+        FIELD_VERSION: push_data.version,
+        FIELD_BASE_VERSION: push_data.base_version,
+        FIELD_REMOVED: push_data.removed,
+        FIELD_KNOWN_VERSION: push_data.known_version,
+    }
+
+
+def _decode_push_data_fields(message_data: Dict[str, Any]) -> PushData:
+    return PushData(
+        view=_parse_view(message_data[FIELD_VIEW]),
+        payload=message_data[FIELD_PAYLOAD],
+        version=message_data.get(FIELD_VERSION, -1),
+        base_version=message_data.get(FIELD_BASE_VERSION, -1),
+        removed=list(map(parse_node, message_data.get(FIELD_REMOVED, []))),
+        known_version=message_data.get(FIELD_KNOWN_VERSION, -1),
     )
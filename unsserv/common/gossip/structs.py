@@ -1,13 +1,40 @@
-from dataclasses import dataclass
-from typing import Dict, Any
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
 
 from unsserv.common.gossip.typing import Payload, View
+from unsserv.common.structs import Node
 
 
 @dataclass
 class PushData:
     view: View
     payload: Payload
+    version: int = -1  # version of the sender's view (for delta exchanges)
+    base_version: int = -1  # version 'view' is a delta against, -1 if full view
+    removed: List[Node] = field(default_factory=list)
+    known_version: int = -1  # version of the receiver's view known by the sender
+    encoded_view: Optional[bytes] = field(default=None, compare=False, repr=False)
 
     def encode(self) -> Dict[str, Any]:
-        return {"view": self.view, "payload": self.payload}
+        return {
+            "view": self.view if self.encoded_view is None else self.encoded_view,
+            "payload": self.payload,
+            "version": self.version,
+            "base_version": self.base_version,
+            "removed": self.removed,
+            "known_version": self.known_version,
+        }
+
+
+@dataclass
+class DeliveryStats:
+    delivered: int = 0
+    errors: int = 0
+    dropped: int = 0  # payloads discarded because the delivery queue was full
+    total_latency: float = 0  # since the payload was received, in seconds
+    max_latency: float = 0
+
+    @property
+    def mean_latency(self) -> float:
+        processed = self.delivered + self.errors
+        return self.total_latency / processed if processed else 0
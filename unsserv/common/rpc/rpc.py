@@ -1,6 +1,7 @@
 import asyncio
 from typing import Any, Dict, List, Tuple
 
+import umsgpack
 from rpcudp.protocol import RPCProtocol
 
 from unsserv.common.rpc.structs import Message
@@ -9,6 +10,26 @@ from unsserv.common.gossip.config import GossipConfig
 from unsserv.common.typing import Handler
 from unsserv.common.utils import parse_message
 
+MAX_MESSAGE_SIZE = 8192  # bytes, bigger requests are refused by rpcudp
+
+
+def get_message_size(message: Message) -> int:
+    """Size of the datagram that carries the message, in bytes."""
+    return get_encoded_size(["send_message", (message,)])
+
+
+def get_encoded_size(data: Any) -> int:
+    return len(encode_data(data))
+
+
+def encode_data(data: Any) -> bytes:
+    """Serialize data the same way RPC messages are."""
+    return umsgpack.packb(data)
+
+
+def decode_data(raw_data: bytes) -> Any:
+    return umsgpack.unpackb(raw_data)
+
 
 class RPCRegister:
     rpc_register: Dict = {}
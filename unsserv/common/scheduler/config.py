@@ -0,0 +1,18 @@
+from typing import Dict, Any
+
+from unsserv.common.utils import IConfig
+
+
+class SchedulerConfig(IConfig):
+    TICK = 0.05  # seconds
+    WHEEL_SIZE = 64  # slots
+    JITTER = 0.1  # fraction of the period
+    MAX_JOBS_PER_TICK = 32
+
+    def load_from_dict(self, config_dict: Dict[str, Any]):
+        self.TICK = config_dict.get("tick", SchedulerConfig.TICK)
+        self.WHEEL_SIZE = config_dict.get("wheel_size", SchedulerConfig.WHEEL_SIZE)
+        self.JITTER = config_dict.get("jitter", SchedulerConfig.JITTER)
+        self.MAX_JOBS_PER_TICK = config_dict.get(
+            "max_jobs_per_tick", SchedulerConfig.MAX_JOBS_PER_TICK
+        )
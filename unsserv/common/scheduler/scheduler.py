@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import random
+from typing import Dict, List, Optional, Set
+
+from unsserv.common.scheduler.config import SchedulerConfig
+from unsserv.common.scheduler.structs import Job, JobStats
+from unsserv.common.scheduler.typing import JobFunction
+from unsserv.common.structs import Node
+from unsserv.common.utils import stop_task
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerRegister:
+    scheduler_register: Dict = {}
+
+    @staticmethod
+    def get_scheduler(node):
+        scheduler = SchedulerRegister.scheduler_register.get(node, Scheduler(node))
+        SchedulerRegister.scheduler_register[node] = scheduler
+        return scheduler
+
+
+class Scheduler:
+    """
+    Per-node timer wheel that drives the periodic maintenance jobs of every
+    service running on the node.
+
+    Due times are quantized to ticks, so jobs due in the same tick are
+    coalesced into a single wake-up. Every period gets some jitter for
+    avoiding synchronized bursts, a job is never run twice concurrently
+    and at most MAX_JOBS_PER_TICK jobs are started per tick (the rest
+    are deferred).
+    """
+
+    my_node: Node
+    running: bool = False
+    _config: SchedulerConfig
+    _jobs: Dict[str, Job]
+    _wheel: List[Set[Job]]
+    _cursor: int
+    _tick_task: Optional[asyncio.Task]
+
+    def __init__(self, my_node: Node):
+        self.my_node = my_node
+        self._config = SchedulerConfig()
+        self._jobs = {}
+        self._wheel = [set() for _ in range(self._config.WHEEL_SIZE)]
+        self._cursor = 0
+        self._tick_task = None
+
+    async def add_job(
+        self,
+        name: str,
+        function: JobFunction,
+        period: float,
+        first_delay: Optional[float] = None,
+    ):
+        """
+        Register a periodic job.
+
+        :param name: unique job name, used for identifying its stats.
+        :param function: coroutine function executed on every period.
+        :param period: seconds between consecutive executions.
+        :param first_delay: seconds until the first execution (defaults
+            to the period).
+        :return:
+        """
+        if name in self._jobs:
+            raise ValueError("Job name already registered")
+        job = Job(name=name, function=function, period=period)
+        self._jobs[name] = job
+        self._schedule(job, period if first_delay is None else first_delay)
+
+        if len(self._jobs) == 1:  # activate when first job is registered
+            self._start()
+
+    async def remove_job(self, name: str):
+        job = self._jobs.pop(name, None)
+        if not job:
+            return
+        self._wheel[job.slot].discard(job)
+        if job.task:
+            await stop_task(job.task)
+
+        if len(self._jobs) == 0:  # deactivate when last job is removed
+            await self._stop()
+
+    def set_period(self, name: str, period: float):
+        """Change the period of a job, applied from its next execution on."""
+        self._jobs[name].period = period
+
+    def get_stats(self) -> Dict[str, JobStats]:
+        return {name: job.stats for name, job in self._jobs.items()}
+
+    def _start(self):
+        self._tick_task = asyncio.create_task(self._tick_loop())
+        self.running = True
+
+    async def _stop(self):
+        if self._tick_task:
+            await stop_task(self._tick_task)
+            self._tick_task = None
+        self.running = False
+
+    async def _tick_loop(self):
+        loop = asyncio.get_event_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += self._config.TICK
+            await asyncio.sleep(max(next_tick - loop.time(), 0))
+            elapsed_ticks = 1
+            lag = loop.time() - next_tick
+            if lag >= self._config.TICK:  # coalesce the ticks missed due to lag
+                missed_ticks = int(lag // self._config.TICK)
+                elapsed_ticks += missed_ticks
+                next_tick += missed_ticks * self._config.TICK
+            self._dispatch(self._advance(elapsed_ticks))
+
+    def _advance(self, elapsed_ticks: int) -> List[Job]:
+        due_jobs: List[Job] = []
+        for _ in range(min(elapsed_ticks, self._config.WHEEL_SIZE)):
+            self._cursor = (self._cursor + 1) % self._config.WHEEL_SIZE
+            slot = self._wheel[self._cursor]
+            for job in list(slot):
+                if job.rounds > 0 and elapsed_ticks < self._config.WHEEL_SIZE:
+                    job.rounds -= 1
+                    continue
+                slot.remove(job)
+                due_jobs.append(job)
+        return due_jobs
+
+    def _dispatch(self, due_jobs: List[Job]):
+        started_jobs = 0
+        for job in sorted(due_jobs, key=lambda j: j.waiting_ticks, reverse=True):
+            if job.task:  # still running from a previous tick
+                job.stats.coalesced += 1
+                self._schedule(job, job.period)
+            elif started_jobs >= self._config.MAX_JOBS_PER_TICK:
+                job.stats.deferred += 1
+                job.waiting_ticks += 1
+                self._schedule(job, self._config.TICK)
+            else:
+                started_jobs += 1
+                job.waiting_ticks = 0
+                job.task = asyncio.create_task(self._run_job(job))
+                self._schedule(job, job.period)
+
+    def _schedule(self, job: Job, delay: float):
+        jitter = random.uniform(-self._config.JITTER, self._config.JITTER) * delay
+        ticks = max(1, round((delay + jitter) / self._config.TICK))
+        job.slot = (self._cursor + ticks) % self._config.WHEEL_SIZE
+        job.rounds = (ticks - 1) // self._config.WHEEL_SIZE
+        self._wheel[job.slot].add(job)
+
+    async def _run_job(self, job: Job):
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        try:
+            await job.function()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            job.stats.errors += 1
+            logger.exception("Scheduled job '%s' failed", job.name)
+        finally:
+            runtime = loop.time() - start
+            job.stats.runs += 1
+            job.stats.total_runtime += runtime
+            job.stats.last_runtime = runtime
+            job.stats.max_runtime = max(job.stats.max_runtime, runtime)
+            job.task = None
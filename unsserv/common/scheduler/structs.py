@@ -0,0 +1,32 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Optional
+
+from unsserv.common.scheduler.typing import JobFunction
+
+
+@dataclass
+class JobStats:
+    runs: int = 0
+    errors: int = 0
+    coalesced: int = 0  # due ticks skipped because the job was still running
+    deferred: int = 0  # due ticks postponed because the tick budget was spent
+    total_runtime: float = 0
+    max_runtime: float = 0
+    last_runtime: float = 0
+
+    @property
+    def mean_runtime(self) -> float:
+        return self.total_runtime / self.runs if self.runs else 0
+
+
+@dataclass(eq=False)
+class Job:
+    name: str
+    function: JobFunction
+    period: float
+    stats: JobStats = field(default_factory=JobStats)
+    slot: int = 0
+    rounds: int = 0
+    waiting_ticks: int = 0  # consecutive ticks deferred, for avoiding starvation
+    task: Optional[asyncio.Task] = None
@@ -0,0 +1,3 @@
+from typing import Any, Callable, Coroutine
+
+JobFunction = Callable[..., Coroutine[Any, Any, None]]
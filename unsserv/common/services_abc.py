@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
 from typing import Any, List, Optional, Set
 
-from unsserv.common.structs import Node, Property
+from unsserv.common.structs import HandlerExecutor, Node, OverflowPolicy, Property
 from unsserv.common.typing import Handler
+from unsserv.common.utils import Subscription
 
 
 class IService(ABC):
@@ -85,6 +86,31 @@ class IMembershipService(IService):
         """
         pass
 
+    @abstractmethod
+    def add_neighbours_delta_handler(self, handler: Handler):
+        """
+        Add a handler that is executed with the changes of the neighbours.
+
+        The handler receives the set of added nodes, the set of removed
+        nodes and the version of the neighbours (increased on every
+        change). Right after being added, the handler is called with the
+        current neighbours as added nodes.
+
+        :param handler: function that will be called.
+        :return:
+        """
+        pass
+
+    @abstractmethod
+    def remove_neighbours_delta_handler(self, handler: Handler):
+        """
+        Remove the handler that is executed with the changes of the neighbours.
+
+        :param handler: handler that will be removed.
+        :return:
+        """
+        pass
+
 
 class IClusteringService(ISubService, IMembershipService):
     """Clustering service for having bias when selecting neighbours."""
@@ -105,7 +131,22 @@ class IAggregationService(ISubService):
         pass
 
     @abstractmethod
-    def add_aggregate_handler(self, handler: Handler):
+    def add_aggregate_handler(
+        self,
+        handler: Handler,
+        executor: HandlerExecutor = HandlerExecutor.EVENT_LOOP,
+        max_concurrency: int = 1,
+    ):
+        """
+        Add a handler that is executed when the aggregate value changes.
+
+        :param handler: function that will be called.
+        :param executor: where a sync handler runs (the event loop, the
+            shared thread pool or the shared process pool).
+        :param max_concurrency: calls of a pool handler that can run at
+            the same time. With 1 they are run in order.
+        :return:
+        """
         pass
 
     @abstractmethod
@@ -138,13 +179,69 @@ class IDisseminationService(ISubService):
         pass
 
     @abstractmethod
-    def add_broadcast_handler(self, handler: Handler):
+    async def broadcast_many(self, data: List[bytes]):
+        """
+        Disseminates/broadcasts many data packed in a single unit.
+
+        The data is unpacked on reception, so the broadcast handlers are
+        called once per data, as if it was broadcast one by one.
+
+        :param data: list of bytes data
+        :return:
+        """
+        pass
+
+    @abstractmethod
+    def add_broadcast_handler(
+        self,
+        handler: Handler,
+        executor: HandlerExecutor = HandlerExecutor.EVENT_LOOP,
+        max_concurrency: int = 1,
+    ):
+        """
+        Add a handler that is executed when data is broadcast.
+
+        :param handler: function that will be called.
+        :param executor: where a sync handler runs (the event loop, the
+            shared thread pool or the shared process pool).
+        :param max_concurrency: calls of a pool handler that can run at
+            the same time. With 1 they are run in order.
+        :return:
+        """
         pass
 
     @abstractmethod
     def remove_broadcast_handler(self, handler: Handler):
         pass
 
+    def subscribe(
+        self,
+        maxsize: int = 100,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        block_timeout: float = 1,
+    ) -> Subscription:
+        """
+        Subscribe to the broadcast data as a stream.
+
+        The data is consumed with ``async for data in subscription``
+        until the subscription is closed (it can also be used as an
+        async context manager, closed on exit).
+
+        :param maxsize: maximum amount of data buffered for the
+            consumer.
+        :param policy: what to do when the buffer is full.
+        :param block_timeout: seconds that BLOCK waits for room before
+            dropping the data.
+        :return: the subscription.
+        """
+
+        def on_close(closed_subscription: Subscription):
+            self.remove_broadcast_handler(closed_subscription.put)
+
+        subscription = Subscription(maxsize, policy, on_close, block_timeout)
+        self.add_broadcast_handler(subscription.put)
+        return subscription
+
 
 class ISearchingService(ISubService):
     @abstractmethod
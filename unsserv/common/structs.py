@@ -12,3 +12,16 @@ class Property(Enum):
     HAS_GOSSIP = auto()
     ONE_TO_MANY = auto()
     MANY_TO_MANY = auto()
+    HAS_TREE = auto()  # exposes its dissemination tree
+
+
+class HandlerExecutor(Enum):
+    EVENT_LOOP = auto()
+    THREAD_POOL = auto()
+    PROCESS_POOL = auto()
+
+
+class OverflowPolicy(Enum):
+    DROP_OLDEST = auto()
+    DROP_NEWEST = auto()
+    BLOCK = auto()
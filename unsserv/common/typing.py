@@ -1,8 +1,10 @@
 from collections import Counter
-from typing import Any, Callable, Coroutine, Union
+from typing import Any, Callable, Coroutine, List, Union
 
 View = Counter
 
 SyncHandler = Callable[..., None]
 AsyncHandler = Callable[..., Coroutine[Any, Any, None]]
 Handler = Union[SyncHandler, AsyncHandler]
+
+BroadcastData = Union[bytes, List[bytes]]  # single or packed application data
@@ -1,12 +1,30 @@
 import asyncio
+import logging
 import random
 import string
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    cast,
+)
 
 from unsserv.common.rpc.structs import Message
-from unsserv.common.structs import Node
-from unsserv.common.typing import Handler, SyncHandler
+from unsserv.common.structs import HandlerExecutor, Node, OverflowPolicy
+from unsserv.common.typing import BroadcastData, Handler, SyncHandler
+
+logger = logging.getLogger(__name__)
 
 
 def parse_node(raw_node: List) -> Node:
@@ -33,37 +51,459 @@ async def stop_task(task: asyncio.Task):
         pass
 
 
+_executors: Dict[HandlerExecutor, Executor] = {}
+
+
+def get_executor(executor: HandlerExecutor) -> Executor:
+    """Get the pool shared by every handler of the given executor policy."""
+    if executor not in _executors:
+        if executor == HandlerExecutor.THREAD_POOL:
+            _executors[executor] = ThreadPoolExecutor(thread_name_prefix="unsserv")
+        elif executor == HandlerExecutor.PROCESS_POOL:
+            _executors[executor] = ProcessPoolExecutor()
+        else:
+            raise ValueError("The event loop has no executor")
+    return _executors[executor]
+
+
+class ExecutorHandler:
+    """
+    Runs a sync handler in a shared pool, off the event loop.
+
+    Calls are started in the order they are submitted and at most
+    max_concurrency of them run at the same time, so they are also
+    completed in order when max_concurrency is 1 (the default). At most
+    max_pending calls wait to be started, beyond that the oldest one is
+    dropped.
+    """
+
+    executor: HandlerExecutor
+    max_concurrency: int
+    dropped: int
+    errors: int
+    _pending: Deque[Tuple[tuple, dict]]
+    _semaphore: Optional[asyncio.Semaphore]
+    _dispatch_task: Optional[asyncio.Task]
+
+    def __init__(
+        self,
+        handler: SyncHandler,
+        executor: HandlerExecutor,
+        max_concurrency: int,
+        max_pending: int = 1000,
+    ):
+        if asyncio.iscoroutinefunction(handler) or asyncio.iscoroutinefunction(
+            getattr(handler, "func", None)
+        ):
+            raise ValueError("Only sync handlers can run in an executor")
+        if max_concurrency < 1:
+            raise ValueError("Max concurrency must be at least 1")
+        # declared here, mypy takes a Callable declared in the class as a method
+        self.handler: SyncHandler = handler
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.dropped = 0
+        self.errors = 0
+        self._pending = deque(maxlen=max_pending)
+        self._semaphore = None  # created lazily, inside the event loop
+        self._dispatch_task = None
+
+    def submit(self, *args, **kwargs):
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append((args, kwargs))
+        if not self._dispatch_task:
+            self._dispatch_task = asyncio.create_task(self._dispatch())
+
+    def stop(self):
+        self._pending.clear()
+        if self._dispatch_task:
+            self._dispatch_task.cancel()
+            self._dispatch_task = None
+
+    async def _dispatch(self):
+        if not self._semaphore:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_event_loop()
+        try:
+            while self._pending:
+                await self._semaphore.acquire()
+                args, kwargs = self._pending.popleft()
+                future = loop.run_in_executor(
+                    get_executor(self.executor), partial(self.handler, *args, **kwargs)
+                )
+                future.add_done_callback(self._on_call_done)
+        finally:
+            if self._dispatch_task is asyncio.current_task():
+                self._dispatch_task = None
+
+    def _on_call_done(self, future: asyncio.Future):
+        self._semaphore.release()
+        if not future.cancelled() and future.exception():
+            self.errors += 1
+            logger.error("Handler %r failed", self.handler, exc_info=future.exception())
+
+
 class HandlersManager:
+    """
+    Calls the registered handlers on every event.
+
+    By default a task is created per handler and event. In batched mode
+    the events are put in a bounded queue (the oldest event is dropped
+    when it is full) and a single worker drains it in batches, awaiting
+    the async handlers and calling the sync ones inline. If coalesce is
+    set, a new event supersedes the pending ones, so only the latest is
+    delivered (useful for full-state updates like views or aggregates).
+
+    Sync handlers can be added with a thread or process pool executor,
+    so their work does not stall the protocols running on the loop.
+    """
+
+    dropped: int
+    errors: int
     _handlers: List[Handler]
+    _executor_handlers: Dict[Handler, ExecutorHandler]
+    _batched: bool
+    _coalesce: bool
+    _batch_size: int
+    _queue: Deque[Tuple[tuple, dict]]
+    _worker_task: Optional[asyncio.Task]
 
-    def __init__(self):
+    def __init__(
+        self,
+        batched: bool = False,
+        coalesce: bool = False,
+        queue_size: int = 1000,
+        batch_size: int = 100,
+    ):
+        self.dropped = 0
+        self.errors = 0
         self._handlers = []
+        self._executor_handlers = {}
+        self._batched = batched or coalesce
+        self._coalesce = coalesce
+        self._batch_size = batch_size
+        self._queue = deque(maxlen=queue_size)
+        self._worker_task = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def set_batched(self, batched: bool):
+        """
+        Switch between a task per handler and event, and batched mode.
+
+        :param batched: whether events are dispatched in batches.
+        :return:
+        """
+        self._batched = batched or self._coalesce
+
+    def add_handler(
+        self,
+        handler: Handler,
+        executor: HandlerExecutor = HandlerExecutor.EVENT_LOOP,
+        max_concurrency: int = 1,
+    ):
+        """
+        Add a handler.
 
-    def add_handler(self, handler: Handler):
+        :param handler: function that will be called on every event.
+        :param executor: where a sync handler runs. Process pool
+            handlers and their arguments must be picklable.
+        :param max_concurrency: calls of a pool handler that can run at
+            the same time.
+        :return:
+        """
+        if handler in self._handlers:  # it will be called once per addition
+            executor_handler = self._executor_handlers.get(handler, None)
+            added_executor = HandlerExecutor.EVENT_LOOP
+            if executor_handler:
+                added_executor = executor_handler.executor
+            if executor != added_executor:
+                raise ValueError("Handler already added with another executor")
+        elif executor != HandlerExecutor.EVENT_LOOP:
+            self._executor_handlers[handler] = ExecutorHandler(
+                handler,  # type: ignore
+                executor,
+                max_concurrency,
+                max_pending=self._queue.maxlen,
+            )
         self._handlers.append(handler)
 
     def remove_handler(self, handler: Handler):
         self._handlers.remove(handler)
+        if handler in self._executor_handlers and handler not in self._handlers:
+            self._executor_handlers.pop(handler).stop()
 
     def remove_all_handlers(self):
         self._handlers.clear()
+        for executor_handler in self._executor_handlers.values():
+            executor_handler.stop()
+        self._executor_handlers.clear()
+        self._queue.clear()
+        if self._worker_task:
+            self._worker_task.cancel()
+            self._worker_task = None
 
     def call_handlers(self, *args, **kwargs):
-        for handler in self._handlers:
-            if asyncio.iscoroutinefunction(handler):
-                asyncio.create_task(handler(*args, **kwargs))
-            elif hasattr(handler, "func") and asyncio.iscoroutinefunction(
-                handler.func
-            ):  # in case 'partial' was used
-                asyncio.create_task(handler(*args, **kwargs))
-            else:
-                asyncio.create_task(
-                    self._sync_handler_wrapper(handler, *args, **kwargs)
-                )
+        if not self._batched:
+            for handler in self._handlers:
+                self._call_handler(handler, *args, **kwargs)
+            return
+        if not self._handlers:
+            return
+        if self._coalesce:
+            self.dropped += len(self._queue)
+            self._queue.clear()
+        elif len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append((args, kwargs))
+        if not self._worker_task:
+            self._worker_task = asyncio.create_task(self._drain_queue())
+
+    def _call_handler(self, handler: Handler, *args, **kwargs):
+        if handler in self._executor_handlers:
+            self._executor_handlers[handler].submit(*args, **kwargs)
+        elif asyncio.iscoroutinefunction(handler):
+            asyncio.create_task(handler(*args, **kwargs))
+        elif asyncio.iscoroutinefunction(
+            getattr(handler, "func", None)
+        ):  # in case 'partial' was used
+            asyncio.create_task(handler(*args, **kwargs))
+        else:
+            sync_handler = cast(SyncHandler, handler)
+            asyncio.create_task(
+                self._sync_handler_wrapper(sync_handler, *args, **kwargs)
+            )
 
     async def _sync_handler_wrapper(self, sync_handler: SyncHandler, *args, **kwargs):
         sync_handler(*args, **kwargs)
 
+    async def _drain_queue(self):
+        try:
+            while self._queue:
+                batch = [
+                    self._queue.popleft()
+                    for _ in range(min(self._batch_size, len(self._queue)))
+                ]
+                for args, kwargs in batch:
+                    for handler in list(self._handlers):
+                        await self._run_handler(handler, *args, **kwargs)
+                await asyncio.sleep(0)  # let other tasks run between batches
+        finally:
+            if self._worker_task is asyncio.current_task():
+                self._worker_task = None
+
+    async def _run_handler(self, handler: Handler, *args, **kwargs):
+        if handler in self._executor_handlers:
+            self._executor_handlers[handler].submit(*args, **kwargs)
+            return
+        try:
+            result = handler(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                await result
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.errors += 1
+            logger.exception("Handler %r failed", handler)
+
+
+class DeltaHandlersManager(HandlersManager):
+    """
+    Handlers manager that notifies the changes of a set of neighbours.
+
+    Handlers are called with the added nodes, the removed nodes and the
+    version of the neighbours, which is increased on every change. A new
+    handler is first called with all the current neighbours as added.
+    """
+
+    version: int
+    _neighbours: Set[Node]
+
+    def __init__(self):
+        super().__init__()
+        self.version = 0
+        self._neighbours = set()
+
+    def add_handler(
+        self,
+        handler: Handler,
+        executor: HandlerExecutor = HandlerExecutor.EVENT_LOOP,
+        max_concurrency: int = 1,
+    ):
+        super().add_handler(handler, executor, max_concurrency)
+        if self._neighbours:
+            self._call_handler(handler, set(self._neighbours), set(), self.version)
+
+    def update_neighbours(self, neighbours: Iterable[Node]):
+        neighbours = set(neighbours)
+        added = neighbours - self._neighbours
+        removed = self._neighbours - neighbours
+        if not added and not removed:
+            return
+        self._neighbours = neighbours
+        self.version += 1
+        self.call_handlers(added, removed, self.version)
+
+
+_END_OF_STREAM = object()
+
+
+class Subscription:
+    """
+    Stream of the data received by a handler, consumed with ``async for``.
+
+    Data is buffered in a bounded queue. When it is full, the policy
+    decides whether the oldest or the newest data is dropped, or whether
+    the handler waits for the consumer to make room (BLOCK). Services do
+    not await their handlers, so blocking does not slow down the data
+    received: it only gives the consumer up to 'block_timeout' seconds
+    to catch up before the data is dropped. The stream ends once it is
+    closed and the buffered data has been consumed.
+    """
+
+    policy: OverflowPolicy
+    block_timeout: float
+    dropped: int
+    closed: bool
+    _queue: asyncio.Queue
+
+    def __init__(
+        self,
+        maxsize: int,
+        policy: OverflowPolicy,
+        on_close: Callable[["Subscription"], None],
+        block_timeout: float = 1,
+    ):
+        if maxsize < 1:
+            raise ValueError("The subscription queue must be bounded")
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.closed = False
+        self._queue = asyncio.Queue(maxsize)
+        # declared here, mypy takes a Callable declared in the class as a method
+        self._on_close: Callable[["Subscription"], None] = on_close
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def put(self, data: Any):
+        if self.closed:
+            return
+        if self._queue.full() and self.policy == OverflowPolicy.BLOCK:
+            try:
+                await asyncio.wait_for(self._queue.put(data), self.block_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+            return
+        if self._queue.full():
+            self.dropped += 1
+            if self.policy == OverflowPolicy.DROP_NEWEST:
+                return
+            self._queue.get_nowait()
+        self._queue.put_nowait(data)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._on_close(self)
+        if not self._queue.full():
+            self._queue.put_nowait(_END_OF_STREAM)  # wake up a waiting consumer
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        if self.closed and self._queue.empty():
+            raise StopAsyncIteration
+        data = await self._queue.get()
+        if data is _END_OF_STREAM:
+            raise StopAsyncIteration
+        return data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+def unpack_broadcast_data(data: BroadcastData) -> List[bytes]:
+    """Get the application data of a single or packed broadcast."""
+    return data if isinstance(data, list) else [data]
+
+
+class BroadcastBuffer:
+    """
+    Packs broadcast data into the units disseminated by broadcast_many.
+
+    The buffered data is disseminated as a single unit once it reaches
+    max_size bytes or max_delay seconds after the first data was
+    buffered, whatever happens first. Data that would overflow max_size
+    is left for the next unit, so units only exceed it when a single
+    data does. Errors disseminating a unit are raised to the broadcast
+    that fills it, and logged when the unit is disseminated after the
+    delay or on stop, since nobody awaits them.
+    """
+
+    max_size: int
+    max_delay: float
+    _buffer: List[bytes]
+    _size: int
+    _flush_task: Optional[asyncio.Task]
+
+    def __init__(
+        self,
+        broadcast_many: Callable[[List[bytes]], Awaitable[None]],
+        max_size: int,
+        max_delay: float,
+    ):
+        self.max_size = max_size
+        self.max_delay = max_delay
+        # declared here, mypy takes a Callable declared in the class as a method
+        self._broadcast_many: Callable[[List[bytes]], Awaitable[None]] = broadcast_many
+        self._buffer = []
+        self._size = 0
+        self._flush_task = None
+
+    async def add(self, data: bytes):
+        if self._buffer and self.max_size < self._size + len(data):
+            await self.flush()
+        self._buffer.append(data)
+        self._size += len(data)
+        if self.max_size <= self._size:
+            await self.flush()
+        elif not self._flush_task:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self):
+        if self._flush_task and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+        self._flush_task = None
+        if not self._buffer:
+            return
+        buffer = self._buffer
+        self._buffer, self._size = [], 0
+        await self._broadcast_many(buffer)
+
+    async def stop(self):
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Buffered broadcast data lost on stop")
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_delay)
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Buffered broadcast data lost")
+
 
 class IConfig(ABC):
     @abstractmethod
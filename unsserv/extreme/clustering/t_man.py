@@ -10,7 +10,7 @@ from unsserv.common.services_abc import (
 )
 from unsserv.common.structs import Node, Property
 from unsserv.common.typing import Handler
-from unsserv.common.utils import HandlersManager
+from unsserv.common.utils import DeltaHandlersManager, HandlersManager
 
 RankingFunction = Callable[[Node], Any]
 
@@ -20,6 +20,7 @@ class TMan(IClusteringService):
 
     gossip: Optional[Gossip]
     _handlers_manager: HandlersManager
+    _delta_handlers_manager: DeltaHandlersManager
     _ranking_function: RankingFunction
 
     def __init__(self, membership: IMembershipService):
@@ -27,6 +28,7 @@ class TMan(IClusteringService):
         self.membership = membership
         self.gossip = None
         self._handlers_manager = HandlersManager()
+        self._delta_handlers_manager = DeltaHandlersManager()
 
     async def join(self, service_id: Any, **configuration: Any):
         if self.running:
@@ -43,6 +45,8 @@ class TMan(IClusteringService):
             custom_selection_ranking=self._selection_ranking,
             external_nodes_source=self.membership.get_neighbours,
         )
+        # the first delta is then computed against the bootstrap view
+        self._delta_handlers_manager.update_neighbours(self.gossip.local_view.keys())
         await self.gossip.start()
         self.running = True
 
@@ -51,6 +55,7 @@ class TMan(IClusteringService):
             return
         await self.gossip.stop()
         self._handlers_manager.remove_all_handlers()
+        self._delta_handlers_manager.remove_all_handlers()
         self.gossip = None
         self.running = False
 
@@ -67,8 +72,17 @@ class TMan(IClusteringService):
     def remove_neighbours_handler(self, handler: Handler):
         self._handlers_manager.remove_handler(handler)
 
+    def add_neighbours_delta_handler(self, handler: Handler):
+        if not self.running:
+            raise RuntimeError("Service not running")
+        self._delta_handlers_manager.add_handler(handler)
+
+    def remove_neighbours_delta_handler(self, handler: Handler):
+        self._delta_handlers_manager.remove_handler(handler)
+
     async def _gossip_local_view_handler(self, local_view: View):
         self._handlers_manager.call_handlers(list(local_view.keys()))
+        self._delta_handlers_manager.update_neighbours(local_view.keys())
 
     def _selection_ranking(self, view: View) -> List[Node]:
         return sorted(view.keys(), key=self._ranking_function)  # type: ignore
@@ -6,7 +6,19 @@ from unsserv.common.utils import IConfig
 class LpbcastConfig(IConfig):
     FANOUT = 10
     BUFFER_LIMIT = 100
+    BROADCAST_BUFFER_SIZE = 4096  # bytes
+    BROADCAST_BUFFER_DELAY = 0  # seconds, 0 for disseminating without buffering
+    BATCHED_DELIVERY = False  # a single worker delivering the events in batches
 
     def load_from_dict(self, config_dict: Dict[str, Any]):
         self.FANOUT = config_dict.get("fanout", LpbcastConfig.FANOUT)
         self.BUFFER_LIMIT = config_dict.get("buffer_limit", LpbcastConfig.BUFFER_LIMIT)
+        self.BROADCAST_BUFFER_SIZE = config_dict.get(
+            "broadcast_buffer_size", LpbcastConfig.BROADCAST_BUFFER_SIZE
+        )
+        self.BROADCAST_BUFFER_DELAY = config_dict.get(
+            "broadcast_buffer_delay", LpbcastConfig.BROADCAST_BUFFER_DELAY
+        )
+        self.BATCHED_DELIVERY = config_dict.get(
+            "batched_delivery", LpbcastConfig.BATCHED_DELIVERY
+        )
@@ -1,12 +1,17 @@
 import asyncio
 import random
 from collections import OrderedDict
-from typing import Any, List, Union
+from typing import Any, List, Optional, Union
 
 from unsserv.common.services_abc import IDisseminationService, IMembershipService
-from unsserv.common.structs import Node, Property
+from unsserv.common.structs import HandlerExecutor, Node, Property
 from unsserv.common.typing import Handler
-from unsserv.common.utils import get_random_id, HandlersManager
+from unsserv.common.utils import (
+    BroadcastBuffer,
+    get_random_id,
+    HandlersManager,
+    unpack_broadcast_data,
+)
 from unsserv.extreme.dissemination.many_to_many.config import LpbcastConfig
 from unsserv.extreme.dissemination.many_to_many.protocol import LpbcastProtocol
 from unsserv.extreme.dissemination.many_to_many.structs import Event
@@ -22,6 +27,7 @@ class Lpbcast(IDisseminationService):
     _protocol: LpbcastProtocol
     _handlers_manager: HandlersManager
     _config: LpbcastConfig
+    _broadcast_buffer: Optional[BroadcastBuffer]
 
     _events: "OrderedDict[EventId, List[Union[EventData, EventOrigin]]]"
     _events_digest: "OrderedDict[EventId, EventOrigin]"
@@ -32,6 +38,7 @@ class Lpbcast(IDisseminationService):
         self._protocol = LpbcastProtocol(self.my_node)
         self._handlers_manager = HandlersManager()
         self._config = LpbcastConfig()
+        self._broadcast_buffer = None
 
         self._events = OrderedDict()
         self._events_digest = OrderedDict()
@@ -44,11 +51,21 @@ class Lpbcast(IDisseminationService):
             self._handlers_manager.add_handler(configuration["broadcast_handler"])
         await self._initialize_protocol()
         self._config.load_from_dict(configuration)
+        self._handlers_manager.set_batched(self._config.BATCHED_DELIVERY)
+        if self._config.BROADCAST_BUFFER_DELAY:
+            self._broadcast_buffer = BroadcastBuffer(
+                self.broadcast_many,
+                self._config.BROADCAST_BUFFER_SIZE,
+                self._config.BROADCAST_BUFFER_DELAY,
+            )
         self.running = True
 
     async def leave(self):
         if not self.running:
             return
+        if self._broadcast_buffer:
+            await self._broadcast_buffer.stop()
+            self._broadcast_buffer = None
         await self._protocol.stop()
         self._handlers_manager.remove_all_handlers()
         self.running = False
@@ -57,13 +74,30 @@ class Lpbcast(IDisseminationService):
         if not self.running:
             raise RuntimeError("Dissemination service not running")
         assert isinstance(data, bytes)
+        if self._broadcast_buffer:
+            await self._broadcast_buffer.add(data)
+        else:
+            await self._broadcast_event(data)
+
+    async def broadcast_many(self, data: List[bytes]):
+        if not self.running:
+            raise RuntimeError("Dissemination service not running")
+        assert all(isinstance(single_data, bytes) for single_data in data)
+        await self._broadcast_event(list(data))
+
+    async def _broadcast_event(self, event_data: EventData):
         event_id = get_random_id()
         await self._handle_new_event(
-            event_id, data, self.my_node, broadcast_origin=True
+            event_id, event_data, self.my_node, broadcast_origin=True
         )
 
-    def add_broadcast_handler(self, handler: Handler):
-        self._handlers_manager.add_handler(handler)
+    def add_broadcast_handler(
+        self,
+        handler: Handler,
+        executor: HandlerExecutor = HandlerExecutor.EVENT_LOOP,
+        max_concurrency: int = 1,
+    ):
+        self._handlers_manager.add_handler(handler, executor, max_concurrency)
 
     def remove_broadcast_handler(self, handler: Handler):
         self._handlers_manager.remove_handler(handler)
@@ -82,7 +116,8 @@ class Lpbcast(IDisseminationService):
         self._purge_events_threshold()
         asyncio.create_task(self._disseminate(event_id, event_data, event_origin))
         if not broadcast_origin:
-            self._handlers_manager.call_handlers(event_data)
+            for single_data in unpack_broadcast_data(event_data):
+                self._handlers_manager.call_handlers(single_data)
 
     async def _disseminate(
         self, event_id: EventId, event_data: EventData, event_origin: Node
@@ -112,7 +147,7 @@ class Lpbcast(IDisseminationService):
 
         try:
             event_data, _ = await self._protocol.retrieve_event(event_source, event_id)
-            assert isinstance(event_data, bytes)
+            assert isinstance(event_data, (bytes, list))
             return await self._handle_new_event(event_id, event_data, event_origin)
         except Exception:
             pass
@@ -123,13 +158,13 @@ class Lpbcast(IDisseminationService):
             event_data, _ = await self._protocol.retrieve_event(
                 random_neighbour, event_id
             )
-            assert isinstance(event_data, bytes)
+            assert isinstance(event_data, (bytes, list))
             return await self._handle_new_event(event_id, event_data, event_origin)
         except Exception:
             pass
         try:
             event_data, _ = await self._protocol.retrieve_event(event_origin, event_id)
-            assert isinstance(event_data, bytes)
+            assert isinstance(event_data, (bytes, list))
             return await self._handle_new_event(event_id, event_data, event_origin)
         except Exception:
             pass
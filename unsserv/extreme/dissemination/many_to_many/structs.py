@@ -1,11 +1,11 @@
 from unsserv.common.structs import Node
-from unsserv.extreme.dissemination.many_to_many.typing import Digest
+from unsserv.extreme.dissemination.many_to_many.typing import Digest, EventData
 from dataclasses import dataclass
 
 
 @dataclass
 class Event:
     id: str
-    data: bytes
+    data: EventData
     origin: Node
     digest: Digest
@@ -1,7 +1,8 @@
 from typing import List, Tuple, Union
 from unsserv.common.structs import Node
+from unsserv.common.typing import BroadcastData
 
-EventData = bytes
+EventData = BroadcastData
 EventId = str
 EventOrigin = Node
 LpbcastEvent = List[Union[EventId, EventData, EventOrigin]]
@@ -7,8 +7,16 @@ class MonConfig(IConfig):
     TIMEOUT = 5  # seconds
     FANOUT = 10
     TREE_LIFE = 10
+    BROADCAST_BUFFER_SIZE = 4096  # bytes
+    BROADCAST_BUFFER_DELAY = 0  # seconds, 0 for disseminating without buffering
 
     def load_from_dict(self, config_dict: Dict[str, Any]):
         self.TIMEOUT = config_dict.get("timeout", MonConfig.TIMEOUT)
         self.FANOUT = config_dict.get("fanout", MonConfig.FANOUT)
         self.TREE_LIFE = config_dict.get("tree_life", MonConfig.TREE_LIFE)
+        self.BROADCAST_BUFFER_SIZE = config_dict.get(
+            "broadcast_buffer_size", MonConfig.BROADCAST_BUFFER_SIZE
+        )
+        self.BROADCAST_BUFFER_DELAY = config_dict.get(
+            "broadcast_buffer_delay", MonConfig.BROADCAST_BUFFER_DELAY
+        )
@@ -1,12 +1,18 @@
 import asyncio
 import random
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional
 
 from unsserv.common.errors import ServiceError
 from unsserv.common.services_abc import IDisseminationService, IMembershipService
-from unsserv.common.structs import Node, Property
-from unsserv.common.typing import Handler
-from unsserv.common.utils import get_random_id, HandlersManager, stop_task
+from unsserv.common.structs import HandlerExecutor, Node, Property
+from unsserv.common.typing import BroadcastData, Handler
+from unsserv.common.utils import (
+    BroadcastBuffer,
+    get_random_id,
+    HandlersManager,
+    stop_task,
+    unpack_broadcast_data,
+)
 from unsserv.extreme.dissemination.one_to_many.config import MonConfig
 from unsserv.extreme.dissemination.one_to_many.protocol import MonProtocol
 from unsserv.extreme.dissemination.one_to_many.structs import Session, Broadcast
@@ -14,10 +20,11 @@ from unsserv.extreme.dissemination.one_to_many.typing import BroadcastID
 
 
 class Mon(IDisseminationService):
-    properties = {Property.EXTREME, Property.ONE_TO_MANY}
+    properties = {Property.EXTREME, Property.ONE_TO_MANY, Property.HAS_TREE}
     _protocol: MonProtocol
     _handlers_manager: HandlersManager
     _config: MonConfig
+    _broadcast_buffer: Optional[BroadcastBuffer]
 
     _levels: Dict[BroadcastID, int]
     _children: Dict[BroadcastID, List[Node]]
@@ -34,6 +41,7 @@ class Mon(IDisseminationService):
         self._protocol = MonProtocol(self.my_node)
         self._handlers_manager = HandlersManager()
         self._config = MonConfig()
+        self._broadcast_buffer = None
 
         self._children = {}
         self._parents = {}
@@ -51,11 +59,20 @@ class Mon(IDisseminationService):
         if "broadcast_handler" in configuration:
             self._handlers_manager.add_handler(configuration["broadcast_handler"])
         self._config.load_from_dict(configuration)
+        if self._config.BROADCAST_BUFFER_DELAY:
+            self._broadcast_buffer = BroadcastBuffer(
+                self.broadcast_many,
+                self._config.BROADCAST_BUFFER_SIZE,
+                self._config.BROADCAST_BUFFER_DELAY,
+            )
         self.running = True
 
     async def leave(self):
         if not self.running:
             return
+        if self._broadcast_buffer:
+            await self._broadcast_buffer.stop()
+            self._broadcast_buffer = None
         for task in self._cleanup_tasks:
             await stop_task(task)
         self._handlers_manager.remove_all_handlers()
@@ -66,6 +83,18 @@ class Mon(IDisseminationService):
         if not self.running:
             raise RuntimeError("Dissemination service not running")
         assert isinstance(data, bytes)
+        if self._broadcast_buffer:
+            await self._broadcast_buffer.add(data)
+        else:
+            await self._broadcast_unit(data)
+
+    async def broadcast_many(self, data: List[bytes]):
+        if not self.running:
+            raise RuntimeError("Dissemination service not running")
+        assert all(isinstance(single_data, bytes) for single_data in data)
+        await self._broadcast_unit(list(data))
+
+    async def _broadcast_unit(self, data: BroadcastData):
         broadcast_id = await asyncio.wait_for(
             self._build_dag(), timeout=self._config.TIMEOUT
         )
@@ -73,12 +102,40 @@ class Mon(IDisseminationService):
             self._disseminate(broadcast_id, data), timeout=self._config.TIMEOUT
         )
 
-    def add_broadcast_handler(self, handler: Handler):
-        self._handlers_manager.add_handler(handler)
+    def add_broadcast_handler(
+        self,
+        handler: Handler,
+        executor: HandlerExecutor = HandlerExecutor.EVENT_LOOP,
+        max_concurrency: int = 1,
+    ):
+        self._handlers_manager.add_handler(handler, executor, max_concurrency)
 
     def remove_broadcast_handler(self, handler: Handler):
         self._handlers_manager.remove_handler(handler)
 
+    async def build_tree(self) -> str:
+        """
+        Build a dissemination tree rooted at this node.
+
+        :return: ID of the tree, which lives for 'tree_life' seconds.
+        """
+        if not self.running:
+            raise RuntimeError("Dissemination service not running")
+        broadcast_id = await asyncio.wait_for(
+            self._build_dag(), timeout=self._config.TIMEOUT
+        )
+        await asyncio.wait_for(
+            self._children_ready_events[broadcast_id].wait(),
+            timeout=self._config.TIMEOUT,
+        )
+        return broadcast_id
+
+    async def get_tree_children(self, tree_id: str) -> List[Node]:
+        if tree_id not in self._children_ready_events:
+            return []  # the tree expired, or never reached this node
+        await self._children_ready_events[tree_id].wait()
+        return list(self._children.get(tree_id, []))
+
     async def _build_dag(self) -> str:
         broadcast_id = get_random_id()
         self._levels[broadcast_id] = 0
@@ -166,7 +223,8 @@ class Mon(IDisseminationService):
         ):
             self._received_data[broadcast.id] = broadcast.data
             asyncio.create_task(self._disseminate(broadcast.id, broadcast.data))
-            self._handlers_manager.call_handlers(broadcast.data)
+            for single_data in unpack_broadcast_data(broadcast.data):
+                self._handlers_manager.call_handlers(single_data)
 
     async def _initialize_protocol(self):
         self._protocol.set_handler_session(self._handler_session)
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+from unsserv.common.typing import BroadcastData
+
 
 @dataclass
 class Session:
@@ -10,4 +12,4 @@ class Session:
 @dataclass
 class Broadcast:
     id: str
-    data: bytes
+    data: BroadcastData
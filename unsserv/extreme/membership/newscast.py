@@ -4,18 +4,20 @@ from unsserv.common.gossip.gossip import Gossip, View
 from unsserv.common.services_abc import IMembershipService
 from unsserv.common.structs import Node, Property
 from unsserv.common.typing import Handler
-from unsserv.common.utils import HandlersManager
+from unsserv.common.utils import DeltaHandlersManager, HandlersManager
 
 
 class Newscast(IMembershipService):
     properties = {Property.EXTREME, Property.HAS_GOSSIP, Property.NON_SYMMETRIC}
     gossip: Optional[Gossip]
     _handlers_manager: HandlersManager
+    _delta_handlers_manager: DeltaHandlersManager
 
     def __init__(self, node: Node):
         self.my_node = node
         self.gossip = None
         self._handlers_manager = HandlersManager()
+        self._delta_handlers_manager = DeltaHandlersManager()
 
     async def join(self, service_id: Any, **configuration: Any):
         if self.running:
@@ -26,7 +28,10 @@ class Newscast(IMembershipService):
             service_id=service_id,
             local_view_nodes=configuration.get("bootstrap_nodes", None),
             local_view_handler=self._gossip_local_view_handler,
+            **configuration,
         )
+        # the first delta is then computed against the bootstrap view
+        self._delta_handlers_manager.update_neighbours(self.gossip.local_view.keys())
         await self.gossip.start()
         self.running = True
 
@@ -48,5 +53,14 @@ class Newscast(IMembershipService):
     def remove_neighbours_handler(self, handler: Handler):
         self._handlers_manager.remove_handler(handler)
 
+    def add_neighbours_delta_handler(self, handler: Handler):
+        if not self.running:
+            raise RuntimeError("Service not running")
+        self._delta_handlers_manager.add_handler(handler)
+
+    def remove_neighbours_delta_handler(self, handler: Handler):
+        self._delta_handlers_manager.remove_handler(handler)
+
     async def _gossip_local_view_handler(self, local_view: View):
         self._handlers_manager.call_handlers(list(local_view.keys()))
+        self._delta_handlers_manager.update_neighbours(local_view.keys())
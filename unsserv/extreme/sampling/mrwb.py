@@ -1,13 +1,13 @@
 import asyncio
 import math
 import random
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Set
 
 from unsserv.common.errors import ServiceError
+from unsserv.common.scheduler.scheduler import Scheduler, SchedulerRegister
 from unsserv.common.services_abc import IMembershipService, ISamplingService
 from unsserv.common.structs import Node, Property
 from unsserv.common.utils import get_random_id
-from unsserv.common.utils import stop_task
 from unsserv.extreme.sampling.config import MRWBConfig
 from unsserv.extreme.sampling.protocol import MRWBProtocol
 from unsserv.extreme.sampling.structs import Sample, SampleResult
@@ -16,6 +16,7 @@ from unsserv.extreme.sampling.structs import Sample, SampleResult
 class MRWB(ISamplingService):
     properties = {Property.EXTREME}
     _protocol: MRWBProtocol
+    _scheduler: Scheduler
     _config: MRWBConfig
 
     _neighbours: List[Node]
@@ -27,6 +28,7 @@ class MRWB(ISamplingService):
         self.my_node = membership.my_node
         self.membership = membership
         self._protocol = MRWBProtocol(self.my_node)
+        self._scheduler = SchedulerRegister.get_scheduler(self.my_node)
         self._config = MRWBConfig()
 
         self._neighbours = []
@@ -43,12 +45,15 @@ class MRWB(ISamplingService):
         neighbours = self.membership.get_neighbours()
         assert isinstance(neighbours, list)
         self._neighbours = neighbours
-        self._degrees_update_task = asyncio.create_task(
-            self._neighbours_degrees_maintenance()
-        )  # stop degrees updater task
+        await self._scheduler.add_job(
+            f"mrwb-{service_id}",
+            self._neighbours_degrees_maintenance,
+            self._config.MAINTENANCE_SLEEP,
+            first_delay=0,
+        )  # start degrees updater job
         # initialize RPC
         await self._initialize_protocol()
-        self.membership.add_neighbours_handler(
+        self.membership.add_neighbours_delta_handler(
             self._membership_neighbours_handler  # type: ignore
         )
         self.running = True
@@ -56,11 +61,14 @@ class MRWB(ISamplingService):
     async def leave(self):
         if not self.running:
             return
-        self.membership.remove_neighbours_handler(self._membership_neighbours_handler)
+        self.membership.remove_neighbours_delta_handler(
+            self._membership_neighbours_handler
+        )
         self._neighbours = []
         await self._protocol.stop()
-        if self._degrees_update_task:  # stop degrees updater task
-            await stop_task(self._degrees_update_task)
+        await self._scheduler.remove_job(
+            f"mrwb-{self.service_id}"
+        )  # stop degrees updater job
         self.running = False
 
     async def get_sample(self) -> Node:
@@ -86,10 +94,8 @@ class MRWB(ISamplingService):
     async def _neighbours_degrees_maintenance(self):
         # maybe is not needed if degrees are updated whenever
         # membership changes neighbours?
-        while True:
-            for neighbour in self._neighbours:
-                await self._update_degree(neighbour)
-            await asyncio.sleep(self._config.MAINTENANCE_SLEEP)
+        for neighbour in self._neighbours:
+            await self._update_degree(neighbour)
 
     def _choose_next_hop(self) -> Node:
         random_neighbour = random.choice(self._neighbours)
@@ -106,17 +112,19 @@ class MRWB(ISamplingService):
         except ConnectionError:
             pass  # let membership to decide whether to remove the node or not
 
-    async def _membership_neighbours_handler(self, new_neighbours: List[Node]):
-        old_neighbours = set(self._neighbours)
-        new_neighbours_set = set(new_neighbours)
-        for neighbour in old_neighbours - new_neighbours_set:
+    async def _membership_neighbours_handler(
+        self, added: Set[Node], removed: Set[Node], version: int
+    ):
+        self._neighbours = [n for n in self._neighbours if n not in removed] + [
+            n for n in added if n not in self._neighbours
+        ]
+        for neighbour in removed:
             if (
                 neighbour in self._neighbour_degrees
             ):  # due to concurrency there may be errors
                 del self._neighbour_degrees[neighbour]
-        for neighbour in new_neighbours_set - old_neighbours:
+        for neighbour in added:
             await self._update_degree(neighbour)
-        self._neighbours = new_neighbours
 
     async def _handler_sample(self, sender: Node, sample: Sample):
         ttl = sample.ttl
@@ -1,6 +1,7 @@
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 
 from unsserv import extreme, stable
+from unsserv.common.aggregation.tree_aggregation import TreeAggregation
 from unsserv.common.services_abc import (
     IMembershipService,
     IClusteringService,
@@ -51,10 +52,16 @@ async def get_clustering_service(
 
 
 async def get_aggregation_service(
-    membership: IMembershipService, service_id: str, is_extreme=True, **config
+    membership: IMembershipService,
+    service_id: str,
+    is_extreme=True,
+    dissemination: Optional[IDisseminationService] = None,
+    **config
 ) -> IAggregationService:
     aggregation: IAggregationService
-    if is_extreme:
+    if dissemination:  # exact aggregation over its dissemination tree
+        aggregation = TreeAggregation(dissemination)
+    elif is_extreme:
         aggregation = extreme.AntiEntropy(membership)
     else:
         aggregation = stable.AntiEntropy(membership)
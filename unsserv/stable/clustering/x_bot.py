@@ -1,11 +1,10 @@
 import asyncio
 import random
-from typing import Any, Callable, List
+from typing import Any, Callable, List, Set
 
 from unsserv.common.services_abc import IMembershipService, IClusteringService
 from unsserv.common.structs import Node, Property
 from unsserv.common.typing import Handler
-from unsserv.common.utils import stop_task
 from unsserv.stable.clustering.config import XBotConfig
 from unsserv.stable.clustering.protocol import XBotProtocol
 from unsserv.stable.clustering.structs import Replace
@@ -19,7 +18,7 @@ class XBot(IClusteringService, IDoubleLayered):
     _protocol: XBotProtocol
     _config: XBotConfig
 
-    _local_view_optimize_task: asyncio.Task
+    _last_optimized_view: Set[Node]
 
     def __init__(self, membership: IMembershipService):
         super().__init__(membership.my_node)
@@ -37,16 +36,19 @@ class XBot(IClusteringService, IDoubleLayered):
         self._config.load_from_dict(configuration)
         self._ranking_function = configuration["ranking_function"]
         await self._start_two_layered(f"double_layered-{service_id}")
-        self._local_view_optimize_task = asyncio.create_task(
-            self._optimize_active_view_loop()
+        self._last_optimized_view = self._active_view.copy()
+        await self._scheduler.add_job(
+            f"xbot-{service_id}",
+            self._optimize_active_view_round,
+            self._config.MAINTENANCE_SLEEP,
+            first_delay=self._config.MAINTENANCE_SLEEP * 2,
         )
         self.running = True
 
     async def leave(self):
         if not self.running:
             return
-        if self._local_view_optimize_task:
-            await stop_task(self._local_view_optimize_task)
+        await self._scheduler.remove_job(f"xbot-{self.service_id}")
         await self._protocol.stop()
         await self._stop_two_layered()
         self.running = False
@@ -62,17 +64,22 @@ class XBot(IClusteringService, IDoubleLayered):
     def remove_neighbours_handler(self, handler: Handler):
         self._handlers_manager.remove_handler(handler)
 
+    def add_neighbours_delta_handler(self, handler: Handler):
+        if not self.running:
+            raise RuntimeError("Membership service not running")
+        self._delta_handlers_manager.add_handler(handler)
+
+    def remove_neighbours_delta_handler(self, handler: Handler):
+        self._delta_handlers_manager.remove_handler(handler)
+
     def _get_passive_view_nodes(self):
         return self.membership.get_neighbours()
 
-    async def _optimize_active_view_loop(self):
-        await asyncio.sleep(self._config.MAINTENANCE_SLEEP)
-        while True:
-            old_active_view = self._active_view.copy()
-            await asyncio.sleep(self._config.MAINTENANCE_SLEEP)
-            if len(self._active_view) >= self._config.ACTIVE_VIEW_SIZE:
-                await self._optimize_active_view()  # todo: create task instead?
-            self._call_handler_if_view_changed(old_active_view)
+    async def _optimize_active_view_round(self):
+        if len(self._active_view) >= self._config.ACTIVE_VIEW_SIZE:
+            await self._optimize_active_view()  # todo: create task instead?
+        self._call_handler_if_view_changed(self._last_optimized_view)
+        self._last_optimized_view = self._active_view.copy()
 
     async def _optimize_active_view(self):
         candidate_neighbours = self.membership.get_neighbours()
@@ -7,6 +7,9 @@ class PlumtreeConfig(IConfig):
     RETRIEVE_TIMEOUT = 3  # seconds
     MAINTENANCE_SLEEP = 1
     BUFFER_LIMIT = 100
+    BROADCAST_BUFFER_SIZE = 4096  # bytes
+    BROADCAST_BUFFER_DELAY = 0  # seconds, 0 for disseminating without buffering
+    BATCHED_DELIVERY = False  # a single worker delivering the events in batches
 
     def load_from_dict(self, config_dict: Dict[str, Any]):
         self.RETRIEVE_TIMEOUT = config_dict.get(
@@ -16,3 +19,12 @@ class PlumtreeConfig(IConfig):
             "maintenance_sleep", PlumtreeConfig.MAINTENANCE_SLEEP
         )
         self.BUFFER_LIMIT = config_dict.get("buffer_limit", PlumtreeConfig.BUFFER_LIMIT)
+        self.BROADCAST_BUFFER_SIZE = config_dict.get(
+            "broadcast_buffer_size", PlumtreeConfig.BROADCAST_BUFFER_SIZE
+        )
+        self.BROADCAST_BUFFER_DELAY = config_dict.get(
+            "broadcast_buffer_delay", PlumtreeConfig.BROADCAST_BUFFER_DELAY
+        )
+        self.BATCHED_DELIVERY = config_dict.get(
+            "batched_delivery", PlumtreeConfig.BATCHED_DELIVERY
+        )
@@ -1,11 +1,17 @@
 import asyncio
 from collections import OrderedDict
-from typing import Any, Optional, Set, OrderedDict as OrderedDictType
+from typing import Any, List, Optional, Set, OrderedDict as OrderedDictType
 
+from unsserv.common.scheduler.scheduler import Scheduler, SchedulerRegister
 from unsserv.common.services_abc import IDisseminationService, IMembershipService
-from unsserv.common.structs import Property, Node
+from unsserv.common.structs import HandlerExecutor, Node, Property
 from unsserv.common.typing import Handler
-from unsserv.common.utils import HandlersManager, get_random_id, stop_task
+from unsserv.common.utils import (
+    BroadcastBuffer,
+    HandlersManager,
+    get_random_id,
+    unpack_broadcast_data,
+)
 from unsserv.stable.dissemination.many_to_many.config import PlumtreeConfig
 from unsserv.stable.dissemination.many_to_many.protocol import PlumtreeProtocol
 from unsserv.stable.dissemination.many_to_many.structs import Push
@@ -19,14 +25,15 @@ from unsserv.stable.dissemination.many_to_many.typing import (
 class Plumtree(IDisseminationService):
     properties = {Property.STABLE, Property.ONE_TO_MANY, Property.SYMMETRIC}
     _protocol: PlumtreeProtocol
+    _scheduler: Scheduler
     _handlers_manager: HandlersManager
     _config: PlumtreeConfig
+    _broadcast_buffer: Optional[BroadcastBuffer]
 
     _eager_push_peers: Set[Node]
     _lazy_push_peers: Set[Node]
     _received_data: OrderedDictType[PlumDataId, PlumData]
     _digest: Set[PlumDataId]
-    _maintenance_task: asyncio.Task
 
     def __init__(self, membership: IMembershipService):
         if Property.SYMMETRIC not in membership.properties:
@@ -35,8 +42,10 @@ class Plumtree(IDisseminationService):
         self.my_node = membership.my_node
 
         self._protocol = PlumtreeProtocol(self.my_node)
+        self._scheduler = SchedulerRegister.get_scheduler(self.my_node)
         self._handlers_manager = HandlersManager()
         self._config = PlumtreeConfig()
+        self._broadcast_buffer = None
 
         self._eager_push_peers = set()
         self._lazy_push_peers = set()
@@ -51,36 +60,63 @@ class Plumtree(IDisseminationService):
             self._handlers_manager.add_handler(configuration["broadcast_handler"])
         await self._initialize_protocol()
         self._config.load_from_dict(configuration)
-        self._maintenance_task = asyncio.create_task(self._maintenance_loop())
+        self._handlers_manager.set_batched(self._config.BATCHED_DELIVERY)
+        if self._config.BROADCAST_BUFFER_DELAY:
+            self._broadcast_buffer = BroadcastBuffer(
+                self.broadcast_many,
+                self._config.BROADCAST_BUFFER_SIZE,
+                self._config.BROADCAST_BUFFER_DELAY,
+            )
+        await self._scheduler.add_job(
+            f"plumtree-{service_id}", self._maintenance, self._config.MAINTENANCE_SLEEP,
+        )
         self.running = True
 
     async def leave(self):
         if not self.running:
             return
-        await stop_task(self._maintenance_task)
+        if self._broadcast_buffer:
+            await self._broadcast_buffer.stop()
+            self._broadcast_buffer = None
+        await self._scheduler.remove_job(f"plumtree-{self.service_id}")
         await self._protocol.stop()
         self._handlers_manager.remove_all_handlers()
         self.running = False
 
     async def broadcast(self, data: bytes):
+        if self._broadcast_buffer:
+            await self._broadcast_buffer.add(data)
+        else:
+            await self._broadcast_push(data)
+
+    async def broadcast_many(self, data: List[bytes]):
+        if not self.running:
+            raise RuntimeError("Dissemination service not running")
+        assert all(isinstance(single_data, bytes) for single_data in data)
+        await self._broadcast_push(list(data))
+
+    async def _broadcast_push(self, data: PlumData):
         data_id = get_random_id()
         push = Push(data=data, data_id=data_id)
         self._received_data[data_id] = data
         await self._forward_push(push, self.my_node)
 
-    def add_broadcast_handler(self, handler: Handler):
-        self._handlers_manager.add_handler(handler)
+    def add_broadcast_handler(
+        self,
+        handler: Handler,
+        executor: HandlerExecutor = HandlerExecutor.EVENT_LOOP,
+        max_concurrency: int = 1,
+    ):
+        self._handlers_manager.add_handler(handler, executor, max_concurrency)
 
     def remove_broadcast_handler(self, handler: Handler):
         self._handlers_manager.remove_handler(handler)
 
-    async def _maintenance_loop(self):
-        while True:
-            await asyncio.sleep(self._config.MAINTENANCE_SLEEP)
-            while self._config.BUFFER_LIMIT < len(self._received_data):
-                self._received_data.popitem(last=False)
-            self._update_peers()
-            asyncio.create_task(self._forward_digest())
+    async def _maintenance(self):
+        while self._config.BUFFER_LIMIT < len(self._received_data):
+            self._received_data.popitem(last=False)
+        self._update_peers()
+        asyncio.create_task(self._forward_digest())
 
     def _update_peers(self):
         old_peers_set = self._eager_push_peers.union(self._lazy_push_peers)
@@ -104,7 +140,8 @@ class Plumtree(IDisseminationService):
     def _add_new_data(self, push: Push, sender: Node):
         self._received_data[push.data_id] = push.data
         self._digest.add(push.data_id)
-        self._handlers_manager.call_handlers(push.data)
+        for single_data in unpack_broadcast_data(push.data):
+            self._handlers_manager.call_handlers(single_data)
         asyncio.create_task(self._forward_push(push, sender))
 
     async def _retrieve_unreceived_data(self, sender: Node, data_id: PlumDataId):
@@ -1,5 +1,5 @@
 from enum import IntEnum, auto
-from typing import Tuple, Sequence, Optional
+from typing import Any, Dict, Tuple, Sequence, Optional
 
 from unsserv.common.rpc.protocol import AProtocol, ITranscoder, Command, Data, Handler
 from unsserv.common.rpc.structs import Message
@@ -28,7 +28,7 @@ class PlumtreeTranscoder(ITranscoder):
     def encode(self, command: Command, *data: Data) -> Message:
         if command == PlumtreeCommand.PUSH:
             push: Push = data[0]
-            message_data = {
+            message_data: Dict[str, Any] = {
                 FIELD_COMMAND: PlumtreeCommand.PUSH,
                 FIELD_DATA: push.data,
                 FIELD_DATA_ID: push.data_id,
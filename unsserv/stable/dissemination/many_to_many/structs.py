@@ -1,7 +1,9 @@
 from dataclasses import dataclass
 
+from unsserv.stable.dissemination.many_to_many.typing import PlumData
+
 
 @dataclass
 class Push:
-    data: bytes
+    data: PlumData
     data_id: str
@@ -1,5 +1,7 @@
 from typing import List
 
-PlumData = bytes
+from unsserv.common.typing import BroadcastData
+
+PlumData = BroadcastData
 PlumDataId = str
 Digest = List[PlumDataId]
@@ -1,36 +1,45 @@
 import asyncio
 import math
 import random
-from typing import Any, Set
+from typing import Any, List, Optional, Set
 
 from unsserv.common.errors import ServiceError
+from unsserv.common.scheduler.scheduler import Scheduler, SchedulerRegister
 from unsserv.common.services_abc import IDisseminationService, IMembershipService
-from unsserv.common.structs import Node, Property
-from unsserv.common.typing import Handler
-from unsserv.common.utils import get_random_id, HandlersManager, stop_task
+from unsserv.common.structs import HandlerExecutor, Node, Property
+from unsserv.common.typing import BroadcastData, Handler
+from unsserv.common.utils import (
+    BroadcastBuffer,
+    get_random_id,
+    HandlersManager,
+    unpack_broadcast_data,
+)
 from unsserv.stable.dissemination.one_to_many.config import BrisaConfig
 from unsserv.stable.dissemination.one_to_many.protocol import BrisaProtocol
 from unsserv.stable.dissemination.one_to_many.typing import BroadcastLevel
 
 
 class Brisa(IDisseminationService):
-    properties = {Property.STABLE, Property.ONE_TO_MANY}
+    properties = {Property.STABLE, Property.ONE_TO_MANY, Property.HAS_TREE}
     _protocol: BrisaProtocol
+    _scheduler: Scheduler
     _handlers_manager: HandlersManager
     _config: BrisaConfig
+    _broadcast_buffer: Optional[BroadcastBuffer]
 
     _level: BroadcastLevel
     _children: Set[Node]
     _parents: Set[Node]
     _im_root: bool
-    _maintenance_task: asyncio.Task
 
     def __init__(self, membership: IMembershipService):
         self.my_node = membership.my_node
         self.membership = membership
         self._protocol = BrisaProtocol(self.my_node)
+        self._scheduler = SchedulerRegister.get_scheduler(self.my_node)
         self._handlers_manager = HandlersManager()
         self._config = BrisaConfig()
+        self._broadcast_buffer = None
 
         self._children = set()
         self._parents = set()
@@ -46,13 +55,27 @@ class Brisa(IDisseminationService):
         if "broadcast_handler" in configuration:
             self._handlers_manager.add_handler(configuration["broadcast_handler"])
         self._config.load_from_dict(configuration)
-        self._maintenance_task = asyncio.create_task(self._maintain_dag_loop())
+        if self._config.BROADCAST_BUFFER_DELAY:
+            self._broadcast_buffer = BroadcastBuffer(
+                self.broadcast_many,
+                self._config.BROADCAST_BUFFER_SIZE,
+                self._config.BROADCAST_BUFFER_DELAY,
+            )
+        if self._im_root:
+            self._broadcast_id = get_random_id()
+            self._level = 0
+        await self._scheduler.add_job(
+            f"brisa-{service_id}", self._maintain_dag, self._config.MAINTENANCE_SLEEP
+        )
         self.running = True
 
     async def leave(self):
         if not self.running:
             return
-        await stop_task(self._maintenance_task)
+        if self._broadcast_buffer:
+            await self._broadcast_buffer.stop()
+            self._broadcast_buffer = None
+        await self._scheduler.remove_job(f"brisa-{self.service_id}")
         self._handlers_manager.remove_all_handlers()
         await self._protocol.stop()
         self.running = False
@@ -63,25 +86,51 @@ class Brisa(IDisseminationService):
         if self._im_root is False:
             raise RuntimeError("Node must be root to broadcast")
         assert isinstance(data, bytes)
-        await self._disseminate(data)
+        if self._broadcast_buffer:
+            await self._broadcast_buffer.add(data)
+        else:
+            await self._disseminate(data)
 
-    def add_broadcast_handler(self, handler: Handler):
-        self._handlers_manager.add_handler(handler)
+    async def broadcast_many(self, data: List[bytes]):
+        if not self.running:
+            raise RuntimeError("Dissemination service not running")
+        if self._im_root is False:
+            raise RuntimeError("Node must be root to broadcast")
+        assert all(isinstance(single_data, bytes) for single_data in data)
+        await self._disseminate(list(data))
+
+    def add_broadcast_handler(
+        self,
+        handler: Handler,
+        executor: HandlerExecutor = HandlerExecutor.EVENT_LOOP,
+        max_concurrency: int = 1,
+    ):
+        self._handlers_manager.add_handler(handler, executor, max_concurrency)
 
     def remove_broadcast_handler(self, handler: Handler):
         self._handlers_manager.remove_handler(handler)
 
-    async def _maintain_dag_loop(self):
-        if self._im_root:
-            self._broadcast_id = get_random_id()
-            self._level = 0
-        while True:
-            await asyncio.sleep(self._config.MAINTENANCE_SLEEP)
-            if not self._im_root:
-                await self._maintain_parents()
-                if not self._parents:
-                    continue
-            await self._maintain_children()
+    async def build_tree(self) -> str:
+        """
+        Get the ID of the dissemination tree rooted at this node.
+
+        Brisa maintains a single tree, so only the root can build it.
+        """
+        if not self.running:
+            raise RuntimeError("Dissemination service not running")
+        if self._im_root is False:
+            raise RuntimeError("Node must be root to build the tree")
+        return self._broadcast_id
+
+    async def get_tree_children(self, tree_id: str) -> List[Node]:
+        return list(self._children)
+
+    async def _maintain_dag(self):
+        if not self._im_root:
+            await self._maintain_parents()
+            if not self._parents:
+                return
+        await self._maintain_children()
 
     async def _maintain_parents(self):
         for parent in self._parents.copy():
@@ -126,7 +175,7 @@ class Brisa(IDisseminationService):
             except ConnectionError:
                 pass
 
-    async def _disseminate(self, data: bytes):
+    async def _disseminate(self, data: BroadcastData):
         pushed_amount = 0
         for child in self._children:
             try:
@@ -144,9 +193,10 @@ class Brisa(IDisseminationService):
         self._level = min(level + 1, self._level)
         return True
 
-    async def _handler_push(self, sender: Node, data: bytes):
+    async def _handler_push(self, sender: Node, data: BroadcastData):
         asyncio.create_task(self._disseminate(data))
-        self._handlers_manager.call_handlers(data)
+        for single_data in unpack_broadcast_data(data):
+            self._handlers_manager.call_handlers(single_data)
 
     async def _handler_im_your_child(self, sender: Node):
         return sender in self._children
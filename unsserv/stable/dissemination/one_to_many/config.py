@@ -6,9 +6,17 @@ from unsserv.common.utils import IConfig
 class BrisaConfig(IConfig):
     FANOUT = 3
     MAINTENANCE_SLEEP = 0.5
+    BROADCAST_BUFFER_SIZE = 4096  # bytes
+    BROADCAST_BUFFER_DELAY = 0  # seconds, 0 for disseminating without buffering
 
     def load_from_dict(self, config_dict: Dict[str, Any]):
         self.FANOUT = config_dict.get("fanout", BrisaConfig.FANOUT)
         self.MAINTENANCE_SLEEP = config_dict.get(
             "maintenance_sleep", BrisaConfig.MAINTENANCE_SLEEP
         )
+        self.BROADCAST_BUFFER_SIZE = config_dict.get(
+            "broadcast_buffer_size", BrisaConfig.BROADCAST_BUFFER_SIZE
+        )
+        self.BROADCAST_BUFFER_DELAY = config_dict.get(
+            "broadcast_buffer_delay", BrisaConfig.BROADCAST_BUFFER_DELAY
+        )
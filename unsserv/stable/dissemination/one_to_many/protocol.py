@@ -4,6 +4,7 @@ from typing import Tuple, Sequence
 from unsserv.common.structs import Node
 from unsserv.common.rpc.structs import Message
 from unsserv.common.rpc.protocol import AProtocol, ITranscoder, Command, Data, Handler
+from unsserv.common.typing import BroadcastData
 from unsserv.stable.dissemination.one_to_many.typing import BroadcastLevel
 
 
@@ -29,7 +30,7 @@ class BrisaTranscoder(ITranscoder):
             }
             return Message(self.my_node, self.service_id, message_data)
         elif command == BrisaCommand.PUSH:
-            broadcast_data: bytes = data[0]
+            broadcast_data: BroadcastData = data[0]
             message_data = {
                 FIELD_COMMAND: BrisaCommand.PUSH,
                 FIELD_BROADCAST_DATA: broadcast_data,  # type:ignore
@@ -53,7 +54,7 @@ class BrisaTranscoder(ITranscoder):
             level: BroadcastLevel = message.data[FIELD_LEVEL]
             return BrisaCommand.SESSION, [level]
         elif command == BrisaCommand.PUSH:
-            data: bytes = message.data[FIELD_BROADCAST_DATA]
+            data: BroadcastData = message.data[FIELD_BROADCAST_DATA]
             return BrisaCommand.PUSH, [data]
         elif command == BrisaCommand.IM_YOUR_CHILD:
             return BrisaCommand.IM_YOUR_CHILD, []
@@ -70,7 +71,7 @@ class BrisaProtocol(AProtocol):
         message = self._transcoder.encode(BrisaCommand.SESSION, level)
         return await self._rpc.call_send_message(destination, message)
 
-    async def push(self, destination: Node, data: bytes):
+    async def push(self, destination: Node, data: BroadcastData):
         message = self._transcoder.encode(BrisaCommand.PUSH, data)
         return await self._rpc.call_send_message(destination, message)
 
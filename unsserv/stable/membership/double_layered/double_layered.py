@@ -5,8 +5,9 @@ from collections import Counter
 from contextlib import contextmanager
 from typing import List, Set, Counter as CounterType
 
+from unsserv.common.scheduler.scheduler import Scheduler, SchedulerRegister
 from unsserv.common.structs import Node
-from unsserv.common.utils import stop_task, HandlersManager
+from unsserv.common.utils import DeltaHandlersManager, HandlersManager
 from unsserv.stable.membership.double_layered.config import DoubleLayeredConfig
 from unsserv.stable.membership.double_layered.protocol import DoubleLayeredProtocol
 from unsserv.stable.membership.double_layered.structs import ForwardJoin
@@ -14,30 +15,40 @@ from unsserv.stable.membership.double_layered.structs import ForwardJoin
 
 class IDoubleLayered(ABC):
     _handlers_manager: HandlersManager
+    _delta_handlers_manager: DeltaHandlersManager
     _doble_layered_protocol: DoubleLayeredProtocol
+    _scheduler: Scheduler
     _config: DoubleLayeredConfig
 
     _active_view: Set[Node]
+    _old_active_view: Set[Node]
     _candidate_neighbours: CounterType[Node]
-    _local_view_maintenance_task: asyncio.Task
+    _is_joined: bool
 
     def __init__(self, my_node: Node):
         self.my_node = my_node
         self._handlers_manager = HandlersManager()
+        self._delta_handlers_manager = DeltaHandlersManager()
         self._doble_layered_protocol = DoubleLayeredProtocol(my_node)
+        self._scheduler = SchedulerRegister.get_scheduler(my_node)
         self._active_view = set()
+        self._old_active_view = set()
         self._candidate_neighbours = Counter()
+        self._is_joined = False
 
     async def _start_two_layered(self, service_id: str):
         await self._initialize_double_layered_protocol(service_id)
-        self._local_view_maintenance_task = asyncio.create_task(
-            self._maintain_active_view_loop()
+        self._is_joined = False
+        await self._scheduler.add_job(
+            service_id,
+            self._maintain_active_view,
+            self._config.MAINTENANCE_SLEEP,
+            first_delay=0,
         )
 
     async def _stop_two_layered(self):
         self._active_view = set()
-        if self._local_view_maintenance_task:
-            await stop_task(self._local_view_maintenance_task)
+        await self._scheduler.remove_job(self._doble_layered_protocol.service_id)
         await self._doble_layered_protocol.stop()
 
     async def _join_first_time(self):
@@ -56,13 +67,14 @@ class IDoubleLayered(ABC):
                 except ConnectionError:
                     pass
 
-    async def _maintain_active_view_loop(self):
-        await self._join_first_time()
-        while True:
-            old_active_view = self._active_view.copy()
-            await asyncio.sleep(self._config.MAINTENANCE_SLEEP)
+    async def _maintain_active_view(self):
+        if not self._is_joined:
+            await self._join_first_time()
+            self._is_joined = True
+        else:
             await self._update_active_view()
-            self._call_handler_if_view_changed(old_active_view)
+            self._call_handler_if_view_changed(self._old_active_view)
+        self._old_active_view = self._active_view.copy()
 
     async def _update_active_view(self):
         inactive_nodes = set()
@@ -118,6 +130,7 @@ class IDoubleLayered(ABC):
         if old_local_view == self._active_view:
             return
         self._handlers_manager.call_handlers(list(self._active_view))
+        self._delta_handlers_manager.update_neighbours(self._active_view)
 
     @contextmanager
     def _create_candidate_neighbour(self, node: Node):
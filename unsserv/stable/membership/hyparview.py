@@ -48,5 +48,13 @@ class HyParView(IMembershipService, IDoubleLayered):
     def remove_neighbours_handler(self, handler: Handler):
         self._handlers_manager.remove_handler(handler)
 
+    def add_neighbours_delta_handler(self, handler: Handler):
+        if not self.running:
+            raise RuntimeError("Membership service not running")
+        self._delta_handlers_manager.add_handler(handler)
+
+    def remove_neighbours_delta_handler(self, handler: Handler):
+        self._delta_handlers_manager.remove_handler(handler)
+
     def _get_passive_view_nodes(self):
         return list(self.gossip.local_view.keys())
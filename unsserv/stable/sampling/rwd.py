@@ -1,6 +1,6 @@
 import asyncio
 import random
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Set
 
 from unsserv.common.errors import ServiceError
 from unsserv.common.services_abc import IMembershipService, ISamplingService
@@ -53,7 +53,7 @@ class RWD(ISamplingService):
             self._weights_maintenance_loop()
         )  # stop degrees updater task
         # initialize RPC
-        self.membership.add_neighbours_handler(
+        self.membership.add_neighbours_delta_handler(
             self._membership_neighbours_handler  # type: ignore
         )
         self.running = True
@@ -61,7 +61,9 @@ class RWD(ISamplingService):
     async def leave(self):
         if not self.running:
             return
-        self.membership.remove_neighbours_handler(self._membership_neighbours_handler)
+        self.membership.remove_neighbours_delta_handler(
+            self._membership_neighbours_handler
+        )
         self._neighbours = []
         await self._protocol.stop()
         if self._maintain_weights_task:  # stop degrees updater task
@@ -119,15 +121,17 @@ class RWD(ISamplingService):
             else:
                 neighbours.remove(neighbour)
 
-    async def _membership_neighbours_handler(self, new_neighbours: List[Node]):
-        old_neighbours = set(self._neighbours)
-        new_neighbours_set = set(new_neighbours)
-        for neighbour in old_neighbours - new_neighbours_set:
+    async def _membership_neighbours_handler(
+        self, added: Set[Node], removed: Set[Node], version: int
+    ):
+        for neighbour in removed:
             if (
                 neighbour in self._neighbour_weights
             ):  # due to concurrency there may be errors
                 self._my_weight += self._neighbour_weights.pop(neighbour)
-        self._neighbours = new_neighbours
+        self._neighbours = [n for n in self._neighbours if n not in removed] + [
+            n for n in added if n not in self._neighbours
+        ]
         self._new_neighbours_event.set()
 
     async def _handler_sample(self, sender: Node, sample: Sample):
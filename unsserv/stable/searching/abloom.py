@@ -3,9 +3,10 @@ from contextlib import asynccontextmanager
 from functools import reduce
 from typing import Optional, Any, List, Dict, Set
 
+from unsserv.common.scheduler.scheduler import Scheduler, SchedulerRegister
 from unsserv.common.services_abc import ISearchingService, IMembershipService
 from unsserv.common.structs import Node, Property
-from unsserv.common.utils import get_random_id, stop_task
+from unsserv.common.utils import get_random_id
 from unsserv.stable.searching.config import ABloomConfig
 from unsserv.stable.searching.protocol import ABloomProtocol
 from unsserv.stable.searching.structs import Search, SearchResult, DataChange
@@ -15,12 +16,12 @@ from unsserv.stable.searching.typing import DataID, SearchID
 class ABloom(ISearchingService):
     properties = {Property.STABLE}
     _protocol: ABloomProtocol
+    _scheduler: Scheduler
     _config: ABloomConfig
 
     _neighbours: List[Node]
     _local_data: Dict[DataID, bytes]
     _abloom_filters: Dict[Node, List[Set[DataID]]]
-    _filters_maintenance_task: asyncio.Task
     _search_events: Dict[SearchID, asyncio.Event]
     _search_results: Dict[SearchID, bytes]
 
@@ -28,6 +29,7 @@ class ABloom(ISearchingService):
         self.my_node = membership.my_node
         self.membership = membership
         self._protocol = ABloomProtocol(self.my_node)
+        self._scheduler = SchedulerRegister.get_scheduler(self.my_node)
         self._config = ABloomConfig()
 
         self._init_structs()
@@ -39,15 +41,17 @@ class ABloom(ISearchingService):
         await self._initialize_protocol()
         self._config.load_from_dict(configuration)
         self._init_structs()
-        self._filters_maintenance_task = asyncio.create_task(
-            self._filter_maintenance_loop()
+        await self._scheduler.add_job(
+            f"abloom-{service_id}",
+            self._filter_maintenance,
+            self._config.MAINTENANCE_SLEEP,
         )
         self.running = True
 
     async def leave(self):
         if not self.running:
             return
-        await stop_task(self._filters_maintenance_task)
+        await self._scheduler.remove_job(f"abloom-{self.service_id}")
         await self._protocol.stop()
         self.running = False
 
@@ -125,15 +129,13 @@ class ABloom(ISearchingService):
             except ConnectionError:
                 pass
 
-    async def _filter_maintenance_loop(self):
-        while True:
-            await asyncio.sleep(self._config.MAINTENANCE_SLEEP)
-            new_neighbours = set(self.membership.get_neighbours())
-            old_neighbours = set(self._neighbours)
-            for neighbour in old_neighbours - new_neighbours:
-                del self._abloom_filters[neighbour]
-                self._neighbours.remove(neighbour)
-            await self._initialize_new_neighbours(list(new_neighbours - old_neighbours))
+    async def _filter_maintenance(self):
+        new_neighbours = set(self.membership.get_neighbours())
+        old_neighbours = set(self._neighbours)
+        for neighbour in old_neighbours - new_neighbours:
+            del self._abloom_filters[neighbour]
+            self._neighbours.remove(neighbour)
+        await self._initialize_new_neighbours(list(new_neighbours - old_neighbours))
 
     def _search_data_in_filters(self, data_id: str, max_depth: int) -> Optional[Node]:
         for neighbour in self._neighbours: